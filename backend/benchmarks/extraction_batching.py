@@ -0,0 +1,109 @@
+"""Per-post vs batched place extraction: Gemini calls, prompt tokens and wall time.
+
+Swaps the Gemini client for a fake whose latency grows with prompt and
+output size (a fixed cost per call plus per-token costs), and which answers
+with one place per post it sees, so the run also checks that every place is
+attributed to the post it came from. Token counts come from the extractor's
+TokenLedger.
+
+Usage:
+    python benchmarks/extraction_batching.py
+    python benchmarks/extraction_batching.py --workers 4 --base 0.8 --per-1k-input 0.1 --per-output 0.004
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapper"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from place_extractor import PlaceExtractor
+from prompt_packer import TokenLedger, count_tokens
+from prompt_tokens import load_posts, synthetic_threads
+
+TITLE_RE = re.compile(r'^(?:=== POST (P\d+) ===\n)?POST TITLE: (.*)$', re.MULTILINE)
+
+
+class FakeModels:
+    """generate_content that sleeps like a real call and echoes one place per post."""
+
+    def __init__(self, base: float, per_1k_input: float, per_output: float):
+        self.base = base
+        self.per_1k_input = per_1k_input
+        self.per_output = per_output
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, model, contents, config=None):
+        with self._lock:
+            self.calls += 1
+        lines = []
+        for post_id, title in TITLE_RE.findall(contents):
+            row = f"Spot from {title[:40]} | Paris | France | cafe | coffee, local | " \
+                  f"Tiny counter spot the thread keeps recommending, go early. | high"
+            lines.append(f"{post_id} | {row}" if post_id else row)
+        text = '\n'.join(lines)
+        time.sleep(self.base + count_tokens(contents) / 1000 * self.per_1k_input
+                   + count_tokens(text) * self.per_output)
+        return SimpleNamespace(text=text, usage_metadata=None)
+
+
+def run(posts, batched, args):
+    models = FakeModels(args.base, args.per_1k_input, args.per_output)
+    usage = TokenLedger()
+    extractor = PlaceExtractor(usage=usage)
+    extractor.client = SimpleNamespace(models=models)
+
+    start = time.perf_counter()
+    if batched:
+        results = extractor.extract_batched(posts, args.token_budget, args.max_batch, workers=args.workers)
+    else:
+        # Same concurrency as the harvester's per-post path
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(extractor.extract_from_post, posts))
+    elapsed = time.perf_counter() - start
+
+    misattributed = sum(
+        1 for post, places in zip(posts, results) for place in places
+        if place['sources'][0]['title'] != post.get('title', '')
+    )
+    tokens = sum(t['estimated_prompt_tokens'] for t in usage.totals.values())
+    return {
+        'calls': models.calls,
+        'tokens': tokens,
+        'seconds': elapsed,
+        'places': sum(len(p) for p in results),
+        'misattributed': misattributed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-post and batched extraction")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Gemini calls")
+    parser.add_argument("--token-budget", type=int, default=12000)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--base", type=float, default=0.5, help="Fixed seconds per call")
+    parser.add_argument("--per-1k-input", type=float, default=0.05, help="Seconds per 1k prompt tokens")
+    parser.add_argument("--per-output", type=float, default=0.002, help="Seconds per output token")
+    args = parser.parse_args()
+
+    datasets = [("recorded posts", load_posts()), ("synthetic long threads", synthetic_threads())]
+    for name, posts in datasets:
+        print(f"\n📦 {len(posts)} {name} ({args.workers} workers)")
+        single = run(posts, False, args)
+        batched = run(posts, True, args)
+        for label, r in (("per-post", single), ("batched", batched)):
+            print(f"   {label:>8}: {r['calls']:3} calls, {r['tokens']:7} prompt tokens, "
+                  f"{r['seconds']:5.2f}s, {r['places']} places, {r['misattributed']} misattributed")
+        print(f"   tokens {batched['tokens'] / single['tokens'] - 1:+.0%}, "
+              f"wall time {batched['seconds'] / single['seconds'] - 1:+.0%}")
+
+
+if __name__ == "__main__":
+    main()
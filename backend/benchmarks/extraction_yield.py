@@ -0,0 +1,114 @@
+"""Yield comparison: text (pipe-delimited) vs JSON-mode place extraction.
+
+Parses recorded Gemini responses for the same posts with both parsers and
+reports, per mode, how many places came out intact, mangled or lost. The
+JSON-mode places are the reference set.
+
+Usage:
+    python benchmarks/extraction_yield.py                  # report on fixtures
+    python benchmarks/extraction_yield.py --record posts.json
+        # call Gemini in both modes for each post and save as fixtures
+"""
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapper"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from place_extractor import PlaceExtractor
+
+FIXTURES = Path(__file__).parent / "fixtures" / "extraction_responses.json"
+
+
+def _key(place):
+    return place['name'].lower().strip()
+
+
+def compare(cases):
+    extractor = PlaceExtractor()
+    totals = {'reference': 0, 'text_intact': 0, 'text_mangled': 0, 'text_lost': 0, 'json_rows': 0}
+
+    for i, case in enumerate(cases, 1):
+        post = case['post']
+        text_places = extractor._parse_response(case['text_response'], post)
+        json_places = extractor._parse_json_response(case['json_response'], post)
+
+        reference = {_key(p): p for p in json_places}
+        text_by_key = {_key(p): p for p in text_places}
+
+        intact = sum(
+            1 for k, p in reference.items()
+            if k in text_by_key and text_by_key[k]['vibe'] == p['vibe']
+        )
+        # Present in text mode but with a different name or vibe
+        mangled = len(text_places) - intact
+        lost = len(reference) - intact
+
+        totals['reference'] += len(reference)
+        totals['json_rows'] += len(json_places)
+        totals['text_intact'] += intact
+        totals['text_mangled'] += mangled
+        totals['text_lost'] += max(lost - mangled, 0)
+
+        print(f"[{i}] {post.get('title', '')[:50]}")
+        print(f"    json: {len(json_places)} places | text: {intact} intact, {mangled} mangled, "
+              f"{max(lost - mangled, 0)} lost")
+
+    ref = totals['reference'] or 1
+    print(f"\n{'='*60}")
+    print(f"📊 EXTRACTION YIELD ({len(cases)} posts)")
+    print(f"{'='*60}")
+    print(f"JSON mode:  {totals['json_rows']} places")
+    print(f"Text mode:  {totals['text_intact']} intact ({totals['text_intact'] / ref:.0%}), "
+          f"{totals['text_mangled']} mangled, {totals['text_lost']} lost")
+    return totals
+
+
+def record(posts_file: Path):
+    """Call Gemini in both modes for each post and write a fixture file."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    text_extractor = PlaceExtractor(mode='text')
+    json_extractor = PlaceExtractor(mode='json')
+
+    with open(posts_file, 'r', encoding='utf-8') as f:
+        posts = json.load(f)
+
+    cases = []
+    for i, post in enumerate(posts, 1):
+        print(f"[{i}/{len(posts)}] {post.get('title', '')[:60]}")
+        text_response = text_extractor.client.models.generate_content(
+            model=text_extractor.model,
+            contents=text_extractor._build_prompt(post),
+        )
+        json_response = json_extractor.client.models.generate_content(
+            model=json_extractor.model,
+            contents=json_extractor._build_prompt(post, structured=True),
+            config=json_extractor._json_config(),
+        )
+        cases.append({
+            'post': post,
+            'text_response': text_response.text,
+            'json_response': json_response.text,
+        })
+
+    with open(FIXTURES, 'w', encoding='utf-8') as f:
+        json.dump({'note': f'Recorded from {posts_file.name}', 'cases': cases}, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Recorded {len(cases)} cases to: {FIXTURES}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare text vs JSON extraction yield")
+    parser.add_argument("--record", type=Path, help="JSON list of posts to record live responses for")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+    else:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            compare(json.load(f)['cases'])
@@ -0,0 +1,105 @@
+"""Rate-limit storm: how many calls each error strategy burns and how much work survives.
+
+A fake Gemini answers in `--latency` seconds, except during a storm window
+where every call fails with a real google-genai 429 (RESOURCE_EXHAUSTED with
+a RetryInfo delay). N workers push the same task list through:
+
+- none:    one attempt per task, failures are dropped (the old behaviour)
+- retry:   jittered exponential backoff honouring retry-after, no breaker
+- breaker: the same plus a shared circuit breaker that pauses every worker
+
+Usage:
+    python benchmarks/gemini_storm.py --tasks 400 --workers 8 --storm 0.5 2.0
+"""
+import sys
+import time
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from google.genai import errors
+
+from gemini_resilience import CircuitBreaker, ResilientCaller
+
+
+class StormyGemini:
+    def __init__(self, storm_start: float, storm_end: float, latency: float, retry_delay: float):
+        self.storm_start = storm_start
+        self.storm_end = storm_end
+        self.latency = latency
+        self.retry_delay = retry_delay
+        self.calls = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+
+    def generate(self):
+        now = time.monotonic() - self._t0
+        with self._lock:
+            self.calls += 1
+            storming = self.storm_start <= now < self.storm_end
+            if storming:
+                self.rejected += 1
+        time.sleep(self.latency)
+        if storming:
+            raise errors.ClientError(429, {'error': {
+                'code': 429, 'status': 'RESOURCE_EXHAUSTED', 'message': 'Quota exceeded',
+                'details': [{'@type': 'type.googleapis.com/google.rpc.RetryInfo',
+                             'retryDelay': f'{self.retry_delay}s'}],
+            }})
+        return 'ok'
+
+
+def run(strategy, args):
+    api = StormyGemini(args.storm[0], args.storm[1], args.latency, args.retry_delay)
+    caller = None
+    if strategy != 'none':
+        breaker = CircuitBreaker('storm', failure_threshold=5, cooldown=args.cooldown) if strategy == 'breaker' else None
+        caller = ResilientCaller('storm', max_attempts=args.attempts, base_delay=0.05, max_delay=1.0, breaker=breaker)
+
+    def task(_):
+        try:
+            return caller.call(api.generate) if caller else api.generate()
+        except errors.APIError:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(task, range(args.tasks)))
+    return {
+        'done': sum(r is not None for r in results),
+        'calls': api.calls,
+        'rejected': api.rejected,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retry strategies under a 429 storm")
+    parser.add_argument("--tasks", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds per call")
+    parser.add_argument("--storm", type=float, nargs=2, default=[0.3, 1.5], metavar=("START", "END"))
+    parser.add_argument("--retry-delay", type=float, default=0.2, help="retryDelay the 429s carry")
+    parser.add_argument("--cooldown", type=float, default=0.25, help="Breaker cooldown")
+    parser.add_argument("--attempts", type=int, default=8)
+    args = parser.parse_args()
+
+    with open('/dev/null', 'w') as quiet:
+        print(f"📦 {args.tasks} calls, {args.workers} workers, storm {args.storm[0]}-{args.storm[1]}s\n")
+        print(f"{'strategy':>8} {'done':>6} {'lost':>5} {'calls':>6} {'429s':>5} {'seconds':>8}")
+        for strategy in ('none', 'retry', 'breaker'):
+            stdout, sys.stdout = sys.stdout, quiet  # retry/circuit log lines
+            try:
+                r = run(strategy, args)
+            finally:
+                sys.stdout = stdout
+            print(f"{strategy:>8} {r['done']:>6} {args.tasks - r['done']:>5} {r['calls']:>6} "
+                  f"{r['rejected']:>5} {r['seconds']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Long chats: prompt tokens and TTFT vs conversation length, full history vs windowed.
+
+Replays a synthetic trip-planning chat one request at a time through
+`astream_chat_to_gemini`, the way the frontend sends it (every request
+carries the whole history). The fake Gemini waits `--base-ms` plus
+`--prefill-ms` per 1k prompt tokens before its first chunk, so TTFT follows
+prompt size the way it does for the real model; summary calls take
+`--summary-ms`. Prints both modes side by side and how many summary calls the
+windowed run made.
+
+Usage:
+    python benchmarks/history_window.py
+    python benchmarks/history_window.py --turns 120 --budget 2000
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+os.environ.setdefault("LOWKEY_RAG", "off")
+os.environ.setdefault("LOWKEY_RESPONSE_CACHE", "off")
+
+import llm_client
+from conversation_window import ConversationWindow
+from prompt_packer import count_tokens
+
+CITIES = ["Lisbon", "Porto", "Seville", "Granada", "Valencia", "Barcelona"]
+TOPICS = ["cheap eats", "rooftop bars", "day trips", "hidden viewpoints", "vintage shops", "live music"]
+
+
+def make_chat(turns, seed=9):
+    rng = random.Random(seed)
+    messages = []
+    for i in range(turns):
+        city, topic = rng.choice(CITIES), rng.choice(TOPICS)
+        if i % 2 == 0:
+            text = f"ok next up {city} - any {topic} you'd rate? we're on a budget and hate crowds, staying {rng.randint(2, 5)} nights"
+        else:
+            spots = " ".join(
+                f"- Spot {rng.randint(1, 999)} in {city}: locals swear by it for {topic}, go before {rng.randint(5, 9)}pm, "
+                f"around {rng.randint(5, 30)} euros, Momo approves 🐾." for _ in range(6)
+            )
+            text = f"Okay {city} {topic} check ✨ {spots} Pro tip: book the tram pass early."
+        messages.append({"id": f"m{i}", "role": "user" if i % 2 == 0 else "assistant",
+                         "parts": [{"type": "text", "text": text}]})
+    return messages
+
+
+class FakeLLM:
+    def __init__(self, base, prefill_per_1k):
+        self.base = base
+        self.prefill_per_1k = prefill_per_1k
+        self.prompt_tokens = 0
+
+    async def astream_chat(self, messages):
+        self.prompt_tokens = sum(count_tokens(m.content or "") + 4 for m in messages)
+        delay = self.base + self.prefill_per_1k * self.prompt_tokens / 1000
+
+        async def gen():
+            await asyncio.sleep(delay)
+            for i in range(3):
+                yield SimpleNamespace(delta=f"chunk{i} ", raw={})
+        return gen()
+
+
+class FakeSummarizer:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+        async def generate_content(model, contents):
+            self.calls += 1
+            await asyncio.sleep(self.latency)
+            return SimpleNamespace(text="- " + " ".join(["note"] * 120))
+
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))
+
+
+async def replay(chat, checkpoints, window, args):
+    llm_client.llm = FakeLLM(args.base_ms / 1000, args.prefill_ms / 1000)
+    llm_client.genai_client = summarizer = FakeSummarizer(args.summary_ms / 1000)
+    llm_client.conversation_window = window
+
+    results = {}
+    for end in range(1, len(chat) + 1, 2):  # each request ends on a user turn
+        start = time.perf_counter()
+        ttft = None
+        async for _ in llm_client.astream_chat_to_gemini(chat[:end], conversation_id="bench"):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        if end in checkpoints:
+            results[end] = (llm_client.llm.prompt_tokens, ttft * 1000)
+    return results, summarizer.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history windowing on long chats")
+    parser.add_argument("--turns", type=int, default=81)
+    parser.add_argument("--budget", type=int, default=3000, help="Verbatim history token budget")
+    parser.add_argument("--base-ms", type=float, default=150)
+    parser.add_argument("--prefill-ms", type=float, default=40, help="Extra TTFT per 1k prompt tokens")
+    parser.add_argument("--summary-ms", type=float, default=600)
+    args = parser.parse_args()
+
+    chat = make_chat(args.turns)
+    checkpoints = sorted({n for n in (1, 5, 11, 21, 41, 61, 81, 121, 161) if n <= args.turns} | {args.turns - (1 - args.turns % 2)})
+
+    full, _ = asyncio.run(replay(chat, checkpoints, None, args))
+    windowed, summaries = asyncio.run(replay(chat, checkpoints, ConversationWindow(args.budget), args))
+
+    print(f"📦 {args.turns} turns, budget {args.budget} tokens, fake prefill {args.prefill_ms}ms/1k tokens\n")
+    print(f"{'turns':>6} {'full tok':>9} {'window tok':>11} {'full ttft':>10} {'window ttft':>12}")
+    for end in checkpoints:
+        (ft, fl), (wt, wl) = full[end], windowed[end]
+        print(f"{end:>6} {ft:>9} {wt:>11} {fl:>8.0f}ms {wl:>10.0f}ms")
+
+    requests = (args.turns + 1) // 2
+    print(f"\n🧾 {summaries} summary calls over {requests} requests "
+          f"(each adds ~{args.summary_ms:.0f}ms to that request's TTFT)")
+
+
+if __name__ == "__main__":
+    main()
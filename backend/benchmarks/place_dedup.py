@@ -0,0 +1,170 @@
+"""Fuzzy place deduplication on a synthetic corpus.
+
+Generates N places (default 100k) made of distinct base places plus noisy
+duplicates (casing, accents, typos, generic words, branch suffixes), runs
+the blocking resolver over them and reports time, comparisons per place and
+pairwise precision/recall against the known ground truth. A brute-force
+all-pairs pass over a sample gives the O(n²) baseline for comparison.
+
+Usage:
+    python benchmarks/place_dedup.py
+    python benchmarks/place_dedup.py --places 20000 --baseline-sample 2000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapper"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from entity_resolution import EntityResolver, _Entity
+from place_extractor import PlaceExtractor
+
+CITIES = [("Bangkok", "Thailand"), ("Tokyo", "Japan"), ("London", "UK"), ("Paris", "France"),
+          ("Rome", "Italy"), ("Istanbul", "Turkey"), ("Dubai", "UAE"), ("Hong Kong", "China")]
+CATEGORIES = ["cafe", "restaurant", "bar", "market", "museum", "viewpoint"]
+GENERIC = {"cafe": "Coffee", "restaurant": "Kitchen", "bar": "Bar", "market": "Market",
+           "museum": "Museum", "viewpoint": "Rooftop"}
+SYLLABLES = ["ka", "lo", "mi", "ren", "to", "sa", "vi", "nor", "el", "chi", "ba", "mu",
+             "dor", "an", "ki", "zu", "pel", "ta", "ri", "gon", "se", "ho", "lum", "ya",
+             "fen", "qua", "bri", "stol", "jun", "wex", "pra", "dal", "kor", "ith", "ves", "ombo"]
+SUFFIXES = ["Shibuya", "Soho", "Centrale", "Riverside", "Old Town", "Marina", "Station", "East"]
+ACCENTS = {"e": "é", "a": "à", "o": "ô", "u": "ü"}
+
+
+def _word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _variant(name, category, rng):
+    kind = rng.randrange(5)
+    if kind == 0:
+        return name.upper()
+    if kind == 1:
+        return f"{name} {GENERIC[category]}"
+    if kind == 2:
+        return f"{name} {rng.choice(SUFFIXES)}"
+    if kind == 3:
+        return "".join(ACCENTS.get(ch, ch) if rng.random() < 0.5 else ch for ch in name)
+    # Typo: double or drop one inner letter
+    i = rng.randrange(1, len(name) - 1)
+    return name[:i] + name[i] + name[i:] if rng.random() < 0.5 else name[:i] + name[i + 1:]
+
+
+def make_corpus(n, seed=7):
+    """Places with a hidden `_truth` id; about 40% are duplicates of another place.
+
+    Distinct places in a city never share their first word, the way real
+    place names rarely do, so every merge of two truths is a resolver error.
+    """
+    rng = random.Random(seed)
+    places = []
+    used = set()
+    truth = 0
+    while len(places) < n:
+        city, country = rng.choice(CITIES)
+        category = rng.choice(CATEGORIES)
+        first = _word(rng)
+        if (city, first.lower()) in used:
+            continue
+        used.add((city, first.lower()))
+        name = first if rng.random() < 0.5 else f"{first} {_word(rng)}"
+        copies = [name] + [_variant(name, category, rng) for _ in range(rng.choice([0, 0, 1, 2]))]
+        for copy in copies[:n - len(places)]:
+            places.append({
+                "name": copy, "city": city, "country": country, "category": category,
+                "tags": ["local"], "vibe": f"Spot {truth}", "confidence": "medium",
+                "sources": [{"url": f"https://reddit.com/r/travel/comments/{len(places)}"}],
+                "mention_count": 1, "_truth": truth,
+            })
+        truth += 1
+    rng.shuffle(places)
+    return places
+
+
+def _pairs(groups):
+    return sum(len(g) * (len(g) - 1) // 2 for g in groups)
+
+
+def score(clusters):
+    """Pairwise precision/recall of predicted clusters (lists of truth ids)."""
+    by_truth = {}
+    for cluster in clusters:
+        for t in cluster:
+            by_truth.setdefault(t, []).append(t)
+    correct = 0
+    for cluster in clusters:
+        counts = {}
+        for t in cluster:
+            counts[t] = counts.get(t, 0) + 1
+        correct += sum(c * (c - 1) // 2 for c in counts.values())
+    predicted = _pairs(clusters)
+    actual = _pairs(by_truth.values())
+    return (correct / predicted if predicted else 1.0), (correct / actual if actual else 1.0)
+
+
+def run_blocking(places):
+    resolver = EntityResolver(PlaceExtractor._merge_into)
+    members = {}
+    start = time.perf_counter()
+    for place in places:
+        truth = place["_truth"]
+        kept = resolver.add(place)
+        members.setdefault(id(kept), []).append(truth)
+    elapsed = time.perf_counter() - start
+    return resolver, list(members.values()), elapsed
+
+
+def run_all_pairs(places):
+    """Same similarity, no blocking: every place compared with every entity so far."""
+    resolver = EntityResolver(lambda existing, new: None)
+    entities = []
+    comparisons = 0
+    start = time.perf_counter()
+    for place in places:
+        entity = _Entity(place)
+        matched = False
+        for other in entities:
+            comparisons += 1
+            if resolver.similarity(entity, other) >= resolver.threshold:
+                matched = True
+                break
+        if not matched:
+            entities.append(entity)
+    return time.perf_counter() - start, comparisons
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy place deduplication")
+    parser.add_argument("--places", type=int, default=100_000)
+    parser.add_argument("--baseline-sample", type=int, default=3_000,
+                        help="Places for the all-pairs baseline (extrapolated to --places)")
+    args = parser.parse_args()
+
+    places = make_corpus(args.places)
+    distinct = len({p["_truth"] for p in places})
+    print(f"📦 {len(places):,} places, {distinct:,} real entities "
+          f"({len(places) - distinct:,} duplicates)")
+
+    resolver, clusters, elapsed = run_blocking([dict(p) for p in places])
+    precision, recall = score(clusters)
+    print(f"\n🔗 Blocking resolver")
+    print(f"   time:        {elapsed:.2f}s ({len(places) / elapsed:,.0f} places/s)")
+    print(f"   comparisons: {resolver.comparisons:,} ({resolver.comparisons / len(places):.1f} per place)")
+    print(f"   entities:    {len(resolver.entities):,} ({resolver.merged:,} merged)")
+    print(f"   precision:   {precision:.3f}   recall: {recall:.3f}")
+
+    sample = [dict(p) for p in places[:args.baseline_sample]]
+    base_elapsed, base_comparisons = run_all_pairs(sample)
+    scale = (len(places) / len(sample)) ** 2
+    print(f"\n🐢 All-pairs baseline on {len(sample):,} places: {base_elapsed:.2f}s, "
+          f"{base_comparisons:,} comparisons")
+    print(f"   extrapolated to {len(places):,}: ~{base_elapsed * scale / 60:,.0f} min, "
+          f"~{base_comparisons * scale:,.0f} comparisons")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Pre-filter trade-off: how many Gemini validations the local content score saves.
+
+Scores labelled posts with RedditScraper.content_score and, for a grid of
+(reject-below, accept-above) thresholds, reports how many posts still go to
+Gemini validation and the precision/recall of the posts that end up accepted
+(assuming Gemini agrees with the label on the posts it does see). The old
+pass/fail regex check is included as a baseline.
+
+Usage:
+    python benchmarks/prefilter.py                       # hand-labelled fixtures
+    python benchmarks/prefilter.py --journal scrapper/data/harvest_journal.jsonl
+        # real posts from a harvest run, labelled with Gemini's own verdicts
+"""
+import os
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapper"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from reddit_scraper import RedditScraper
+from harvester import Harvester
+from config import PREFILTER_MIN_SCORE, PREFILTER_AUTO_ACCEPT_SCORE
+
+FIXTURES = Path(__file__).parent / "fixtures" / "prefilter_posts.json"
+LOW_THRESHOLDS = [0.1, 0.15, 0.2, 0.25, 0.3]
+HIGH_THRESHOLDS = [0.6, 0.7, 0.75, 0.8, 0.9, 1.01]
+
+
+def legacy_filter(post):
+    """The pass/fail check content_score replaced: any pattern, or 100+ chars with a keyword."""
+    text = post.get('body', '') or ''
+    comments = sorted(post.get('comments', []), key=lambda c: c.get('upvotes', 0), reverse=True)[:15]
+    text += ' ' + ' '.join(c.get('body', '') for c in comments)
+    patterns = [
+        r'\b[A-Z][a-z]+ (?:Cafe|Coffee|Restaurant|Bar|Bistro|Shop|Hotel|Museum)\b',
+        r'\bcalled [A-Z][a-z]+', r'\btry [A-Z][a-z]+', r'\bvisit [A-Z][a-z]+', r'\brecommend [A-Z][a-z]+',
+    ]
+    if any(re.search(p, text) for p in patterns):
+        return True
+    if len(text) < 100:
+        return False
+    return any(kw in text.lower() for kw in ['cafe', 'coffee', 'restaurant', 'bar', 'food', 'place', 'spot', 'gem', 'local'])
+
+
+def load_journal(path):
+    """(post, verdict) pairs from a harvest journal; posts Gemini never judged are skipped."""
+    posts, verdicts = {}, {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('type') == 'post':
+                posts[Harvester._post_key(record['post'])] = record['post']
+            elif record.get('type') == 'verdict':
+                verdicts[record['post_key']] = record['has_recommendations']
+    return [{'post': posts[k], 'has_recommendations': v} for k, v in verdicts.items() if k in posts]
+
+
+def evaluate(cases, low, high):
+    total_true = sum(c['has_recommendations'] for c in cases)
+    accepted = true_accepted = to_gemini = 0
+    for case in cases:
+        score, label = case['score'], case['has_recommendations']
+        if score < low:
+            continue
+        if score >= high:
+            accepted += 1
+            true_accepted += label
+        else:
+            to_gemini += 1
+            accepted += label
+            true_accepted += label
+    return {
+        'to_gemini': to_gemini,
+        'saved': 1 - to_gemini / len(cases),
+        'precision': true_accepted / accepted if accepted else 1.0,
+        'recall': true_accepted / total_true if total_true else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-filter precision/recall vs Gemini calls saved")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    parser.add_argument("--journal", type=Path, help="Harvest journal to use as labelled data instead")
+    args = parser.parse_args()
+
+    if args.journal:
+        cases = load_journal(args.journal)
+    else:
+        with open(args.fixtures, 'r', encoding='utf-8') as f:
+            cases = json.load(f)['cases']
+    if not cases:
+        print("No labelled posts found")
+        return
+
+    for case in cases:
+        case['score'] = RedditScraper.content_score(case['post'])
+
+    positives = sum(c['has_recommendations'] for c in cases)
+    print(f"📦 {len(cases)} labelled posts ({positives} with recommendations)\n")
+
+    legacy_pass = [c for c in cases if legacy_filter(c['post'])]
+    legacy_recall = sum(c['has_recommendations'] for c in legacy_pass) / positives if positives else 1.0
+    print(f"Legacy regex filter: {len(legacy_pass)}/{len(cases)} sent to Gemini "
+          f"(saved {1 - len(legacy_pass) / len(cases):.0%}), recall {legacy_recall:.2f}\n")
+
+    print(f"{'reject <':>9} {'accept >=':>10} {'to Gemini':>10} {'saved':>6} {'precision':>10} {'recall':>7}")
+    for low in LOW_THRESHOLDS:
+        for high in HIGH_THRESHOLDS:
+            r = evaluate(cases, low, high)
+            marker = "  ← config" if (low, high) == (PREFILTER_MIN_SCORE, PREFILTER_AUTO_ACCEPT_SCORE) else ""
+            print(f"{low:>9} {high if high <= 1 else 'off':>10} {r['to_gemini']:>10} {r['saved']:>6.0%} "
+                  f"{r['precision']:>10.2f} {r['recall']:>7.2f}{marker}")
+
+    print("\nScores:")
+    for case in sorted(cases, key=lambda c: c['score'], reverse=True):
+        print(f"  {case['score']:.3f} {'✅' if case['has_recommendations'] else '❌'} {case['post'].get('title', '')[:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Prompt size: fixed character slices vs token-budget packing.
+
+Builds the extraction and validation prompt sections for recorded posts both
+ways and compares estimated prompt tokens and how much comment text (by
+upvotes) each keeps. The fixture posts are short, so synthetic long threads
+(rambling stories, "+1" repeats, one-word replies) are included too.
+
+Usage:
+    python benchmarks/prompt_tokens.py
+    python benchmarks/prompt_tokens.py --posts posts.json   # JSON list of scraped posts
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scrapper"))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+
+from prompt_packer import count_tokens, pack_post
+from config import EXTRACTION_POST_TOKENS, MAX_COMMENT_TOKENS, VALIDATION_POST_TOKENS
+from gemini_validator import GeminiValidator
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def sliced(post, body_chars, top_n, comment_chars):
+    """The old prompt text: body[:body_chars] plus the top_n comments cut at comment_chars."""
+    body = (post.get('body') or '')[:body_chars]
+    comments = sorted(post.get('comments', []), key=lambda c: c.get('upvotes', 0), reverse=True)[:top_n]
+    return body, [c.get('body', '')[:comment_chars] for c in comments]
+
+
+def section_tokens(body, comments):
+    return count_tokens(body) + sum(count_tokens(c) + 2 for c in comments)
+
+
+def upvotes_kept(post, comments):
+    """Share of the post's total upvotes on comments that made it into the prompt."""
+    total = sum(max(c.get('upvotes', 0), 0) for c in post.get('comments', [])) or 1
+    kept = 0
+    for comment in post.get('comments', []):
+        body = ' '.join((comment.get('body') or '').split())
+        if any(body.startswith(text.rstrip('…')[:40]) for text in comments if text):
+            kept += max(comment.get('upvotes', 0), 0)
+    return kept / total
+
+
+RECS = [
+    "Onibus Coffee in Nakameguro, tiny spot with incredible pour-over.",
+    "Jay Fai for the crab omelette, queue early.",
+    "Le Baron Rouge near Marche d'Aligre, oysters on Sunday mornings.",
+    "Roscioli for carbonara, book ahead.",
+    "Brick Lane Beigel Bake, salt beef bagel, open 24h.",
+    "Lin Heung Tea House for old school trolley dim sum.",
+]
+STORY = ("So the first time I went there was back in 2015 with my ex and honestly the whole trip was a bit "
+         "of a mess because our flight got delayed and we ended up arriving at midnight, but the next morning "
+         "we wandered around and found this little street and I still think about it. ")
+SHORT = ["This!", "+1", "Came here to say this", "lol", "Saving this thread", "Great list thanks"]
+
+
+def synthetic_threads(n=30, seed=11):
+    rng = random.Random(seed)
+    threads = []
+    for i in range(n):
+        comments = []
+        for _ in range(rng.randint(40, 120)):
+            kind = rng.random()
+            if kind < 0.25:
+                body = rng.choice(RECS)
+                upvotes = rng.randint(5, 120)
+            elif kind < 0.4:
+                body = "+1 for " + rng.choice(RECS).lower()
+                upvotes = rng.randint(0, 15)
+            elif kind < 0.6:
+                body = STORY * rng.randint(1, 5)
+                upvotes = rng.randint(0, 30)
+            else:
+                body = rng.choice(SHORT)
+                upvotes = rng.randint(0, 40)
+            comments.append({'body': body, 'upvotes': upvotes})
+        threads.append({'title': f"Synthetic thread {i}", 'body': STORY * rng.randint(0, 3), 'comments': comments})
+    return threads
+
+
+def load_posts(path=None):
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    posts = []
+    for name in ('prefilter_posts.json', 'extraction_responses.json'):
+        with open(FIXTURES / name, 'r', encoding='utf-8') as f:
+            posts += [case['post'] for case in json.load(f)['cases']]
+    return posts
+
+
+def report(label, posts, old_args, budget, max_comment_tokens):
+    old_tokens = new_tokens = old_kept = new_kept = 0.0
+    for post in posts:
+        old_body, old_comments = sliced(post, *old_args)
+        new_body, new_comments = pack_post(post, budget, max_comment_tokens=max_comment_tokens)
+        old_tokens += section_tokens(old_body, old_comments)
+        new_tokens += section_tokens(new_body, new_comments)
+        old_kept += upvotes_kept(post, old_comments)
+        new_kept += upvotes_kept(post, new_comments)
+
+    n = len(posts)
+    change = f" ({new_tokens / old_tokens - 1:+.0%} tokens)" if old_tokens else ""
+    print(f"{label}")
+    print(f"   sliced: {old_tokens / n:7.0f} tokens/post, {old_kept / n:.0%} of upvotes kept")
+    print(f"   packed: {new_tokens / n:7.0f} tokens/post, {new_kept / n:.0%} of upvotes kept{change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sliced vs packed prompt sizes")
+    parser.add_argument("--posts", type=Path, help="JSON list of scraped posts (default: fixtures)")
+    args = parser.parse_args()
+
+    datasets = [("recorded posts", load_posts(args.posts))]
+    if not args.posts:
+        datasets.append(("synthetic long threads", synthetic_threads()))
+
+    for name, posts in datasets:
+        print(f"\n📦 {len(posts)} {name}")
+        report(f"Extraction (budget {EXTRACTION_POST_TOKENS})", posts, (2000, 20, 500),
+               EXTRACTION_POST_TOKENS, MAX_COMMENT_TOKENS)
+        report(f"Validation (budget {VALIDATION_POST_TOKENS})", posts, (500, 5, 200),
+               VALIDATION_POST_TOKENS, GeminiValidator.MAX_COMMENT_TOKENS)
+
+
+if __name__ == "__main__":
+    main()
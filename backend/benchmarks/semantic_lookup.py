@@ -0,0 +1,95 @@
+"""SemanticCache lookup latency at 100k+ entries, offline.
+
+Fills a cache with synthetic travel questions embedded by HashingEmbedder,
+then times lookups (embedding excluded) for stored questions with a typo'd
+variant, which should hit, and for unseen ones, which should miss. A
+per-row Python loop over the same vectors is timed for comparison.
+
+Usage:
+    python benchmarks/semantic_lookup.py
+    python benchmarks/semantic_lookup.py --entries 200000 --queries 500
+"""
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from semantic_cache import HashingEmbedder, SemanticCache, _normalize_rows
+
+CITIES = ["bangkok", "tokyo", "lisbon", "porto", "seoul", "mexico city", "istanbul", "hanoi"]
+TOPICS = ["cheap eats", "rooftop bars", "vintage shops", "hidden cafes", "live music", "night markets"]
+
+
+def make_questions(n, seed=11):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(TOPICS)} in {rng.choice(CITIES)} near spot {i} for {rng.randint(2, 9)} people"
+        for i in range(n)
+    ]
+
+
+def loop_search(vectors, query, threshold):
+    best, best_score = None, threshold
+    for i in range(len(vectors)):
+        score = float(sum(a * b for a, b in zip(vectors[i], query)))
+        if score >= best_score:
+            best, best_score = i, score
+    return best
+
+
+def percentile(times, q):
+    times = sorted(times)
+    return times[min(int(len(times) * q), len(times) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SemanticCache lookups")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768, help="Embedding size (Gemini's is 768)")
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--loop-queries", type=int, default=3, help="Queries for the slow Python loop")
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder(dim=args.dim)
+    cache = SemanticCache(embedder, threshold=args.threshold, max_entries=args.entries)
+    questions = make_questions(args.entries)
+
+    start = time.perf_counter()
+    for offset in range(0, len(questions), 5000):
+        batch = questions[offset:offset + 5000]
+        for question, vector in zip(batch, _normalize_rows(embedder.embed(batch))):
+            cache._insert(vector, f"answer to {question}")
+    print(f"📦 {args.entries} entries, dim {args.dim}, in {time.perf_counter() - start:.1f}s "
+          f"({cache._vectors.nbytes / 1e6:.0f} MB matrix)\n")
+
+    rng = random.Random(5)
+    stored = rng.sample(questions, args.queries)
+    variants = [q.replace(" in ", " in  ").upper() for q in stored]
+    unseen = [f"{rng.choice(TOPICS)} in atlantis {i}" for i in range(args.queries)]
+    for label, texts, expect_hit in (("stored (hit)", variants, True), ("unseen (miss)", unseen, False)):
+        vectors = _normalize_rows(embedder.embed(texts))
+        times, hits = [], 0
+        for vector in vectors:
+            start = time.perf_counter()
+            hits += cache._search(vector) is not None
+            times.append((time.perf_counter() - start) * 1000)
+        print(f"{label:>14}: p50 {percentile(times, 0.5):6.2f}ms   p95 {percentile(times, 0.95):6.2f}ms   "
+              f"hit rate {hits / len(texts):.0%} (expected {'100' if expect_hit else '0'}%)")
+
+    rows = cache._vectors[:cache._size].tolist()
+    query = _normalize_rows(embedder.embed(variants[:1]))[0].tolist()
+    start = time.perf_counter()
+    for _ in range(args.loop_queries):
+        loop_search(rows, query, args.threshold)
+    loop_ms = (time.perf_counter() - start) * 1000 / args.loop_queries
+    print(f"{'python loop':>14}: {loop_ms:8.0f}ms per lookup")
+
+
+if __name__ == "__main__":
+    main()
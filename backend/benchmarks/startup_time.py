@@ -0,0 +1,123 @@
+"""Backend cold start: `import main` (python -X importtime) and time until ready.
+
+Runs each measurement in a fresh interpreter so nothing is cached in
+sys.modules, and prints the median over `--runs` plus the slowest top-level
+imports. With `--ready` it also runs the FastAPI lifespan (client setup,
+place catalog load), which needs the real dependencies and an API key.
+`--max-import-ms` exits non-zero when the import exceeds the budget, to catch
+a heavy module creeping back into import time.
+
+Usage:
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --runs 5 --top 15 --ready
+    python benchmarks/startup_time.py --max-import-ms 1500
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Deferred to the lifespan; seeing one of these at import time is a regression
+HEAVY_MODULES = ("chromadb", "google.genai", "llama_index")
+
+READY_SCRIPT = """
+import time, asyncio
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.lifespan(main.app):
+        pass
+
+asyncio.run(run())
+print(f"READY {(imported - started) * 1000:.1f} {(time.perf_counter() - started) * 1000:.1f}")
+"""
+
+
+def import_profile(env):
+    """({direct import of main or main itself: cumulative microseconds}, every module imported)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ import main failed:\n{result.stderr[-2000:]}")
+
+    # A module's line comes after its children's; indentation is nesting depth
+    modules, children, imported = {}, {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        imported.add(name.strip())
+        if depth == 1:
+            children[name.strip()] = int(cumulative)
+        elif depth == 0:
+            if name.strip() == "main":
+                modules = {**children, "main": int(cumulative)}
+            children = {}
+    return modules, imported
+
+
+def ready_time(env):
+    """(import ms, import + lifespan ms) for one cold start."""
+    result = subprocess.run(
+        [sys.executable, "-c", READY_SCRIPT],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("READY "):
+            _, imported, ready = line.split()
+            return float(imported), float(ready)
+    raise SystemExit(f"❌ Lifespan failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import and startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest direct imports of main to list")
+    parser.add_argument("--ready", action="store_true", help="Also time the lifespan (needs deps + API key)")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if import main is slower")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+
+    profiles, imported = [], set()
+    for _ in range(args.runs):
+        modules, names = import_profile(env)
+        profiles.append(modules)
+        imported |= names
+    totals = sorted(p["main"] / 1000 for p in profiles)
+    median = statistics.median(totals)
+    print(f"📦 import main: median {median:.0f}ms (min {totals[0]:.0f}ms, max {totals[-1]:.0f}ms, {args.runs} runs)\n")
+
+    slowest = sorted(
+        ((name, statistics.median(p.get(name, 0) for p in profiles) / 1000) for name in profiles[0] if name != "main"),
+        key=lambda item: item[1], reverse=True,
+    )
+    for name, ms in slowest[:args.top]:
+        print(f"   {ms:8.1f}ms  {name}")
+
+    heavy = [m for m in HEAVY_MODULES if any(name == m or name.startswith(m + ".") for name in imported)]
+    if heavy:
+        print(f"\n⚠️ Imported at module load: {', '.join(heavy)}")
+
+    if args.ready:
+        runs = [ready_time(env) for _ in range(args.runs)]
+        print(f"\n🚀 ready (import + lifespan): median {statistics.median(r[1] for r in runs):.0f}ms")
+
+    if args.max_import_ms is not None and median > args.max_import_ms:
+        print(f"\n❌ import main took {median:.0f}ms, budget is {args.max_import_ms:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
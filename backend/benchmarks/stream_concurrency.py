@@ -0,0 +1,108 @@
+"""Load benchmark: concurrent /api/chat streams, sync vs async path.
+
+Swaps the Gemini client for a fake that emits chunks with a fixed delay and
+drives N concurrent streams the way Starlette would:
+
+- sync:  `stream_chat_to_gemini` (the blocking wrapper around the async
+         path) pulled through `iterate_in_threadpool`, which is what
+         `StreamingResponse` does with a plain generator
+- async: `astream_chat_to_gemini` consumed directly on the event loop
+
+Response cache, semantic cache, RAG and prompt cache are switched off and
+every stream asks a distinct question, so each one reaches the fake LLM
+instead of replaying a cached answer from the previous mode.
+
+Usage:
+    python benchmarks/stream_concurrency.py --streams 200 --chunks 10 --delay 0.05
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-dummy-key")
+for _flag in ("LOWKEY_RESPONSE_CACHE", "LOWKEY_SEMANTIC_CACHE", "LOWKEY_RAG", "LOWKEY_PROMPT_CACHE"):
+    os.environ[_flag] = "off"
+
+from starlette.concurrency import iterate_in_threadpool
+
+import llm_client
+
+
+class FakeStreamingLLM:
+    """Stands in for GoogleGenAI: each chunk arrives after `delay` seconds."""
+
+    def __init__(self, chunks: int, delay: float):
+        self.chunks = chunks
+        self.delay = delay
+        self.calls = 0
+
+    async def astream_chat(self, messages):
+        self.calls += 1
+
+        async def gen():
+            for i in range(self.chunks):
+                await asyncio.sleep(self.delay)
+                yield SimpleNamespace(delta=f"chunk{i} ", raw={})
+        return gen()
+
+
+def _messages(mode: str, i: int):
+    text = f"hidden gems in Lisbon ({mode} stream {i})"
+    return [{"role": "user", "parts": [{"type": "text", "text": text}]}]
+
+
+async def _consume_sync(messages) -> float:
+    start = time.perf_counter()
+    async for _ in iterate_in_threadpool(llm_client.stream_chat_to_gemini(messages)):
+        pass
+    return time.perf_counter() - start
+
+
+async def _consume_async(messages) -> float:
+    start = time.perf_counter()
+    async for _ in llm_client.astream_chat_to_gemini(messages):
+        pass
+    return time.perf_counter() - start
+
+
+async def _run(mode: str, streams: int) -> float:
+    consume = _consume_sync if mode == "sync" else _consume_async
+    start = time.perf_counter()
+    await asyncio.gather(*(consume(_messages(mode, i)) for i in range(streams)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat stream benchmark")
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds per chunk")
+    args = parser.parse_args()
+
+    fake = FakeStreamingLLM(args.chunks, args.delay)
+    llm_client.llm = fake
+    single_stream = args.chunks * args.delay
+
+    print(f"Streams: {args.streams} | chunks/stream: {args.chunks} | delay/chunk: {args.delay}s")
+    print(f"Single stream duration: {single_stream:.2f}s")
+
+    for mode in ("sync", "async"):
+        calls_before = fake.calls
+        elapsed = asyncio.run(_run(mode, args.streams))
+        if fake.calls - calls_before != args.streams:
+            raise SystemExit(f"{mode}: only {fake.calls - calls_before}/{args.streams} streams reached the LLM")
+        # Streams that effectively ran at once = total work / wall time
+        concurrency = args.streams * single_stream / elapsed
+        print(f"  {mode:>5}: {elapsed:6.2f}s wall | effective concurrency ~{concurrency:.0f}")
+
+    print("\nSync concurrency is capped by the threadpool (40 by default);")
+    print("async concurrency should track --streams.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Chat stream metrics, rendered in the Prometheus text format for /metrics.
+
+Each chat request gets a `ChatTrace` that notes when chunks go out and, at
+the end, the outcome, token usage and grounding sources. Counters and
+histograms live in process memory (one lock each, a few float additions per
+observation), so they're cheap enough to leave on; with several workers each
+one exposes its own numbers, like any multi-process Prometheus target.
+"""
+import time
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# TTFT and total duration share the buckets; 0.4s is the README's target
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.4, 0.8, 1.5, 3.0, 6.0, 12.0, 30.0)
+TOKENS_PER_SECOND_BUCKETS = (5, 10, 25, 50, 100, 200, 400)
+CACHED_TOKEN_BUCKETS = (0, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Iterable[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        # labels -> ([count per bucket, +Inf last], sum)
+        self._series: Dict[Tuple[Tuple[str, str], ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def snapshot(name: str, kind: str, help: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Lines for a counter or gauge kept elsewhere and read at scrape time (cache, breaker stats)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+    return lines
+
+
+REQUESTS = Counter("lowkey_chat_requests_total", "Chat requests by outcome (ok, cache_hit, error, busy, cancelled).")
+ERRORS = Counter("lowkey_chat_errors_total", "Failed chat requests by error kind.")
+CHUNKS = Counter("lowkey_chat_chunks_total", "Text chunks streamed to clients.")
+TOKENS = Counter(
+    "lowkey_chat_tokens_total",
+    "Gemini tokens used by chat, from response usage metadata (prompt includes cached).",
+)
+PROMPT_MODE = Counter(
+    "lowkey_chat_prompt_mode_total",
+    "Gemini chat calls by how the system prompt was sent (cached content or inline).",
+)
+GROUNDED = Counter("lowkey_chat_grounded_responses_total", "Gemini answers that cited at least one Search/Maps source.")
+GROUNDING_SOURCES = Counter("lowkey_chat_grounding_sources_total", "Search/Maps sources cited in answers.")
+TTFT = Histogram("lowkey_chat_ttft_seconds", "Time from request to first streamed chunk.", LATENCY_BUCKETS)
+DURATION = Histogram("lowkey_chat_duration_seconds", "Time from request to end of stream.", LATENCY_BUCKETS)
+TOKENS_PER_SECOND = Histogram(
+    "lowkey_chat_completion_tokens_per_second",
+    "Completion tokens per second after the first chunk.",
+    TOKENS_PER_SECOND_BUCKETS,
+)
+CACHED_TOKENS = Histogram(
+    "lowkey_chat_cached_prompt_tokens",
+    "Prompt tokens per request served from Gemini's context cache instead of sent as input.",
+    CACHED_TOKEN_BUCKETS,
+)
+
+CHAT_METRICS = (
+    REQUESTS, ERRORS, CHUNKS, TOKENS, PROMPT_MODE, GROUNDED, GROUNDING_SOURCES,
+    TTFT, DURATION, TOKENS_PER_SECOND, CACHED_TOKENS,
+)
+
+
+def usage_from_raw(raw: Any) -> Tuple[int, int, int]:
+    """(prompt, completion, cached) token counts from a Gemini response dict; zeros if absent.
+
+    Streams report usage on their last chunk; keys are snake_case in dumped
+    SDK objects and camelCase in raw REST payloads.
+    """
+    if not isinstance(raw, dict):
+        return 0, 0, 0
+    usage = raw.get("usage_metadata") or raw.get("usageMetadata") or {}
+    if not isinstance(usage, dict):
+        return 0, 0, 0
+    prompt = usage.get("prompt_token_count", usage.get("promptTokenCount")) or 0
+    completion = usage.get("candidates_token_count", usage.get("candidatesTokenCount")) or 0
+    cached = usage.get("cached_content_token_count", usage.get("cachedContentTokenCount")) or 0
+    return int(prompt), int(completion), int(cached)
+
+
+class ChatTrace:
+    """Timing and usage for one chat request; `finish` records it (once).
+
+    Args:
+        source: "gemini" for a model call, "cache" for a replayed answer
+    """
+
+    def __init__(self, source: str = "gemini"):
+        self.source = source
+        self.started = time.perf_counter()
+        self.first_chunk_at: Optional[float] = None
+        self.chunks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        # "cached" or "inline" once a Gemini call is made
+        self.prompt_mode: Optional[str] = None
+        self.sources = 0
+        self.finished = False
+
+    def chunk(self):
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.perf_counter()
+        self.chunks += 1
+
+    def usage(self, raw: Any):
+        self.prompt_tokens, self.completion_tokens, self.cached_tokens = usage_from_raw(raw)
+
+    def finish(self, outcome: str, error_kind: Optional[str] = None):
+        if self.finished:
+            return
+        self.finished = True
+        ended = time.perf_counter()
+
+        REQUESTS.inc(outcome=outcome)
+        if error_kind:
+            ERRORS.inc(kind=error_kind)
+        if self.chunks:
+            CHUNKS.inc(self.chunks, source=self.source)
+        if self.prompt_mode:
+            PROMPT_MODE.inc(mode=self.prompt_mode)
+        if outcome not in ("ok", "cache_hit"):
+            return
+
+        if self.first_chunk_at is not None:
+            TTFT.observe(self.first_chunk_at - self.started, source=self.source)
+        DURATION.observe(ended - self.started, source=self.source)
+        if self.prompt_tokens:
+            TOKENS.inc(self.prompt_tokens, kind="prompt")
+        if self.prompt_tokens or self.cached_tokens:
+            CACHED_TOKENS.observe(self.cached_tokens)
+        if self.cached_tokens:
+            TOKENS.inc(self.cached_tokens, kind="cached")
+        if self.completion_tokens:
+            TOKENS.inc(self.completion_tokens, kind="completion")
+            streaming = ended - (self.first_chunk_at or self.started)
+            if streaming > 0:
+                TOKENS_PER_SECOND.observe(self.completion_tokens / streaming)
+        if self.source == "gemini":
+            GROUNDING_SOURCES.inc(self.sources)
+            if self.sources:
+                GROUNDED.inc()
+
+
+def render(extra: Iterable[List[str]] = ()) -> str:
+    """Prometheus exposition text for the chat metrics plus any `extra` snapshot blocks."""
+    lines: List[str] = []
+    for metric in CHAT_METRICS:
+        lines.extend(metric.render())
+    for block in extra:
+        lines.extend(block)
+    return "\n".join(lines) + "\n"
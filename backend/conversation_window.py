@@ -0,0 +1,195 @@
+"""Token-budgeted chat history: newest turns verbatim, older ones as a rolling summary.
+
+Once a conversation's turns outgrow `budget_tokens`, the oldest ones are
+folded into a short summary until the verbatim tail is back down to
+`keep_ratio` of the budget. The summary is cached per conversation with the
+number and hash of the turns it covers, so it is only extended (previous
+summary + newly dropped turns) when the tail outgrows the budget again,
+about once every few exchanges rather than on every request.
+"""
+import sys
+import time
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent / "scrapper"))
+
+from prompt_packer import count_tokens
+
+# (role, text) with role "user" or "assistant"
+Turn = Tuple[str, str]
+
+SUMMARY_PROMPT = """You keep running notes on a travel-planning chat between a user and Lowkey, a travel assistant.
+Update the notes with the new messages. Keep: destinations, dates, budget, who is travelling, preferences and dislikes,
+places already recommended (with a word on each) and decisions made. Drop greetings and filler.
+Write at most {max_words} words of terse bullet points. Reply with the notes only.
+
+CURRENT NOTES:
+{summary}
+
+NEW MESSAGES:
+{turns}"""
+
+
+def _turn_tokens(turn: Turn) -> int:
+    return count_tokens(turn[1]) + 4  # role and turn framing
+
+
+def _turns_hash(turns: List[Turn]) -> str:
+    digest = hashlib.sha256()
+    for role, text in turns:
+        digest.update(f"{role}\x00{text}\x01".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def summary_prompt(summary: Optional[str], turns: List[Turn], max_words: int = 150) -> str:
+    rendered = "\n".join(f"{'User' if role == 'user' else 'Lowkey'}: {text}" for role, text in turns)
+    return SUMMARY_PROMPT.format(max_words=max_words, summary=summary or "(none yet)", turns=rendered)
+
+
+class _Summary:
+    def __init__(self, covered: int, covered_hash: str, text: str):
+        self.covered = covered
+        self.covered_hash = covered_hash
+        self.text = text
+
+
+class ConversationWindow:
+    """Decides which turns to send verbatim and keeps per-conversation summaries.
+
+    Args:
+        budget_tokens: Most tokens of verbatim history sent with a request
+        keep_ratio: After summarizing, the verbatim tail is cut to this share
+            of the budget, leaving room for a few more turns before the next summary
+        max_conversations: Summaries kept (least recently used evicted)
+        max_summary_words: Length the summarizer is asked to stay under
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = 3000,
+        keep_ratio: float = 0.5,
+        max_conversations: int = 1000,
+        max_summary_words: int = 150,
+    ):
+        self.budget_tokens = budget_tokens
+        self.keep_ratio = keep_ratio
+        self.max_conversations = max_conversations
+        self.max_summary_words = max_summary_words
+        self.summaries_made = 0
+        self.summaries_reused = 0
+        self.summary_seconds = 0.0
+        self._summaries: "OrderedDict[str, _Summary]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, conversation_id: str, turns: List[Turn]) -> Optional[_Summary]:
+        """The conversation's summary, if it still matches the start of `turns`."""
+        with self._lock:
+            cached = self._summaries.get(conversation_id)
+            if cached is None:
+                return None
+            self._summaries.move_to_end(conversation_id)
+        if cached.covered >= len(turns) or _turns_hash(turns[:cached.covered]) != cached.covered_hash:
+            return None  # history was edited or regenerated
+        return cached
+
+    def _store(self, conversation_id: str, summary: _Summary):
+        with self._lock:
+            self._summaries[conversation_id] = summary
+            self._summaries.move_to_end(conversation_id)
+            while len(self._summaries) > self.max_conversations:
+                self._summaries.popitem(last=False)
+
+    def _split(self, turns: List[Turn], start: int, limit: int) -> int:
+        """First turn of the newest tail (from `start` on) that fits `limit` tokens.
+
+        The tail always keeps the last turn and starts on a user turn.
+        """
+        used = 0
+        split = len(turns)
+        for i in range(len(turns) - 1, start - 1, -1):
+            used += _turn_tokens(turns[i])
+            if used > limit and split < len(turns):
+                break
+            split = i
+        while split < len(turns) - 1 and turns[split][0] != "user":
+            split += 1
+        return split
+
+    def _plan(self, conversation_id: Optional[str], turns: List[Turn]) -> Tuple[Optional[_Summary], Optional[int]]:
+        """(summary to use, or the cached one to extend; turn index to summarize up to, or None)."""
+        cached = self._cached(conversation_id, turns) if conversation_id else None
+        start = cached.covered if cached else 0
+        if sum(_turn_tokens(t) for t in turns[start:]) <= self.budget_tokens:
+            if cached:
+                self.summaries_reused += 1
+            return cached, None
+        split = self._split(turns, start, int(self.budget_tokens * self.keep_ratio))
+        return cached, split if split > start else None
+
+    @staticmethod
+    def _finish(turns: List[Turn], summary: Optional[_Summary]) -> Tuple[Optional[str], List[Turn]]:
+        if summary is None:
+            return None, turns
+        return summary.text, turns[summary.covered:]
+
+    def _summarized(self, conversation_id: Optional[str], turns: List[Turn], split: int, text: str, started: float) -> _Summary:
+        summary = _Summary(split, _turns_hash(turns[:split]), text.strip())
+        self.summaries_made += 1
+        self.summary_seconds += time.perf_counter() - started
+        if conversation_id:
+            self._store(conversation_id, summary)
+        return summary
+
+    def apply(
+        self,
+        conversation_id: Optional[str],
+        turns: List[Turn],
+        summarize: Callable[[str], str],
+    ) -> Tuple[Optional[str], List[Turn]]:
+        """(summary of older turns or None, turns to send verbatim).
+
+        `summarize` gets a prompt and returns the model's reply. If it
+        raises, the cached summary (or the full history) is used instead.
+        """
+        cached, split = self._plan(conversation_id, turns)
+        if split is None:
+            return self._finish(turns, cached)
+        start = cached.covered if cached else 0
+        started = time.perf_counter()
+        try:
+            text = summarize(summary_prompt(cached and cached.text, turns[start:split], self.max_summary_words))
+        except Exception as e:
+            print(f"⚠️ History summary failed, sending more turns: {type(e).__name__}: {e}")
+            return self._finish(turns, cached)
+        return self._finish(turns, self._summarized(conversation_id, turns, split, text, started))
+
+    async def aapply(
+        self,
+        conversation_id: Optional[str],
+        turns: List[Turn],
+        summarize: Callable[[str], Awaitable[str]],
+    ) -> Tuple[Optional[str], List[Turn]]:
+        """Async `apply`: awaits `summarize`."""
+        cached, split = self._plan(conversation_id, turns)
+        if split is None:
+            return self._finish(turns, cached)
+        start = cached.covered if cached else 0
+        started = time.perf_counter()
+        try:
+            text = await summarize(summary_prompt(cached and cached.text, turns[start:split], self.max_summary_words))
+        except Exception as e:
+            print(f"⚠️ History summary failed, sending more turns: {type(e).__name__}: {e}")
+            return self._finish(turns, cached)
+        return self._finish(turns, self._summarized(conversation_id, turns, split, text, started))
+
+    def stats(self):
+        return {
+            "conversations": len(self._summaries),
+            "summaries_made": self.summaries_made,
+            "summaries_reused": self.summaries_reused,
+            "summary_seconds": round(self.summary_seconds, 2),
+        }
@@ -0,0 +1,356 @@
+"""Retries, backoff and a circuit breaker for Gemini calls.
+
+Errors are classified as rate limits (429 / RESOURCE_EXHAUSTED), transient
+(5xx, timeouts, dropped connections) or permanent (bad request, auth, safety
+blocks). Only the first two are retried, with jittered exponential backoff
+that never undercuts the server's retry-after hint. Repeated retryable
+failures trip a circuit breaker shared by everything calling the same API:
+the harvester waits for it to cool down, the chat endpoint sheds requests
+instead of queueing them behind a storm.
+"""
+import re
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+# google.rpc status names, for errors that carry a status but no HTTP code
+_STATUS_KINDS = {
+    'RESOURCE_EXHAUSTED': RATE_LIMITED,
+    'UNAVAILABLE': TRANSIENT,
+    'DEADLINE_EXCEEDED': TRANSIENT,
+    'INTERNAL': TRANSIENT,
+}
+# httpx/aiohttp/requests network errors, matched by name so none of them has to be imported
+_NETWORK_ERROR_RE = re.compile(r'Timeout|Connect|ReadError|WriteError|RemoteProtocol|NetworkError|ServerDisconnected')
+_RETRY_DELAY_RE = re.compile(r'^\s*([\d.]+)\s*s\s*$')
+
+
+def classify_error(exc: BaseException, _depth: int = 0) -> str:
+    """RATE_LIMITED, TRANSIENT or PERMANENT."""
+    code = getattr(exc, 'code', None)
+    if not isinstance(code, int):
+        code = getattr(exc, 'status_code', None)
+    if isinstance(code, int) and 100 <= code < 600:
+        if code == 429:
+            return RATE_LIMITED
+        if code == 408 or code >= 500:
+            return TRANSIENT
+        return PERMANENT
+
+    status = getattr(exc, 'status', None)
+    if isinstance(status, str) and status in _STATUS_KINDS:
+        return _STATUS_KINDS[status]
+
+    if isinstance(exc, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return TRANSIENT
+    if _NETWORK_ERROR_RE.search(type(exc).__name__):
+        return TRANSIENT
+
+    # Wrappers (llama_index, our own re-raises) keep the API error as the cause
+    cause = exc.__cause__ or exc.__context__
+    if cause is not None and _depth < 3:
+        return classify_error(cause, _depth + 1)
+
+    text = str(exc)
+    if '429' in text or 'RESOURCE_EXHAUSTED' in text:
+        return RATE_LIMITED
+    if '503' in text or 'UNAVAILABLE' in text:
+        return TRANSIENT
+    return PERMANENT
+
+
+def _find_retry_delay(details: Any) -> Optional[float]:
+    """`retryDelay` from a google.rpc.RetryInfo anywhere in an error body ("17s")."""
+    if isinstance(details, dict):
+        match = _RETRY_DELAY_RE.match(str(details.get('retryDelay', '')))
+        if match:
+            return float(match.group(1))
+        values = details.values()
+    elif isinstance(details, list):
+        values = details
+    else:
+        return None
+    for value in values:
+        delay = _find_retry_delay(value)
+        if delay is not None:
+            return delay
+    return None
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """How long the server asked us to wait, from Retry-After or RetryInfo."""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if headers:
+        try:
+            value = headers.get('retry-after')
+            if value is not None:
+                return max(float(value), 0.0)
+        except (TypeError, ValueError):
+            pass
+    return _find_retry_delay(getattr(exc, 'details', None))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling while the breaker is open (when not waiting for it)."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive rate-limit/transient failures.
+
+    While open, no calls go out for `cooldown` seconds (longer if the server
+    asked for it). Then a single probe call is let through: success closes
+    the breaker, failure re-opens it, with the cooldown doubled (up to
+    `max_cooldown`) unless the server said how long to wait.
+    """
+
+    def __init__(
+        self,
+        name: str = 'gemini',
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        max_cooldown: float = 300.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = 'closed'
+        self.trips = 0
+        self._failures = 0
+        self._current_cooldown = cooldown
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> float:
+        """0 if a call may go out now, else seconds to wait before asking again."""
+        with self._lock:
+            if self.state == 'closed':
+                return 0.0
+            now = time.monotonic()
+            if now < self._open_until:
+                return self._open_until - now
+            if self._probing:
+                # Someone else's probe is in flight; check back shortly
+                return min(1.0, self.cooldown)
+            self.state = 'half_open'
+            self._probing = True
+            return 0.0
+
+    def retry_in(self) -> float:
+        """Seconds until calls go out again (0 when closed), without claiming the probe."""
+        with self._lock:
+            if self.state == 'closed':
+                return 0.0
+            return max(self._open_until - time.monotonic(), 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self.state != 'closed':
+                print(f"🟢 {self.name}: circuit closed, calls resumed")
+            self.state = 'closed'
+            self._probing = False
+            self._current_cooldown = self.cooldown
+
+    def release(self):
+        """A call let through by `allow` ended with no outcome (cancelled, e.g. the client left).
+
+        Frees the probe slot so the next call probes instead of every caller
+        waiting on a probe that will never report back.
+        """
+        with self._lock:
+            if self.state == 'half_open' and self._probing:
+                self._probing = False
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open':
+                # Without a hint from the server, back off harder each time the probe fails
+                if not retry_after:
+                    self._current_cooldown = min(self._current_cooldown * 2, self.max_cooldown)
+                self._open(retry_after)
+            elif self.state == 'closed' and self._failures >= self.failure_threshold:
+                self._open(retry_after)
+
+    def _open(self, retry_after: Optional[float]):
+        wait = max(self._current_cooldown, retry_after or 0.0)
+        self._open_until = time.monotonic() + wait
+        self.state = 'open'
+        self._probing = False
+        self.trips += 1
+        print(f"🔴 {self.name}: circuit open after {self._failures} failures, pausing calls for {wait:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {'state': self.state, 'trips': self.trips, 'retry_in': round(self.retry_in(), 1)}
+
+
+class ResilientCaller:
+    """Runs Gemini calls with retries, backoff and an optional circuit breaker.
+
+    Args:
+        name: Shown in log lines
+        max_attempts: Tries per call, including the first
+        base_delay: Backoff before retry n is uniform(0, min(max_delay,
+            base_delay * 2**n)), and never shorter than the server's retry-after
+        breaker: CircuitBreaker shared by every caller of the same API
+        wait_when_open: True blocks until the breaker lets calls through
+            (the harvest pauses); False raises CircuitOpenError at once (the
+            chat endpoint sheds load), and gives up instead of retrying when
+            the server asks for a wait longer than `max_delay`
+    """
+
+    def __init__(
+        self,
+        name: str = 'gemini',
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None,
+        wait_when_open: bool = True
+    ):
+        self.name = name
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.wait_when_open = wait_when_open
+        self.counts = {
+            'calls': 0, 'attempts': 0, 'retries': 0, 'gave_up': 0, 'shed': 0,
+            RATE_LIMITED: 0, TRANSIENT: 0, PERMANENT: 0,
+        }
+        self.paused_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self.counts[key] += n
+
+    def _gate(self) -> float:
+        """Seconds to wait for the breaker; raises CircuitOpenError when shedding."""
+        if not self.breaker:
+            return 0.0
+        wait = self.breaker.allow()
+        if wait and not self.wait_when_open:
+            self._count('shed')
+            raise CircuitOpenError(self.name, wait)
+        if wait:
+            with self._lock:
+                self.paused_seconds += wait
+        return wait
+
+    def _release(self):
+        """The attempt was cancelled (CancelledError, KeyboardInterrupt): no outcome to record."""
+        if self.breaker:
+            self.breaker.release()
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> Optional[float]:
+        """Record a failed attempt; seconds to back off, or None to give up."""
+        kind = classify_error(exc)
+        self._count(kind)
+        if kind == PERMANENT:
+            # The API answered, so it's up: don't count this against the breaker
+            if self.breaker:
+                self.breaker.record_success()
+            return None
+
+        hint = retry_after_seconds(exc)
+        if self.breaker:
+            self.breaker.record_failure(hint)
+        if attempt + 1 >= self.max_attempts:
+            self._count('gave_up')
+            return None
+
+        if hint and hint > self.max_delay and not self.wait_when_open:
+            # Nobody should sit on an empty stream for a 30-60s retry-after
+            self._count('gave_up')
+            return None
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if hint:
+            delay = max(delay, hint)
+        self._count('retries')
+        print(f"   ⏳ {self.name}: {kind.replace('_', ' ')}, retry {attempt + 1}/{self.max_attempts - 1} in {delay:.1f}s")
+        return delay
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """fn(*args, **kwargs), retried on rate limits and transient errors."""
+        self._count('calls')
+        attempt = 0
+        while True:
+            wait = self._gate()
+            while wait:
+                time.sleep(wait)
+                wait = self._gate()
+
+            self._count('attempts')
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release()
+                raise
+
+            if self.breaker:
+                self.breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async twin of `call`: awaits fn(*args, **kwargs) and sleeps on the event loop."""
+        self._count('calls')
+        attempt = 0
+        while True:
+            wait = self._gate()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self._gate()
+
+            self._count('attempts')
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self._release()
+                raise
+
+            if self.breaker:
+                self.breaker.record_success()
+            return result
+
+    def record_stream_failure(self, exc: Exception):
+        """A stream that broke after its first chunk: not retried, but the breaker hears of it."""
+        kind = classify_error(exc)
+        self._count(kind)
+        if self.breaker and kind != PERMANENT:
+            self.breaker.record_failure(retry_after_seconds(exc))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self.counts)
+            stats['paused_seconds'] = round(self.paused_seconds, 1)
+        if self.breaker:
+            stats['breaker'] = self.breaker.stats()
+        return stats
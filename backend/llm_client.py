@@ -1,16 +1,46 @@
+"""Gemini chat for the /api/chat endpoint: caches, place retrieval, streaming.
+
+Importing this module is cheap and needs no API key: llama_index, google.genai
+and chromadb (several seconds together) are imported, and the clients built,
+by `init()`, which the FastAPI lifespan runs before serving. Code that skips
+the lifespan (scripts, benchmarks) gets the same on its first chat call.
+"""
 import os
-from typing import Iterator, List, Dict, Any, Optional
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List, Dict, Any, Optional, Tuple
 
 from dotenv import load_dotenv
-from llama_index.llms.google_genai import GoogleGenAI
-from llama_index.core.llms import ChatMessage
-from google.genai import types
+
+# Shared with the harvester: prompt_packer lives in scrapper/
+sys.path.insert(0, str(Path(__file__).parent / "scrapper"))
+
+from response_cache import (
+    ResponseCache,
+    InMemoryResponseCache,
+    SQLiteResponseCache,
+    make_cache_key,
+    iter_replay_chunks,
+)
+from semantic_cache import SemanticCache, GeminiEmbedder
+from place_retriever import PlaceRetriever
+from gemini_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, classify_error
+from chat_metrics import ChatTrace
+from conversation_window import ConversationWindow
+from prompt_cache import SystemPromptCache
+from prompt_packer import count_tokens
+
+if TYPE_CHECKING:
+    from llama_index.core.llms import ChatMessage
+    from llama_index.llms.google_genai import GoogleGenAI
 
 load_dotenv()
 
 API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
-if not API_KEY:
-    raise RuntimeError("Missing GEMINI_API_KEY (or GOOGLE_API_KEY) in your environment/.env")
 
 DEFAULT_MODEL = "gemini-2.5-flash"
 
@@ -44,17 +74,234 @@ CORE INSTRUCTIONS
    - If asked for something dangerous, pivot smoothly (e.g., "That sounds a bit sketch, maybe try [Safe Alternative] instead?").
 """
 
-grounding_tool = types.Tool(
-    google_search=types.GoogleSearch(),
-    google_maps=types.GoogleMaps(),
+# Response cache: "memory" (default), "sqlite" or "off"
+RESPONSE_CACHE_BACKEND = os.getenv("LOWKEY_RESPONSE_CACHE", "memory").strip().lower()
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("LOWKEY_RESPONSE_CACHE_TTL", str(6 * 3600)))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("LOWKEY_RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_PATH = Path(
+    os.getenv("LOWKEY_RESPONSE_CACHE_PATH", str(Path(__file__).parent / "data" / "response_cache.sqlite3"))
 )
 
-llm = GoogleGenAI(
-    model=DEFAULT_MODEL,
-    api_key=API_KEY,
-    built_in_tool=grounding_tool,
+
+def _build_response_cache() -> Optional[ResponseCache]:
+    if RESPONSE_CACHE_BACKEND == "off":
+        return None
+    if RESPONSE_CACHE_BACKEND == "sqlite":
+        return SQLiteResponseCache(
+            RESPONSE_CACHE_PATH,
+            ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+            max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        )
+    return InMemoryResponseCache(
+        ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    )
+
+
+response_cache: Optional[ResponseCache] = _build_response_cache()
+
+# Semantic cache: off by default since every miss costs one embedding call
+SEMANTIC_CACHE_ENABLED = os.getenv("LOWKEY_SEMANTIC_CACHE", "off").strip().lower() in ("1", "on", "true")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LOWKEY_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("LOWKEY_SEMANTIC_CACHE_MAX_ENTRIES", "100000"))
+
+semantic_cache: Optional[SemanticCache] = None
+
+
+# Retrieval over the harvested place corpus ("on" by default; a no-op until the index is built)
+RAG_ENABLED = os.getenv("LOWKEY_RAG", "on").strip().lower() in ("1", "on", "true")
+RAG_TOP_K = int(os.getenv("LOWKEY_RAG_TOP_K", "5"))
+# Answer from retrieved places alone (no Search/Maps grounding) above this score; 0 disables
+RAG_SKIP_GROUNDING_CONFIDENCE = float(os.getenv("LOWKEY_RAG_SKIP_GROUNDING_CONFIDENCE", "0"))
+
+place_retriever: Optional[PlaceRetriever] = None
+ungrounded_llm: Optional["GoogleGenAI"] = None
+
+# Long chats: newest turns verbatim within a token budget, older ones as a rolling summary
+HISTORY_WINDOW_ENABLED = os.getenv("LOWKEY_HISTORY_WINDOW", "on").strip().lower() in ("1", "on", "true")
+HISTORY_TOKEN_BUDGET = int(os.getenv("LOWKEY_HISTORY_TOKEN_BUDGET", "3000"))
+HISTORY_KEEP_RATIO = float(os.getenv("LOWKEY_HISTORY_KEEP_RATIO", "0.5"))
+SUMMARY_MODEL = os.getenv("LOWKEY_SUMMARY_MODEL", DEFAULT_MODEL)
+
+conversation_window: Optional[ConversationWindow] = (
+    ConversationWindow(HISTORY_TOKEN_BUDGET, HISTORY_KEEP_RATIO) if HISTORY_WINDOW_ENABLED else None
 )
 
+# Explicit context caching of SYSTEM_PROMPT + Search/Maps tools for grounded calls.
+# Off by default: Gemini rejects prompts under the model's minimum, which the
+# current SYSTEM_PROMPT is; `init` also skips it while the prompt is too small.
+PROMPT_CACHE_ENABLED = os.getenv("LOWKEY_PROMPT_CACHE", "off").strip().lower() in ("1", "on", "true")
+PROMPT_CACHE_TTL_SECONDS = float(os.getenv("LOWKEY_PROMPT_CACHE_TTL", "3600"))
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv("LOWKEY_PROMPT_CACHE_MIN_TOKENS", "1024"))
+
+prompt_cache: Optional[SystemPromptCache] = None
+
+# Grounded chat LLM; None until `init()`
+llm: Optional["GoogleGenAI"] = None
+# Client shared by the embedders (semantic cache, place retrieval) and the history summarizer
+genai_client: Any = None
+
+# Warm-up: one cheap request per client at startup so the first user doesn't pay for DNS/TLS
+WARMUP_ENABLED = os.getenv("LOWKEY_WARMUP", "off").strip().lower() in ("1", "on", "true")
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("LOWKEY_WARMUP_TIMEOUT", "10"))
+
+_init_lock = threading.Lock()
+# Runs the chat path for `stream_chat_to_gemini`; started on its first call
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+# Retries for chat calls are short (a user is waiting); while the breaker is open
+# requests are shed with a friendly message instead of queueing behind the outage
+GEMINI_MAX_ATTEMPTS = int(os.getenv("LOWKEY_GEMINI_MAX_ATTEMPTS", "3"))
+GEMINI_BACKOFF_MAX = float(os.getenv("LOWKEY_GEMINI_BACKOFF_MAX", "8"))
+GEMINI_BREAKER_THRESHOLD = int(os.getenv("LOWKEY_GEMINI_BREAKER_THRESHOLD", "5"))
+GEMINI_BREAKER_COOLDOWN = float(os.getenv("LOWKEY_GEMINI_BREAKER_COOLDOWN", "30"))
+
+gemini_caller = ResilientCaller(
+    "gemini-chat",
+    max_attempts=GEMINI_MAX_ATTEMPTS,
+    base_delay=0.5,
+    max_delay=GEMINI_BACKOFF_MAX,
+    breaker=CircuitBreaker("gemini-chat", GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN),
+    wait_when_open=False,
+)
+
+BUSY_MESSAGE = "\n😵 Gemini is swamped rn and Momo is taking a breather. Try again in ~{seconds}s 🙏\n"
+ERROR_MESSAGE = "\n😵 Something went wrong on my end. Try again in a sec 🙏\n"
+
+
+def init():
+    """Import the Gemini SDKs and build the clients. Safe to call more than once.
+
+    Raises RuntimeError if no API key is configured.
+    """
+    global llm, ungrounded_llm, genai_client, semantic_cache, place_retriever, prompt_cache
+    with _init_lock:
+        if llm is not None:
+            return
+        if not API_KEY:
+            raise RuntimeError("Missing GEMINI_API_KEY (or GOOGLE_API_KEY) in your environment/.env")
+
+        started = time.perf_counter()
+        from google import genai
+        from google.genai import types
+        from llama_index.llms.google_genai import GoogleGenAI
+
+        cache_prompt = _prompt_cache_fits()
+        if SEMANTIC_CACHE_ENABLED or RAG_ENABLED or HISTORY_WINDOW_ENABLED or cache_prompt:
+            genai_client = genai.Client(api_key=API_KEY)
+        if SEMANTIC_CACHE_ENABLED:
+            semantic_cache = SemanticCache(
+                GeminiEmbedder(genai_client),
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+            )
+        if RAG_ENABLED:
+            place_retriever = _open_place_retriever()
+            if place_retriever is not None and RAG_SKIP_GROUNDING_CONFIDENCE > 0:
+                ungrounded_llm = GoogleGenAI(model=DEFAULT_MODEL, api_key=API_KEY)
+
+        grounding_tool = types.Tool(
+            google_search=types.GoogleSearch(),
+            google_maps=types.GoogleMaps(),
+        )
+        if cache_prompt:
+            prompt_cache = SystemPromptCache(
+                genai_client, DEFAULT_MODEL, SYSTEM_PROMPT, [grounding_tool], ttl_seconds=PROMPT_CACHE_TTL_SECONDS
+            )
+        # Assigned last: a non-None `llm` means everything above is ready
+        llm = GoogleGenAI(
+            model=DEFAULT_MODEL,
+            api_key=API_KEY,
+            built_in_tool=grounding_tool,
+        )
+        print(f"🤖 Gemini clients ready in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def _open_place_retriever() -> Optional[PlaceRetriever]:
+    """The place index, or None (chat stays grounded-only) if it can't be opened.
+
+    Retrieval is optional, so a mismatched embedder or a missing/corrupt
+    index is logged instead of keeping the server from starting.
+    """
+    try:
+        return PlaceRetriever(GeminiEmbedder(genai_client), top_k=RAG_TOP_K)
+    except Exception as e:
+        print(f"⚠️ Place retrieval off: {type(e).__name__}: {e}")
+        return None
+
+
+def _prompt_cache_fits() -> bool:
+    """Prompt caching is on and SYSTEM_PROMPT is over the model's caching minimum (local estimate)."""
+    if not PROMPT_CACHE_ENABLED:
+        return False
+    tokens = count_tokens(SYSTEM_PROMPT)
+    if tokens < PROMPT_CACHE_MIN_TOKENS:
+        print(f"ℹ️ Prompt cache off: system prompt is ~{tokens} tokens, Gemini caches {PROMPT_CACHE_MIN_TOKENS}+")
+        return False
+    return True
+
+
+def _ensure_init():
+    if llm is None:
+        init()
+
+
+async def warm_up():
+    """Prime the clients before the worker reports ready; failures are logged, not raised.
+
+    Fetches the model's metadata (no tokens billed) through each client the
+    chat path uses, which opens and keeps their HTTPS connections, opens
+    the place index and registers the cached system prompt.
+    """
+    started = time.perf_counter()
+    clients = [genai_client, getattr(llm, "_client", None)]
+    calls = [
+        client.aio.models.get(model=DEFAULT_MODEL)
+        for client in {id(c): c for c in clients if c is not None}.values()
+    ]
+    if place_retriever is not None:
+        calls.append(asyncio.to_thread(lambda: place_retriever.available))
+    if prompt_cache is not None:
+        calls.append(asyncio.to_thread(prompt_cache.refresh))
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(*calls, return_exceptions=True), WARMUP_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        print(f"⚠️ Warm-up timed out after {WARMUP_TIMEOUT_SECONDS:.0f}s")
+        return
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"⚠️ Warm-up request failed: {type(result).__name__}: {result}")
+    print(f"🔥 Warm-up done in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def get_gemini_stats() -> Dict[str, Any]:
+    return gemini_caller.stats()
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"enabled": response_cache is not None}
+    if response_cache is not None:
+        stats.update({"backend": RESPONSE_CACHE_BACKEND, **response_cache.stats()})
+    stats["semantic"] = semantic_cache.stats() if semantic_cache else {"enabled": False}
+    return stats
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    if prompt_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prompt_cache.stats()}
+
+
+def get_history_stats() -> Dict[str, Any]:
+    if conversation_window is None:
+        return {"enabled": False}
+    return {"enabled": True, **conversation_window.stats()}
+
 
 def _extract_text_from_ui_message(message: Dict[str, Any]) -> str:
     parts = message.get("parts") or []
@@ -70,8 +317,10 @@ def _extract_text_from_ui_message(message: Dict[str, Any]) -> str:
 
 def _convert_ui_messages_to_chat_messages(
     messages: List[Dict[str, Any]]
-) -> List[ChatMessage]:
-    chat_messages: List[ChatMessage] = []
+) -> List["ChatMessage"]:
+    from llama_index.core.llms import ChatMessage
+
+    chat_messages: List["ChatMessage"] = []
     
     chat_messages.append(ChatMessage(role="system", content=SYSTEM_PROMPT))
     
@@ -144,27 +393,326 @@ def _format_sources_for_display(sources: List[Dict[str, str]]) -> str:
     return "\n".join(lines)
 
 
-def stream_chat_to_gemini(
+def _semantic_query(chat_messages: List["ChatMessage"], include_sources: bool) -> Optional[str]:
+    """Text to embed for the semantic cache, or None if it doesn't apply."""
+    if semantic_cache is None or not include_sources:
+        return None
+    turns = [m for m in chat_messages if m.role != "system"]
+    if len(turns) != 1:
+        return None
+    return turns[0].content
+
+
+async def _lookup_cached_answer(cache_key: str, semantic_query: Optional[str]) -> Optional[str]:
+    """A stored answer for this conversation, or None. Cache errors count as a miss."""
+    try:
+        cached = await response_cache.aget(cache_key) if response_cache is not None else None
+        if cached is None and semantic_query:
+            cached = await semantic_cache.alookup(semantic_query)
+        return cached
+    except Exception as e:
+        print(f"⚠️ Answer cache lookup failed: {type(e).__name__}: {e}")
+        return None
+
+
+async def _store_answer(cache_key: str, semantic_query: Optional[str], answer: str):
+    """Best effort: the answer has already been streamed, so a cache error is only logged."""
+    try:
+        if response_cache is not None:
+            await response_cache.aset(cache_key, answer)
+        if semantic_query:
+            await semantic_cache.aadd(semantic_query, answer)
+    except Exception as e:
+        print(f"⚠️ Answer cache store failed: {type(e).__name__}: {e}")
+
+
+def _last_user_text(chat_messages: List["ChatMessage"]) -> str:
+    for m in reversed(chat_messages):
+        if m.role == "user":
+            return m.content or ""
+    return ""
+
+
+def _conversation_id(messages: List[Dict[str, Any]], conversation_id: Optional[str]) -> Optional[str]:
+    """The chat's ID, else the first message's (stable across the chat's requests)."""
+    if conversation_id:
+        return conversation_id
+    return messages[0].get("id") if messages else None
+
+
+def _summary_text(response: Any) -> str:
+    text = getattr(response, "text", None)
+    if not text:
+        raise ValueError("Empty summary")
+    return text
+
+
+async def _summarize(prompt: str) -> str:
+    return _summary_text(
+        await gemini_caller.acall(genai_client.aio.models.generate_content, model=SUMMARY_MODEL, contents=prompt)
+    )
+
+
+def _split_history(chat_messages: List["ChatMessage"]) -> List[Tuple[str, str]]:
+    return [(str(getattr(m.role, "value", m.role)), m.content or "") for m in chat_messages[1:]]
+
+
+def _windowed(
+    chat_messages: List["ChatMessage"],
+    summary: Optional[str],
+    kept: List[Tuple[str, str]],
+) -> List["ChatMessage"]:
+    """System prompt (plus the summary of older turns) followed by the kept turns."""
+    if summary is None:
+        return chat_messages
+
+    from llama_index.core.llms import ChatMessage
+
+    system = f"{SYSTEM_PROMPT}\n\nCONVERSATION SO FAR (older messages, summarized)\n{summary}"
+    return [ChatMessage(role="system", content=system)] + chat_messages[len(chat_messages) - len(kept):]
+
+
+async def _window_history(chat_messages: List["ChatMessage"], conversation_id: Optional[str]) -> List["ChatMessage"]:
+    if conversation_window is None:
+        return chat_messages
+    summary, kept = await conversation_window.aapply(conversation_id, _split_history(chat_messages), _summarize)
+    return _windowed(chat_messages, summary, kept)
+
+
+def _apply_retrieval(
+    chat_messages: List["ChatMessage"],
+    hits: List[Dict[str, Any]],
+) -> Tuple[List["ChatMessage"], "GoogleGenAI"]:
+    """Fold retrieved places into the system prompt and pick the LLM to call."""
+    if not hits:
+        return chat_messages, llm
+
+    from llama_index.core.llms import ChatMessage
+
+    context = PlaceRetriever.format_context(hits)
+    augmented = [ChatMessage(role="system", content=f"{chat_messages[0].content}\n\n{context}")] + chat_messages[1:]
+
+    confident = (
+        ungrounded_llm is not None
+        and PlaceRetriever.confidence(hits) >= RAG_SKIP_GROUNDING_CONFIDENCE
+    )
+    return augmented, ungrounded_llm if confident else llm
+
+
+async def _retrieve_places(chat_messages: List["ChatMessage"]) -> Tuple[List["ChatMessage"], "GoogleGenAI"]:
+    if place_retriever is None:
+        return chat_messages, llm
+    try:
+        hits = await place_retriever.aretrieve(_last_user_text(chat_messages))
+    except Exception as e:
+        print(f"⚠️ Place retrieval error: {e}")
+        hits = []
+    return _apply_retrieval(chat_messages, hits)
+
+
+def _cached_request(chat_messages: List["ChatMessage"], cache_name: str) -> Optional[Dict[str, Any]]:
+    """generate_content kwargs that reference the cached system prompt, or None to go inline.
+
+    A request using cached content can't carry its own system instruction,
+    so whatever was added to SYSTEM_PROMPT (history summary, retrieved
+    places) goes in as a leading user message instead.
+    """
+    from google.genai import types
+
+    system = chat_messages[0].content or ""
+    if not system.startswith(SYSTEM_PROMPT):
+        return None
+
+    contents = []
+    extra = system[len(SYSTEM_PROMPT):].strip()
+    if extra:
+        contents.append(types.Content(role="user", parts=[types.Part(text=extra)]))
+    for m in chat_messages[1:]:
+        role = "model" if str(getattr(m.role, "value", m.role)) == "assistant" else "user"
+        contents.append(types.Content(role=role, parts=[types.Part(text=m.content or "")]))
+    return {
+        "model": DEFAULT_MODEL,
+        "contents": contents,
+        "config": types.GenerateContentConfig(cached_content=cache_name),
+    }
+
+
+def _cached_chunk(response: Any) -> Any:
+    """A google.genai stream chunk in the shape the LLM's chunks have (`delta`, `raw`)."""
+    raw: Dict[str, Any] = {}
+    candidate = response.candidates[0] if response.candidates else None
+    grounding = getattr(candidate, "grounding_metadata", None)
+    if grounding is not None:
+        raw["grounding_metadata"] = grounding.model_dump(exclude_none=True)
+    if response.usage_metadata is not None:
+        raw["usage_metadata"] = response.usage_metadata.model_dump(exclude_none=True)
+    return SimpleNamespace(delta=response.text or "", raw=raw)
+
+
+async def _acached_chunks(stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    async for response in stream:
+        yield _cached_chunk(response)
+
+
+async def _open_stream(chat_llm: "GoogleGenAI", chat_messages: List["ChatMessage"], trace: ChatTrace) -> Tuple[Any, Any]:
+    """Start a stream, retrying until its first chunk arrives; returns (first_chunk, rest_of_stream).
+
+    Once text has reached the client a retry would repeat it, so only the
+    start of the stream is retried. Grounded calls reference the cached
+    system prompt when there is one, and go inline if the cache is rejected.
+    """
+    async def first_of(stream):
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = None
+        return first, stream
+
+    cache_name = prompt_cache.name() if prompt_cache is not None and chat_llm is llm else None
+    request = _cached_request(chat_messages, cache_name) if cache_name else None
+    if request:
+        async def start_cached():
+            stream = await genai_client.aio.models.generate_content_stream(**request)
+            return await first_of(_acached_chunks(stream))
+
+        try:
+            response = await gemini_caller.acall(start_cached)
+            trace.prompt_mode = "cached"
+            return response
+        except Exception as e:
+            if not SystemPromptCache.is_cache_error(e):
+                raise
+            prompt_cache.invalidate(cache_name, e)
+
+    async def start():
+        return await first_of(await chat_llm.astream_chat(messages=chat_messages))
+
+    trace.prompt_mode = "inline"
+    return await gemini_caller.acall(start)
+
+
+def _error_message(e: Exception, streamed: bool, trace: ChatTrace) -> str:
+    """Log the real error server-side; the user gets a short in-character note."""
+    if isinstance(e, CircuitOpenError):
+        trace.finish("busy")
+        return BUSY_MESSAGE.format(seconds=max(int(e.retry_in), 1))
+    kind = classify_error(e)
+    trace.finish("error", kind)
+    print(f"⚠️ Gemini chat error ({kind}): {type(e).__name__}: {e}")
+    if streamed:
+        gemini_caller.record_stream_failure(e)
+    return ERROR_MESSAGE
+
+
+def _record_response(trace: ChatTrace, full_response: Any) -> List[Dict[str, str]]:
+    """Note token usage and grounding sources from the last chunk; returns the sources."""
+    raw = getattr(full_response, "raw", None) if full_response is not None else None
+    trace.usage(raw)
+    sources = _extract_grounding_sources(raw)
+    trace.sources = len(sources)
+    return sources
+
+
+async def astream_chat_to_gemini(
     messages: List[Dict[str, Any]],
     include_sources: bool = True,
-) -> Iterator[str]:
+    conversation_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Stream the answer to a chat for the FastAPI endpoint.
+
+    Uses the LLM's native async streaming API, so chunks are awaited on the
+    event loop instead of being pulled through Starlette's threadpool.
+    """
+    _ensure_init()
+    trace = ChatTrace()
+    try:
+        async for piece in _stream_chat(messages, include_sources, _conversation_id(messages, conversation_id), trace):
+            trace.chunk()
+            yield piece
+    except Exception:
+        trace.finish("error", "internal")
+        raise
+    finally:
+        trace.finish("cancelled")
+
+
+async def _stream_chat(
+    messages: List[Dict[str, Any]],
+    include_sources: bool,
+    conversation_id: Optional[str],
+    trace: ChatTrace,
+) -> AsyncIterator[str]:
     chat_messages = _convert_ui_messages_to_chat_messages(messages)
     
+    cache_key = make_cache_key(chat_messages, DEFAULT_MODEL, include_sources)
+    semantic_query = _semantic_query(chat_messages, include_sources)
+    cached = await _lookup_cached_answer(cache_key, semantic_query)
+    if cached is not None:
+        trace.source = "cache"
+        for piece in iter_replay_chunks(cached):
+            yield piece
+        trace.finish("cache_hit")
+        return
+    
+    chat_messages = await _window_history(chat_messages, conversation_id)
+    chat_messages, chat_llm = await _retrieve_places(chat_messages)
+    
+    pieces: List[str] = []
     try:
-        response = llm.stream_chat(messages=chat_messages)
+        first, response = await _open_stream(chat_llm, chat_messages, trace)
         
-        full_response = None
-        for chunk in response:
+        full_response = first
+        if first is not None and first.delta:
+            pieces.append(first.delta)
+            yield first.delta
+        async for chunk in response:
             if chunk.delta:
+                pieces.append(chunk.delta)
                 yield chunk.delta
             full_response = chunk  # for metadata
         
-        if include_sources and full_response and hasattr(full_response, "raw"):
-            sources = _extract_grounding_sources(full_response.raw)
+        sources = _record_response(trace, full_response)
+        if include_sources:
             source_text = _format_sources_for_display(sources)
             if source_text:
+                pieces.append(source_text)
                 yield source_text
+        
+        if pieces:
+            await _store_answer(cache_key, semantic_query, "".join(pieces))
+        trace.finish("ok")
                 
     except Exception as e:
-        yield f"\n[ERROR] {type(e).__name__}: {e}\n"
+        yield _error_message(e, streamed=bool(pieces), trace=trace)
+
+
+def stream_chat_to_gemini(
+    messages: List[Dict[str, Any]],
+    include_sources: bool = True,
+    conversation_id: Optional[str] = None,
+) -> Iterator[str]:
+    """Blocking wrapper around `astream_chat_to_gemini` for scripts and benchmarks.
+
+    Each chunk is awaited on one shared background event loop, so the async
+    clients' connections stay bound to a single loop across calls.
+    """
+    loop = _sync_loop()
+    stream = astream_chat_to_gemini(messages, include_sources, conversation_id)
+    try:
+        while True:
+            try:
+                yield asyncio.run_coroutine_threadsafe(stream.__anext__(), loop).result()
+            except StopAsyncIteration:
+                return
+    finally:
+        # Runs the async generator's cleanup (trace.finish) when the caller stops early
+        asyncio.run_coroutine_threadsafe(stream.aclose(), loop).result()
+
 
+def _sync_loop() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name="chat-sync-loop", daemon=True).start()
+        return _background_loop
@@ -1,12 +1,36 @@
-from typing import List, Literal, Any, Dict
-from fastapi import FastAPI
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Literal, Any, Dict, Optional
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import llm_client
+import chat_metrics
+from place_catalog import PlaceCatalog
 
 
-app = FastAPI()
+# Harvested places, indexed in memory; reloaded when the harvest files change
+place_catalog = PlaceCatalog()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy imports and client setup happen here, not at import time, and the
+    # worker only starts accepting requests once they're done
+    started = time.perf_counter()
+    await asyncio.gather(
+        asyncio.to_thread(llm_client.init),
+        asyncio.to_thread(place_catalog.refresh, True),
+    )
+    if llm_client.WARMUP_ENABLED:
+        await llm_client.warm_up()
+    print(f"🚀 Backend ready in {(time.perf_counter() - started) * 1000:.0f}ms")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +54,7 @@ class UIMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
+    id: Optional[str] = None  # chat ID the AI SDK sends; keys the history summary
     messages: List[UIMessage]
 
 
@@ -38,12 +63,107 @@ async def read_root():
     return {"status": "Backend is running", "brain": "Gemini"}
 
 
+# Plain def: a reload reads files, so it runs in the threadpool, not on the event loop
+@app.get("/api/places")
+def list_places(
+    city: List[str] = Query(default=[]),
+    country: List[str] = Query(default=[]),
+    category: List[str] = Query(default=[]),
+    tag: List[str] = Query(default=[]),
+    sort: Literal["mentions", "confidence"] = "mentions",
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    try:
+        return place_catalog.query(
+            cities=city,
+            countries=country,
+            categories=category,
+            tags=tag,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return llm_client.get_cache_stats()
+
+
+# Prometheus scrape target: chat latency/token histograms plus cache, Gemini and catalog stats
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    cache = llm_client.get_cache_stats()
+    gemini = llm_client.get_gemini_stats()
+    caches = [("exact", cache)] if cache["enabled"] else []
+    if cache["semantic"].get("enabled", True):
+        caches.append(("semantic", cache["semantic"]))
+    breaker = gemini.get("breaker", {})
+    history = llm_client.get_history_stats()
+    prompt_cache = llm_client.get_prompt_cache_stats()
+
+    blocks = [
+        chat_metrics.snapshot(
+            "lowkey_response_cache_lookups_total", "counter", "Chat answer cache lookups by cache and result.",
+            [({"cache": name, "result": result}, stats[key])
+             for name, stats in caches for result, key in (("hit", "hits"), ("miss", "misses"))],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_response_cache_entries", "gauge", "Answers held by each chat cache.",
+            [({"cache": name}, stats["entries"]) for name, stats in caches],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_gemini_chat_events_total", "counter",
+            "Gemini chat calls, attempts, retries, sheds and failures by kind.",
+            [({"event": event}, value) for event, value in gemini.items()
+             if event not in ("paused_seconds", "breaker")],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_gemini_chat_breaker_open", "gauge", "1 while the chat circuit breaker is open or probing.",
+            [({}, 0 if breaker.get("state", "closed") == "closed" else 1)],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_history_summaries_total", "counter",
+            "Requests whose older turns were freshly summarized or used a cached summary.",
+            [({"result": "made"}, history.get("summaries_made", 0)),
+             ({"result": "reused"}, history.get("summaries_reused", 0))],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_prompt_cache_active", "gauge",
+            "1 while grounded chat calls reference the cached system prompt.",
+            [({}, 1 if prompt_cache.get("active") else 0)],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_prompt_cache_tokens", "gauge",
+            "Tokens in the cached system prompt + tools, i.e. input saved per cached request.",
+            [({}, prompt_cache.get("cached_tokens", 0))],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_prompt_cache_events_total", "counter",
+            "Cached system prompt entries created, reused from another worker, failed or rejected.",
+            [({"event": event}, prompt_cache.get(event, 0))
+             for event in ("created", "reused", "failures", "invalidations")],
+        ),
+        chat_metrics.snapshot(
+            "lowkey_places_indexed", "gauge", "Places in the /api/places catalog.",
+            [({}, place_catalog.stats()["places"])],
+        ),
+    ]
+    return PlainTextResponse(
+        chat_metrics.render(blocks),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.post("/api/chat")
 async def chat(req: ChatRequest):
     messages_as_dicts = [m.model_dump() for m in req.messages]
 
     return StreamingResponse(
-        llm_client.stream_chat_to_gemini(messages_as_dicts),
+        llm_client.astream_chat_to_gemini(messages_as_dicts, conversation_id=req.id),
         media_type="text/plain; charset=utf-8",
         headers={
             "Cache-Control": "no-cache",
@@ -0,0 +1,257 @@
+"""Filterable, paginated view of the harvested places for /api/places.
+
+Places are loaded once into memory and ranked (most mentioned first, then
+confidence, then name); a place's ID is its rank. Each city, country,
+category, tag and confidence value maps to a bitmap (a Python int, bit i set
+= place i matches), so a filter is a handful of ANDs/ORs and the set bits of
+the result come out already sorted. The source files are re-checked every
+few seconds and the index is rebuilt when they change.
+"""
+import sys
+import json
+import time
+import base64
+import bisect
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent / "scrapper"))
+
+from place_retriever import HARVEST_DIR, place_id
+from place_store import harvest_files, iter_places
+
+CONFIDENCE_RANK = {"high": 0, "medium": 1}
+SORTS = ("mentions", "confidence")
+
+
+def _norm(value: Any) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def _values(values: Iterable[str]) -> List[str]:
+    """Normalized filter values; each may itself be a comma-separated list."""
+    return [v for value in values for v in (_norm(part) for part in value.split(",")) if v]
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+def _bitmap(positions: List[int], size: int) -> int:
+    """Int with the given bits set, built in one go (OR-ing bit by bit is quadratic)."""
+    bits = bytearray((size + 7) // 8)
+    for i in positions:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _iter_bits(mask: int, start: int = 0) -> Iterator[int]:
+    """Positions of the set bits of `mask` at or after `start`, in increasing order."""
+    mask >>= start
+    position = start
+    while mask:
+        shift = (mask & -mask).bit_length() - 1
+        position += shift
+        yield position
+        mask >>= shift + 1
+        position += 1
+
+
+def _rank_key(place: Dict[str, Any]) -> Tuple[int, int, str, str]:
+    return (
+        -int(place.get("mention_count", 1)),
+        CONFIDENCE_RANK.get(_norm(place.get("confidence")), len(CONFIDENCE_RANK)),
+        _norm(place.get("name")),
+        _norm(place.get("city")),
+    )
+
+
+class _Snapshot:
+    """One immutable build of the index; reloads swap in a new one."""
+
+    FIELDS = ("city", "country", "category", "tags", "confidence")
+
+    def __init__(self, places: List[Dict[str, Any]]):
+        places = sorted(places, key=_rank_key)
+        self.places = places
+        self.keys = [_rank_key(p) for p in places]
+        self.all = (1 << len(places)) - 1
+
+        positions: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.FIELDS}
+        for i, place in enumerate(places):
+            for field in self.FIELDS:
+                values = place.get(field) or []
+                for value in values if isinstance(values, list) else [values]:
+                    positions[field].setdefault(_norm(value), []).append(i)
+
+        self.bitmaps: Dict[str, Dict[str, int]] = {
+            field: {key: _bitmap(ids, len(places)) for key, ids in by_value.items()}
+            for field, by_value in positions.items()
+        }
+
+    def match(self, field: str, values: List[str], require_all: bool = False) -> int:
+        """Places with any (or, with `require_all`, every) of `values` in `field`."""
+        bitmap = self.bitmaps[field]
+        if require_all:
+            mask = self.all
+            for value in values:
+                mask &= bitmap.get(value, 0)
+            return mask
+        mask = 0
+        for value in values:
+            mask |= bitmap.get(value, 0)
+        return mask
+
+    def tiers(self, sort: str) -> List[Tuple[int, int]]:
+        """(tier id, mask) pairs in the order results are returned."""
+        if sort == "mentions":
+            return [(0, self.all)]
+        ranked = [(rank, self.bitmaps["confidence"].get(name, 0)) for name, rank in CONFIDENCE_RANK.items()]
+        rest = self.all
+        for _, mask in ranked:
+            rest &= ~mask
+        return sorted(ranked) + [(len(CONFIDENCE_RANK), rest)]
+
+
+class PlaceCatalog:
+    """Loads the harvest output and answers filtered, sorted, paginated queries.
+
+    Args:
+        data_dir: Harvest output directory (`all_places` or `cities/*`)
+        check_interval: Seconds between checks of the source files for changes
+    """
+
+    def __init__(self, data_dir: Path = HARVEST_DIR, check_interval: float = 5.0):
+        self.data_dir = Path(data_dir)
+        self.check_interval = check_interval
+        self.loaded_at: Optional[float] = None
+        self._snapshot = _Snapshot([])
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _source_signature(self, files: List[Path]) -> Tuple:
+        return tuple((str(p), p.stat().st_mtime_ns, p.stat().st_size) for p in files)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the index if the source files changed. Returns True if it did.
+
+        Checks happen at most every `check_interval` seconds; other threads
+        keep querying the old snapshot while one rebuilds.
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        if not self._lock.acquire(blocking=force):
+            return False
+        try:
+            self._checked_at = now
+            try:
+                files = harvest_files(self.data_dir)
+                signature = self._source_signature(files)
+            except OSError as e:
+                # A harvest is rewriting the files; try again on the next check
+                print(f"⚠️ Place catalog: can't read harvest files ({e})")
+                return False
+            if signature == self._signature and not force:
+                return False
+
+            started = time.perf_counter()
+            places: Dict[str, Dict[str, Any]] = {}
+            for path in files:
+                for place in iter_places(path):
+                    places[place_id(place)] = place
+            self._snapshot = _Snapshot(list(places.values()))
+            self._signature = signature
+            self.loaded_at = time.time()
+            print(f"📚 Place catalog: {len(places)} places from {len(files)} files "
+                  f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+            return True
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _encode_cursor(sort: str, key: Tuple) -> str:
+        raw = json.dumps([sort, *key], separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> Tuple:
+        """The sort key of the last place on the previous page."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_sort, mentions, confidence, name, city = json.loads(raw)
+            key = (int(mentions), int(confidence), str(name), str(city))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+        if cursor_sort != sort:
+            raise ValueError("Cursor belongs to a different sort order")
+        return key
+
+    def query(
+        self,
+        cities: Iterable[str] = (),
+        countries: Iterable[str] = (),
+        categories: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        sort: str = "mentions",
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """One page of places matching every given filter.
+
+        Several values for a city/country/category match any of them; several
+        tags must all be present. `cursor` is the `next_cursor` of the
+        previous page and stays valid across reloads. Raises ValueError for
+        an unknown sort or a malformed cursor.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Unknown sort '{sort}' (use one of {', '.join(SORTS)})")
+        self.refresh()
+        snapshot = self._snapshot
+
+        mask = snapshot.all
+        for field, values in (("city", cities), ("country", countries), ("category", categories)):
+            values = _values(values)
+            if values:
+                mask &= snapshot.match(field, values)
+        tag_values = _values(tags)
+        if tag_values:
+            mask &= snapshot.match("tags", tag_values, require_all=True)
+
+        # Resume after the previous page's last place: same tier, next position
+        after_tier, start = -1, 0
+        if cursor:
+            key = self._decode_cursor(cursor, sort)
+            start = bisect.bisect_right(snapshot.keys, key)
+            after_tier = key[1] if sort == "confidence" else 0
+
+        page: List[int] = []
+        for tier, tier_mask in snapshot.tiers(sort):
+            if tier < after_tier:
+                continue
+            for i in _iter_bits(mask & tier_mask, start if tier == after_tier else 0):
+                page.append(i)
+                if len(page) > limit:
+                    break
+            if len(page) > limit:
+                break
+
+        has_more = len(page) > limit
+        page = page[:limit]
+        places = [{"id": place_id(snapshot.places[i]), **snapshot.places[i]} for i in page]
+        return {
+            "places": places,
+            "total": _popcount(mask),
+            "next_cursor": self._encode_cursor(sort, snapshot.keys[page[-1]]) if has_more else None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "places": len(snapshot.places),
+            "loaded_at": self.loaded_at,
+            "cities": len(snapshot.bitmaps["city"]),
+            "tags": len(snapshot.bitmaps["tags"]),
+        }
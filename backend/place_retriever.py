@@ -0,0 +1,238 @@
+"""Retrieval over the harvested place corpus (Chroma vector index).
+
+The harvester writes places to `scrapper/data/`; this module embeds them into
+a local Chroma collection and fetches the top-k matches for a chat turn so
+they can be injected into the prompt as context.
+"""
+import re
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from semantic_cache import Embedder
+
+HARVEST_DIR = Path(__file__).parent / "scrapper" / "data"
+PLACE_INDEX_DIR = HARVEST_DIR / "place_index"
+PLACES_COLLECTION = "lowkey_places"
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def place_id(place: Dict[str, Any]) -> str:
+    """Same key `PlaceExtractor._merge_place` uses for deduplication."""
+    return f"{place['name'].lower().strip()}_{place['city'].lower().strip()}"
+
+
+def place_document(place: Dict[str, Any]) -> str:
+    """Text that gets embedded: name + vibe + tags (plus category/city for context)."""
+    tags = ", ".join(place.get("tags", []))
+    return (
+        f"{place['name']} ({place.get('category', '')}) in {place.get('city', '')}. "
+        f"{place.get('vibe', '')} Tags: {tags}"
+    )
+
+
+def place_metadata(place: Dict[str, Any]) -> Dict[str, Any]:
+    """Chroma metadata must be scalar, so the full record rides along as JSON."""
+    return {
+        "city_key": place.get("city", "").lower().strip(),
+        "category": place.get("category", ""),
+        "tags": ",".join(place.get("tags", [])),
+        "mention_count": int(place.get("mention_count", 1)),
+        "place_json": json.dumps(place, ensure_ascii=False),
+    }
+
+
+def open_collection(index_dir: Path = PLACE_INDEX_DIR, embedder: Optional[Embedder] = None):
+    """Open (or create) the place collection, pinned to one embedder."""
+    import chromadb  # ~1s to import; only paid once RAG or the indexer opens the index
+
+    client = chromadb.PersistentClient(path=str(index_dir))
+    metadata = {"hnsw:space": "cosine"}
+    if embedder is not None:
+        metadata["embedder"] = embedder.name
+    collection = client.get_or_create_collection(PLACES_COLLECTION, metadata=metadata)
+
+    indexed_with = (collection.metadata or {}).get("embedder")
+    if embedder is not None and indexed_with and indexed_with != embedder.name:
+        raise ValueError(
+            f"Place index was built with '{indexed_with}', not '{embedder.name}'. "
+            f"Rebuild the index or use the matching embedder."
+        )
+    return collection
+
+
+def upsert_places(collection, places: Sequence[Dict[str, Any]], embedder: Embedder, batch_size: int = 100) -> int:
+    """Embed and upsert places in batches. Returns how many were written."""
+    written = 0
+    for start in range(0, len(places), batch_size):
+        batch = places[start:start + batch_size]
+        documents = [place_document(p) for p in batch]
+        embeddings = embedder.embed(documents)
+        collection.upsert(
+            ids=[place_id(p) for p in batch],
+            documents=documents,
+            embeddings=[e.tolist() for e in embeddings],
+            metadatas=[place_metadata(p) for p in batch],
+        )
+        written += len(batch)
+    return written
+
+
+class PlaceRetriever:
+    """Top-k place lookup for a user message.
+
+    Candidates come from a vector query (filtered to a city when the message
+    names one we have indexed), then get a small boost when their category or
+    tags are mentioned in the message. `confidence` is the best final score.
+    """
+
+    KEYWORD_BOOST = 0.05
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        index_dir: Path = PLACE_INDEX_DIR,
+        top_k: int = 5,
+        refresh_seconds: float = 60.0,
+    ):
+        self.embedder = embedder
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self.collection = open_collection(index_dir, embedder)
+        self._count = 0
+        self._known_cities: List[str] = []
+        self._checked_at: Optional[float] = None
+        self._state_lock = threading.Lock()
+
+    def _state(self) -> Tuple[int, List[str]]:
+        """(indexed places, city keys), re-read from Chroma at most every `refresh_seconds`.
+
+        The city list needs every row's metadata, so it's only rebuilt when
+        the count has changed (the indexer added or removed places).
+        """
+        with self._state_lock:
+            now = time.monotonic()
+            if self._checked_at is not None and now - self._checked_at < self.refresh_seconds:
+                return self._count, self._known_cities
+            count = self.collection.count()
+            if self._checked_at is None or count != self._count:
+                metadatas = (self.collection.get(include=["metadatas"])["metadatas"] or []) if count else []
+                cities = {m.get("city_key", "") for m in metadatas}
+                # Longest first so "hong kong" wins over "kong"-style partial names
+                self._known_cities = sorted((c for c in cities if c), key=len, reverse=True)
+                self._count = count
+            self._checked_at = now
+            return self._count, self._known_cities
+
+    @property
+    def available(self) -> bool:
+        return self._state()[0] > 0
+
+    def _cities(self) -> List[str]:
+        return self._state()[1]
+
+    def _detect_city(self, text: str) -> Optional[str]:
+        lowered = f" {' '.join(_WORD_RE.findall(text.lower()))} "
+        for city in self._cities():
+            if f" {city} " in lowered:
+                return city
+        return None
+
+    def _query(self, text: str, vector) -> List[Dict[str, Any]]:
+        city = self._detect_city(text)
+        kwargs: Dict[str, Any] = {
+            "query_embeddings": [vector.tolist()],
+            "n_results": max(min(self.top_k * 3, self._state()[0]), 1),
+            "include": ["metadatas", "distances"],
+        }
+        if city:
+            kwargs["where"] = {"city_key": city}
+
+        result = self.collection.query(**kwargs)
+        metadatas = (result.get("metadatas") or [[]])[0]
+        distances = (result.get("distances") or [[]])[0]
+
+        words = set(_WORD_RE.findall(text.lower()))
+        hits = []
+        for metadata, distance in zip(metadatas, distances):
+            score = 1.0 - distance  # cosine distance -> similarity
+            category_words = set(metadata.get("category", "").split("_"))
+            if category_words & words:
+                score += self.KEYWORD_BOOST
+            tag_words = {w for tag in metadata.get("tags", "").split(",") for w in tag.split("_")}
+            if tag_words & words:
+                score += self.KEYWORD_BOOST
+
+            hits.append({"score": round(score, 4), "place": json.loads(metadata["place_json"])})
+
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:self.top_k]
+
+    def retrieve(self, text: str) -> List[Dict[str, Any]]:
+        if not text or not self.available:
+            return []
+        return self._query(text, self.embedder.embed([text])[0])
+
+    async def aretrieve(self, text: str) -> List[Dict[str, Any]]:
+        """Async `retrieve`: Chroma calls run in a worker thread, off the event loop."""
+        if not text or not await asyncio.to_thread(lambda: self.available):
+            return []
+        aembed = getattr(self.embedder, "aembed", None)
+        vectors = await aembed([text]) if aembed else await asyncio.to_thread(self.embedder.embed, [text])
+        return await asyncio.to_thread(self._query, text, vectors[0])
+
+    @staticmethod
+    def confidence(hits: List[Dict[str, Any]]) -> float:
+        return hits[0]["score"] if hits else 0.0
+
+    @staticmethod
+    def format_context(hits: List[Dict[str, Any]]) -> str:
+        """Render hits as a prompt block."""
+        if not hits:
+            return ""
+
+        lines = [
+            "LOCAL PLACE NOTES",
+            "Places locals recommended on Reddit that match this question. "
+            "Prefer these when relevant and keep their details accurate.",
+        ]
+        for hit in hits:
+            p = hit["place"]
+            tags = ", ".join(p.get("tags", []))
+            lines.append(
+                f"- {p['name']} ({p.get('category', '')}, {p.get('city', '')}, {p.get('country', '')}) "
+                f"[{tags}] - {p.get('vibe', '')} (mentioned {p.get('mention_count', 1)}x)"
+            )
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from semantic_cache import HashingEmbedder
+
+    parser = argparse.ArgumentParser(description="Query the place index")
+    parser.add_argument("query", type=str, help="e.g. 'cozy cafes in Paris'")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Use the offline hashing embedder")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        embedder = HashingEmbedder()
+    else:
+        import os
+        from dotenv import load_dotenv
+        from google import genai
+        from semantic_cache import GeminiEmbedder
+
+        load_dotenv()
+        embedder = GeminiEmbedder(genai.Client(api_key=os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")))
+
+    retriever = PlaceRetriever(embedder, top_k=args.k)
+    hits = retriever.retrieve(args.query)
+    print(f"Confidence: {retriever.confidence(hits):.3f}")
+    print(retriever.format_context(hits) or "No matches (build the index with scrapper/indexer.py)")
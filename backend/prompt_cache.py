@@ -0,0 +1,178 @@
+"""Gemini explicit context caching for the static system prompt and tools.
+
+The persona prompt and the Search/Maps tool config are registered once as
+cached content with a TTL; chat requests then reference it by name instead of
+re-sending them. Entries are created off the request path, by the warm-up or
+a background thread, and replaced before the TTL runs out. Until one exists,
+or while creation fails (quota, an unsupported model), chat sends the prompt
+inline and creation is retried later. Gemini won't cache prompts under a
+per-model minimum (1024 tokens for gemini-2.5-flash), so `llm_client.init`
+only builds this when the prompt is big enough.
+Several workers share one cache: an unexpired one with the same content hash
+is looked up by display name before creating a new one.
+"""
+import time
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from gemini_resilience import classify_error, PERMANENT
+
+
+class SystemPromptCache:
+    """Hands out the name of a live cached-content entry, or None to go inline.
+
+    Args:
+        client: google.genai Client
+        model: Model the cache is created for (requests must use the same one)
+        system_prompt: Static system instruction
+        tools: google.genai Tool list cached with the prompt
+        ttl_seconds: Lifetime of each cache entry
+        refresh_margin: Re-create this many seconds before expiry, so no
+            request references an entry that's about to vanish
+        retry_after: Seconds to stay inline after a failed creation
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        model: str,
+        system_prompt: str,
+        tools: Optional[List[Any]] = None,
+        ttl_seconds: float = 3600.0,
+        refresh_margin: float = 120.0,
+        retry_after: float = 300.0,
+    ):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.tools = tools or []
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = min(refresh_margin, ttl_seconds / 2)
+        self.retry_after = retry_after
+        digest = hashlib.sha256(f"{model}\x00{system_prompt}\x00{self.tools!r}".encode("utf-8")).hexdigest()
+        self.display_name = f"lowkey-system-{digest[:16]}"
+
+        self.cached_tokens = 0
+        self.created = 0
+        self.reused = 0
+        self.failures = 0
+        self.invalidations = 0
+        self._name: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _live(self) -> Optional[str]:
+        """Current name if it's not about to expire, without creating anything."""
+        now = time.monotonic()
+        if self._name and now < self._expires_at - self.refresh_margin:
+            return self._name
+        return None
+
+    def _due(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _config(self):
+        from google.genai import types
+
+        return types.CreateCachedContentConfig(
+            display_name=self.display_name,
+            system_instruction=self.system_prompt,
+            tools=self.tools or None,
+            ttl=f"{int(self.ttl_seconds)}s",
+        )
+
+    def _adopt(self, cache: Any, created: bool):
+        expire_time = getattr(cache, "expire_time", None)
+        if expire_time is not None:
+            remaining = expire_time.timestamp() - time.time()
+        else:
+            remaining = self.ttl_seconds
+        self._name = cache.name
+        self._expires_at = time.monotonic() + remaining
+        usage = getattr(cache, "usage_metadata", None)
+        self.cached_tokens = int(getattr(usage, "total_token_count", 0) or self.cached_tokens)
+        if created:
+            self.created += 1
+            print(f"🧊 Cached system prompt as {cache.name} ({self.cached_tokens} tokens, {remaining / 60:.0f} min)")
+        else:
+            self.reused += 1
+
+    def _usable(self, cache: Any) -> bool:
+        """An entry another worker made for the same prompt, with time left on it."""
+        if getattr(cache, "display_name", None) != self.display_name:
+            return False
+        if not str(getattr(cache, "model", "")).endswith(self.model):
+            return False
+        expire_time = getattr(cache, "expire_time", None)
+        return expire_time is not None and expire_time.timestamp() - time.time() > self.refresh_margin * 2
+
+    def _failed(self, e: Exception):
+        self.failures += 1
+        self._retry_at = time.monotonic() + self.retry_after
+        print(f"⚠️ Prompt cache unavailable ({classify_error(e)}: {e}); inline prompts for {self.retry_after:.0f}s")
+
+    def name(self) -> Optional[str]:
+        """Cached-content name to reference, or None to go inline. Never waits on the API.
+
+        When the entry is missing or about to expire, a background thread
+        creates (or finds) a fresh one; requests go inline until it's ready.
+        """
+        live = self._live()
+        if live or not self._due():
+            return live
+        with self._lock:
+            if not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, name="prompt-cache", daemon=True).start()
+        return None
+
+    def refresh(self) -> Optional[str]:
+        """Create or adopt the cache entry now (warm-up, background thread); returns its name."""
+        with self._refresh_lock:
+            live = self._live()
+            if live or not self._due():
+                return live
+            try:
+                for cache in self.client.caches.list():
+                    if self._usable(cache):
+                        self._adopt(cache, created=False)
+                        return self._name
+                self._adopt(self.client.caches.create(model=self.model, config=self._config()), created=True)
+            except Exception as e:
+                self._failed(e)
+                return None
+            return self._name
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self, name: str, e: Exception):
+        """A request couldn't use `name` (deleted or expired early); a background refresh replaces it."""
+        with self._lock:
+            if self._name == name:
+                self._name = None
+                self.invalidations += 1
+                print(f"⚠️ Cached prompt {name} rejected ({type(e).__name__}: {e}); re-creating")
+
+    @staticmethod
+    def is_cache_error(e: Exception) -> bool:
+        """A permanent error that mentions the cached content, i.e. worth retrying inline."""
+        return classify_error(e) == PERMANENT and "cache" in str(e).lower()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._live() is not None,
+            "cached_tokens": self.cached_tokens,
+            "created": self.created,
+            "reused": self.reused,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,192 @@
+"""Response cache for grounded chat answers (exact match on the conversation)."""
+import time
+import json
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from llama_index.core.llms import ChatMessage
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace and case so trivial edits still hit the cache."""
+    return " ".join(text.split()).lower()
+
+
+def make_cache_key(chat_messages: List["ChatMessage"], model: str, include_sources: bool = True) -> str:
+    """Hash the normalized conversation (system prompt + user/assistant turns)."""
+    payload = {
+        "model": model,
+        "include_sources": include_sources,
+        "turns": [
+            [str(getattr(m.role, "value", m.role)), _normalize(m.content or "")]
+            for m in chat_messages
+        ],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def iter_replay_chunks(text: str, chunk_size: int = 64) -> Iterator[str]:
+    """Split a cached answer into stream-sized chunks."""
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
+
+
+class ResponseCache(ABC):
+    """Base class: TTL + LRU cache with hit/miss counters.
+
+    Backends implement `_get`, `_set` and `__len__`.
+    """
+
+    def __init__(self, ttl_seconds: float = 6 * 3600, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._get(key, time.time())
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._set(key, value, time.time())
+
+    async def aget(self, key: str) -> Optional[str]:
+        """`get` for the event loop: runs in a worker thread, since a backend may do disk I/O."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: str):
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self),
+        }
+
+    @abstractmethod
+    def _get(self, key: str, now: float) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: str, now: float):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Process-local cache backed by an OrderedDict (oldest use first)."""
+
+    def __init__(self, ttl_seconds: float = 6 * 3600, max_entries: int = 1000):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        created_at, value = entry
+        if now - created_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: str, now: float):
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # A dict lookup never blocks; not worth a thread hop
+    async def aget(self, key: str) -> Optional[str]:
+        return self.get(key)
+
+    async def aset(self, key: str, value: str):
+        self.set(key, value)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """On-disk cache that survives restarts and is shared by workers on one host."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        ttl_seconds: float = 6 * 3600,
+        max_entries: int = 10000,
+    ):
+        super().__init__(ttl_seconds, max_entries)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    def _get(self, key: str, now: float) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, created_at = row
+        if now - created_at > self.ttl_seconds:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+            return None
+
+        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return value
+
+    def _set(self, key: str, value: str, now: float):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+            (key, value, now, now),
+        )
+        # Drop expired rows, then least recently used beyond the cap
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            """DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
@@ -0,0 +1,130 @@
+"""Append-only checkpoint journal for resumable harvests, plus atomic file writes."""
+import os
+import json
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = 2):
+    """Write JSON to a temp file in the same directory, then rename over `path`.
+
+    A crash mid-write leaves the previous file intact instead of a truncated one.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class CheckpointJournal:
+    """JSONL journal of harvest progress.
+
+    Records, in the order they happen:
+        query_start - scraping (city, query) began; drops posts from an earlier attempt
+        post        - a scraped post for (city, query)
+        query_done  - every post for (city, query) has been recorded
+        verdict     - Gemini validation result for a post
+        extracted   - places extracted from a post
+
+    Each record is flushed as it's written, so after a crash the journal
+    holds everything up to the last completed step. A torn last line is
+    ignored on load. Resuming replays finished work from the journal (no
+    Reddit or Gemini calls), so finished cities come back exactly as before.
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._posts: Dict[Tuple[str, str], List[Dict]] = {}
+        self._done_queries: set = set()
+        self._verdicts: Dict[str, bool] = {}
+        self._extracted: Dict[str, List[Dict]] = {}
+
+        if resume and self.path.exists():
+            self._load()
+            mode = 'a'
+        else:
+            mode = 'w'
+        self._file = open(self.path, mode, encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                self._apply(record)
+
+    def _apply(self, record: Dict):
+        kind = record.get('type')
+        if kind == 'query_start':
+            self._posts[(record['city'], record['query'])] = []
+        elif kind == 'post':
+            self._posts.setdefault((record['city'], record['query']), []).append(record['post'])
+        elif kind == 'query_done':
+            self._done_queries.add((record['city'], record['query']))
+        elif kind == 'verdict':
+            self._verdicts[record['post_key']] = record['has_recommendations']
+        elif kind == 'extracted':
+            self._extracted[record['post_key']] = record['places']
+
+    def _write(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._apply(record)
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    # --- recording -------------------------------------------------------
+
+    def record_query_start(self, city: str, query: str):
+        self._write({'type': 'query_start', 'city': city, 'query': query})
+
+    def record_post(self, city: str, query: str, post: Dict):
+        self._write({'type': 'post', 'city': city, 'query': query, 'post': post})
+
+    def record_query_done(self, city: str, query: str):
+        self._write({'type': 'query_done', 'city': city, 'query': query})
+
+    def record_verdict(self, post_key: str, has_recommendations: bool):
+        self._write({'type': 'verdict', 'post_key': post_key, 'has_recommendations': has_recommendations})
+
+    def record_extracted(self, post_key: str, places: List[Dict]):
+        self._write({'type': 'extracted', 'post_key': post_key, 'places': places})
+
+    # --- lookups -------------------------------------------------------
+
+    def query_posts(self, city: str, query: str) -> Optional[List[Dict]]:
+        """Posts for a finished query, or None if it still needs scraping."""
+        with self._lock:
+            if (city, query) not in self._done_queries:
+                return None
+            return list(self._posts.get((city, query), []))
+
+    def verdict(self, post_key: str) -> Optional[bool]:
+        with self._lock:
+            return self._verdicts.get(post_key)
+
+    def extracted(self, post_key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            places = self._extracted.get(post_key)
+            # Copies, since merging mutates places in place
+            return json.loads(json.dumps(places)) if places is not None else None
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -48,4 +48,46 @@ QUERY_PATTERNS = [
 # Settings
 POSTS_PER_QUERY = 10  # Scrape top 5 posts per query
 DELAY_BETWEEN_REQUESTS = 5  # Seconds between Reddit requests
-VALIDATE_WITH_GEMINI = True  # Use Gemini to validate posts
\ No newline at end of file
+USE_REDDIT_CACHE = True  # Keep raw Reddit responses in data/reddit_cache.sqlite3
+REDDIT_CACHE_MAX_AGE_DAYS = 3  # Refetch search results/posts older than this
+VALIDATE_WITH_GEMINI = True  # Use Gemini to validate posts
+PREFILTER_MIN_SCORE = 0.2  # Local content score (0-1) below which a post is dropped before Gemini
+PREFILTER_AUTO_ACCEPT_SCORE = 0.6  # Score at/above which a post skips Gemini validation (> 1 disables)
+VALIDATION_BATCH_TOKEN_BUDGET = 6000  # Prompt tokens per batched validation call
+VALIDATION_MAX_BATCH = 20  # Max posts per batched validation call
+VALIDATION_POST_TOKENS = 160  # Body + comment tokens per post in a validation prompt
+EXTRACTION_POST_TOKENS = 3000  # Body + comment tokens per extraction prompt (packed by upvotes per token)
+MAX_COMMENT_TOKENS = 150  # Longer comments are trimmed to this in extraction prompts
+BATCH_EXTRACTION = False  # Extract several posts per Gemini call (not in --pipelined, whose extract stage is per post)
+EXTRACTION_BATCH_TOKEN_BUDGET = 12000  # Prompt tokens per batched extraction call
+EXTRACTION_MAX_BATCH = 8  # Max posts per batched extraction call
+FUZZY_DEDUP = True  # Merge near-duplicate place names ("ONIBUS" / "Onibus Coffee Nakameguro"), see entity_resolution.py
+DELTA_MIN_NEW_COMMENTS = 10  # --delta: re-process a known thread once it gains this many comments
+OUTPUT_FORMAT = "json"  # "json" (one list per file), "jsonl" (streamed, one place per line) or "both"
+OUTPUT_COMPRESSION = None  # JSONL only: None, "gzip" or "zstd" (needs the zstandard package)
+CHECKPOINT_HARVEST = True  # Journal progress to data/harvest_journal.jsonl (needed for --resume)
+USE_RESULT_CACHE = True  # Reuse cached Gemini validation/extraction results (data/gemini_cache.sqlite3)
+EXTRACTION_MODE = "text"  # "text" (pipe-delimited lines) or "json" (Gemini JSON mode + schema)
+
+# Concurrent harvest (python harvester.py --concurrent)
+CONCURRENT_HARVEST = False  # Parallel cities/queries instead of one at a time
+CITY_WORKERS = 3  # Cities harvested at once
+QUERY_WORKERS = 4  # Queries per city scraped at once
+EXTRACTION_WORKERS = 4  # Posts per city extracted at once
+REDDIT_REQUESTS_PER_MINUTE = 30  # Shared across all workers (replaces DELAY_BETWEEN_REQUESTS)
+REDDIT_BURST = 2
+GEMINI_REQUESTS_PER_MINUTE = 120  # Shared by validation + extraction
+GEMINI_BURST = 5
+
+# Gemini retries (every mode): rate limits and outages back off, then pause the harvest
+GEMINI_MAX_ATTEMPTS = 5  # Tries per call, including the first
+GEMINI_BACKOFF_BASE = 2.0  # Seconds; doubles per retry with full jitter, never below the server's retry-after
+GEMINI_BACKOFF_MAX = 60.0
+GEMINI_BREAKER_THRESHOLD = 5  # Consecutive failed calls that open the circuit (all workers pause)
+GEMINI_BREAKER_COOLDOWN = 30.0  # Seconds paused before a probe call; doubles while Gemini stays down
+
+# Pipelined harvest (python harvester.py --pipelined)
+PIPELINED_HARVEST = False  # Scrape, validate and extract at the same time
+VALIDATION_WORKERS = 4  # Concurrent Gemini validation calls per city
+PIPELINE_QUEUE_SIZE = 20  # Max posts waiting between two stages (backpressure)
+VALIDATION_BATCH_WAIT = 0.5  # Seconds the validate stage waits to fill a batch (up to VALIDATION_MAX_BATCH)
@@ -0,0 +1,259 @@
+"""Fuzzy place deduplication: "Onibus Coffee", "ONIBUS" and "Onibus Coffee Nakameguro" → one place.
+
+Exact `name_city` keys miss casing, accents, generic words ("Coffee", "Bar")
+and branch suffixes. The resolver compares normalized names instead, but
+only against places that share a blocking key (same city + a distinctive
+token or name prefix/suffix), so the cost stays near-linear in the number
+of places instead of comparing every pair.
+
+Usage:
+    python entity_resolution.py              # dedupe data/cities/* in place (across files)
+    python entity_resolution.py --dry-run    # list the merges without writing
+    python entity_resolution.py --no-backup  # skip copying the files to data/backups/ first
+"""
+import re
+import sys
+import time
+import shutil
+import unicodedata
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+# Words that describe what a place is rather than which place it is
+GENERIC_WORDS = {
+    'cafe', 'coffee', 'restaurant', 'bar', 'bistro', 'shop', 'hotel', 'hostel',
+    'museum', 'market', 'pub', 'kitchen', 'eatery', 'roasters', 'roastery',
+    'club', 'rooftop', 'lounge', 'bakery', 'brewery', 'gallery', 'spa',
+    # ...and the same in the languages harvested names come in ("Mercado de San Miguel")
+    'mercado', 'mercato', 'marche', 'markt', 'caffe', 'trattoria', 'osteria', 'taberna',
+    'taverna', 'cantina', 'brasserie', 'boulangerie', 'panaderia', 'izakaya',
+}
+STOP_WORDS = {'the', 'a', 'an', 'and', 'of', 'at', 'de', 'du', 'des', 'la', 'le', 'les', 'el', 'il', 'da', 'di'}
+
+
+def normalize_name(name: str) -> List[str]:
+    """Lowercase, strip accents and punctuation, split into tokens."""
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace('&', ' and ').replace("'", '')
+    return re.findall(r'[a-z0-9]+', text)
+
+
+def core_tokens(tokens: List[str], city_tokens: Iterable[str] = ()) -> List[str]:
+    """Tokens that identify the place, minus generic words and the city's own name.
+
+    Names made only of generic words ("The Coffee Bar") keep those words.
+    """
+    words = [t for t in tokens if t not in STOP_WORDS] or tokens
+    core = [t for t in words if t not in GENERIC_WORDS and t not in city_tokens]
+    return core or words
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"##{text}#"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _location_key(value: Optional[str]) -> str:
+    return ' '.join(normalize_name(value or ''))
+
+
+class _Entity:
+    __slots__ = ('place', 'core', 'distinctive', 'compact', 'trigrams', 'city', 'country', 'category')
+
+    def __init__(self, place: Dict):
+        self.place = place
+        self.city = _location_key(place.get('city'))
+        self.core = core_tokens(normalize_name(place.get('name', '')), self.city.split())
+        # Letters that name this place rather than its kind ("Mercado" alone has none)
+        self.distinctive = sum(len(t) for t in self.core if t not in GENERIC_WORDS)
+        self.compact = ''.join(self.core)
+        self.trigrams = _trigrams(self.compact)
+        self.country = _location_key(place.get('country'))
+        self.category = place.get('category')
+
+    def block_keys(self) -> List[Tuple[str, str, str]]:
+        keys = {('t', t) for t in self.core if len(t) >= 3}
+        if len(self.compact) >= 3:
+            keys.add(('p', self.compact[:3]))
+            keys.add(('s', self.compact[-3:]))
+        return [(self.city, kind, value) for kind, value in keys]
+
+
+class EntityResolver:
+    """Incrementally clusters places; each new place joins its best match or starts an entity.
+
+    Args:
+        merge: `merge(existing, new)` folds a duplicate into the kept record
+            (PlaceExtractor._merge_into, so mention counts/sources/vibes combine
+            exactly like exact-key merges)
+        threshold: Minimum trigram Jaccard similarity of the core names
+        max_block_size: Blocking keys shared by more places than this are too
+            common to be useful ("thai" in Bangkok) and stop collecting candidates
+        min_prefix_chars: A name only absorbs longer names that start with it
+            ("Onibus" / "Onibus Nakameguro") when it has this many non-generic
+            letters, so "Mercado" doesn't swallow "Mercado de San Miguel"
+    """
+
+    def __init__(
+        self,
+        merge: Callable[[Dict, Dict], None],
+        threshold: float = 0.65,
+        max_block_size: int = 50,
+        min_prefix_chars: int = 4
+    ):
+        self.merge = merge
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.min_prefix_chars = min_prefix_chars
+        self.entities: List[_Entity] = []
+        self.merged = 0
+        self.merges: List[Tuple[str, str]] = []  # (kept name, merged name)
+        self.comparisons = 0
+        self._blocks: Dict[Tuple[str, str, str], List[int]] = {}
+
+    def similarity(self, a: _Entity, b: _Entity) -> float:
+        if a.city != b.city:
+            return 0.0
+        if a.country and b.country and a.country != b.country:
+            return 0.0
+        if a.compact == b.compact:
+            return 1.0
+        # Fuzzy matches must also agree on what kind of place it is
+        if a.category and b.category and a.category != b.category:
+            return 0.0
+        # Branch/location suffix: "onibus" vs "onibus nakameguro"
+        shorter, longer = sorted((a, b), key=lambda e: len(e.core))
+        if longer.core[:len(shorter.core)] == shorter.core and shorter.distinctive >= self.min_prefix_chars:
+            return 1.0
+        union = len(a.trigrams | b.trigrams)
+        return len(a.trigrams & b.trigrams) / union if union else 0.0
+
+    def _best_match(self, entity: _Entity) -> Optional[int]:
+        candidates: Set[int] = set()
+        for key in entity.block_keys():
+            block = self._blocks.get(key)
+            if block and len(block) <= self.max_block_size:
+                candidates.update(block)
+
+        best, best_score = None, 0.0
+        for i in sorted(candidates):
+            self.comparisons += 1
+            score = self.similarity(entity, self.entities[i])
+            if score >= self.threshold and score > best_score:
+                best, best_score = i, score
+        return best
+
+    def add(self, place: Dict) -> Dict:
+        """Merge `place` into a matching entity (returned) or register it as a new one."""
+        entity = _Entity(place)
+        match = self._best_match(entity)
+
+        if match is not None:
+            kept = self.entities[match].place
+            if place['name'].lower().strip() != kept['name'].lower().strip():
+                aliases = kept.setdefault('aliases', [])
+                if place['name'] not in aliases:
+                    aliases.append(place['name'])
+            self.merges.append((kept['name'], place['name']))
+            self.merge(kept, place)
+            self.merged += 1
+            return kept
+
+        index = len(self.entities)
+        self.entities.append(entity)
+        for key in entity.block_keys():
+            self._blocks.setdefault(key, []).append(index)
+        return place
+
+    def places(self) -> List[Dict]:
+        return [e.place for e in self.entities]
+
+
+def resolve_places(
+    places: Iterable[Dict],
+    merge: Callable[[Dict, Dict], None],
+    **options
+) -> List[Dict]:
+    """Deduplicate a list of places. Order of first appearance is preserved."""
+    resolver = EntityResolver(merge, **options)
+    for place in places:
+        resolver.add(place)
+    return resolver.places()
+
+
+def resolve_city_files(
+    cities_dir: Path,
+    dry_run: bool = False,
+    backup_dir: Optional[Path] = None
+) -> Dict[str, int]:
+    """Dedupe across every per-city file, rewriting each file in its existing format(s).
+
+    The combined `all_places` file(s) next to `cities_dir` are regenerated
+    from the result too, since the indexer reads them first. Everything
+    rewritten is copied to `backup_dir` beforehand, when given. A dry run
+    prints every merge it would make and writes nothing.
+    """
+    from place_extractor import PlaceExtractor
+    from place_store import iter_places, places_files, write_places_file
+
+    stems = sorted({cities_dir / p.name.split('.')[0] for p in cities_dir.glob("*.json*")})
+    # Read from the preferred file of each city; write back to every format it has
+    outputs = {stem: places_files(stem) for stem in stems}
+    files = [outputs[stem][0] for stem in stems]
+    city_files = {stem.name: path for stem, path in zip(stems, files)}
+    combined_files = places_files(cities_dir.parent / "all_places")
+    resolver = EntityResolver(PlaceExtractor._merge_into)
+    owner: Dict[int, Path] = {}
+    before = 0
+
+    for path in files:
+        for place in iter_places(path):
+            before += 1
+            kept = resolver.add(place)
+            if id(kept) not in owner:
+                # The place's own city file if there is one, else where it was found
+                home = (kept.get('city') or '').lower().replace(' ', '_')
+                owner[id(kept)] = city_files.get(home, path)
+
+    if dry_run:
+        for kept, merged in resolver.merges:
+            print(f"   would merge '{merged}' → '{kept}'")
+    else:
+        rewritten = [path for stem in stems for path in outputs[stem]] + combined_files
+        if backup_dir is not None:
+            backup_dir.mkdir(parents=True, exist_ok=True)
+            for path in rewritten:
+                shutil.copy2(path, backup_dir / path.name)
+            print(f"💾 Backed up {len(rewritten)} files to {backup_dir}")
+        by_file: Dict[Path, List[Dict]] = {path: [] for path in files}
+        for place in resolver.places():
+            by_file[owner[id(place)]].append(place)
+        # Rewritten in whatever format(s) each file already has
+        for stem, path in zip(stems, files):
+            for output in outputs[stem]:
+                write_places_file(output, by_file[path])
+        for path in combined_files:
+            write_places_file(path, (place for city_places in by_file.values() for place in city_places))
+            print(f"💾 Regenerated {path.name} from the deduplicated city files")
+
+    return {'files': len(files), 'before': before, 'after': len(resolver.entities), 'merged': resolver.merged}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fuzzy-deduplicate harvested places across city files")
+    parser.add_argument("--cities-dir", type=Path, default=Path(__file__).parent / "data" / "cities")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the places that would merge")
+    parser.add_argument("--no-backup", action="store_true", help="Don't copy the files aside before rewriting")
+    args = parser.parse_args()
+
+    backup_dir = None
+    if not args.no_backup:
+        backup_dir = args.cities_dir.parent / "backups" / f"cities-{time.strftime('%Y%m%d-%H%M%S')}"
+    counts = resolve_city_files(args.cities_dir, args.dry_run, backup_dir)
+    print(f"🔗 {counts['before']} places in {counts['files']} files → {counts['after']} "
+          f"({counts['merged']} merged)" + (" [dry run]" if args.dry_run else ""))
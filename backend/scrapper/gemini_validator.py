@@ -1,9 +1,20 @@
 """Gemini-based validation for Reddit posts."""
 import os
-from typing import Dict
+import re
+import sys
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from google import genai
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rate_limiter import TokenBucket
+from result_cache import ResultCache
+from prompt_packer import TokenLedger, count_tokens, pack_post
+from gemini_resilience import PERMANENT, ResilientCaller, classify_error
+
 load_dotenv()
 
 API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
@@ -12,61 +23,239 @@ API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 class GeminiValidator:
     """Fast validation using Gemini Flash."""
     
-    def __init__(self, model: str = "gemini-2.5-flash"):
+    # Bump when the prompt changes so cached verdicts aren't reused
+    PROMPT_VERSION = "v2"
+    
+    # Enough of each comment to spot a place name
+    MAX_COMMENT_TOKENS = 60
+    
+    _VERDICT_RE = re.compile(r'"?\b(P\d+)\b"?\s*[:=\-]\s*"?(yes|no)\b', re.IGNORECASE)
+    
+    def __init__(
+        self,
+        model: str = "gemini-2.5-flash",
+        rate_limiter: Optional[TokenBucket] = None,
+        cache: Optional[ResultCache] = None,
+        post_tokens: int = 160,
+        usage: Optional[TokenLedger] = None,
+        caller: Optional[ResilientCaller] = None
+    ):
         self.client = genai.Client(api_key=API_KEY)
         self.model = model
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.post_tokens = post_tokens  # Budget for body + comments of each post
+        self.usage = usage
+        # Retries/backoff; the harvester passes one shared with the extractor (same breaker)
+        self.caller = caller or ResilientCaller('gemini')
+    
+    def _cache_key(self, post_data: Dict) -> str:
+        return ResultCache.make_key('validate', self.model, self.PROMPT_VERSION, post_data)
+    
+    def _cached(self, post_data: Dict) -> Optional[Dict]:
+        return self.cache.get(self._cache_key(post_data)) if self.cache else None
+    
+    def _store(self, post_data: Dict, result: Dict):
+        if self.cache:
+            self.cache.set(self._cache_key(post_data), result)
+    
+    def _generate(self, prompt: str):
+        """One attempt; every retry waits for the rate limiter again."""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        return self.client.models.generate_content(
+            model=self.model,
+            contents=prompt
+        )
+    
+    @staticmethod
+    def _failed(error: Exception) -> Dict:
+        """Verdict for a post Gemini couldn't judge: not cached, and not worth paying to extract."""
+        return {
+            'has_recommendations': False,
+            'raw_response': str(error),
+            'error': classify_error(error)
+        }
     
     def validate_post(self, post_data: Dict) -> Dict:
-        """Quick check if post contains specific place recommendations."""
+        """Quick check if post contains specific place recommendations.
+        
+        If Gemini still fails after retries the result carries an 'error'
+        kind and counts as no recommendations.
+        """
+        
+        cached = self._cached(post_data)
+        if cached is not None:
+            return cached
         
         prompt = self._build_prompt(post_data)
         
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
+            response = self.caller.call(self._generate, prompt)
+            if self.usage:
+                self.usage.record('validate', self.model, prompt, response)
             
             result = response.text.strip().lower()
             has_recs = "yes" in result and "no" not in result.split("yes")[0]
             
-            return {
+            result = {
                 'has_recommendations': has_recs,
                 'raw_response': response.text.strip()
             }
+            self._store(post_data, result)
+            return result
             
         except Exception as e:
-            print(f"   ⚠️ Validation error: {e}")
-            return {
-                'has_recommendations': True,  # Default to true on error
-                'raw_response': str(e)
-            }
+            print(f"   ⚠️ Validation failed ({classify_error(e)}): {e}")
+            return self._failed(e)
     
-    def _build_prompt(self, post_data: Dict) -> str:
-        """Build concise validation prompt."""
+    def validate_posts(
+        self,
+        posts: List[Dict],
+        token_budget: int = 6000,
+        max_batch_size: int = 20
+    ) -> List[Dict]:
+        """Validate many posts with one Gemini call per batch.
         
-        title = post_data.get('title', '')
-        body = (post_data.get('body') or '')[:500]
+        Posts are packed into batches that fit `token_budget`, each tagged with
+        a stable ID (P1, P2, ...). Any post whose verdict is missing from the
+        batch response, or a batch rejected as malformed, falls back to
+        `validate_post`. A batch that fails on rate limits or outages after
+        retries is not re-sent post by post; its posts get error results.
+        Cached verdicts are reused and never sent again. Results are returned
+        in input order.
+        """
+        results: List[Optional[Dict]] = [self._cached(post) for post in posts]
+        pending = [i for i, r in enumerate(results) if r is None]
         
-        comments = post_data.get('comments', [])
-        top_comments = sorted(
-            comments,
-            key=lambda c: c.get('upvotes', 0),
-            reverse=True
-        )[:5]
+        for batch in self._make_batches([posts[i] for i in pending], token_budget, max_batch_size):
+            batch = [pending[j] for j in batch]
+            if len(batch) == 1:
+                i = batch[0]
+                results[i] = self.validate_post(posts[i])
+                continue
+            
+            try:
+                verdicts = self._validate_batch([posts[i] for i in batch])
+            except Exception as e:
+                print(f"   ⚠️ Batch validation failed ({classify_error(e)}): {e}")
+                for i in batch:
+                    results[i] = self._failed(e)
+                continue
+            
+            for local_id, i in enumerate(batch, 1):
+                verdict = verdicts.get(f"P{local_id}")
+                if verdict is None:
+                    results[i] = self.validate_post(posts[i])
+                else:
+                    results[i] = {
+                        'has_recommendations': verdict,
+                        'raw_response': 'yes' if verdict else 'no',
+                        'batched': True
+                    }
+                    self._store(posts[i], results[i])
         
-        comments_text = '\n'.join([
-            f"- {c.get('body', '')[:200]}"
-            for c in top_comments
-        ])
+        return results
+    
+    def _make_batches(self, posts: List[Dict], token_budget: int, max_batch_size: int) -> List[List[int]]:
+        """Greedily pack post indices into batches under the token budget."""
+        overhead = count_tokens(self._batch_instructions())
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = overhead
         
-        return f"""Does this Reddit post contain specific named place recommendations (cafes, restaurants, bars, shops, attractions)?
+        for i, post in enumerate(posts):
+            cost = count_tokens(self._post_section(post)) + 10
+            if current and (used + cost > token_budget or len(current) >= max_batch_size):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(i)
+            used += cost
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _validate_batch(self, posts: List[Dict]) -> Dict[str, bool]:
+        """One call for a batch. Returns {post_id: verdict} for the IDs it could parse.
+        
+        Raises if the call failed on anything but a permanent error, which
+        instead returns {} so every post is retried on its own.
+        """
+        sections = '\n\n'.join(
+            f"=== POST P{i} ===\n{self._post_section(post)}"
+            for i, post in enumerate(posts, 1)
+        )
+        prompt = f"{self._batch_instructions()}\n\n{sections}"
+        
+        try:
+            response = self.caller.call(self._generate, prompt)
+            if self.usage:
+                self.usage.record('validate-batch', self.model, prompt, response)
+            raw = (response.text or '').strip()
+        except Exception as e:
+            if classify_error(e) != PERMANENT:
+                raise
+            print(f"   ⚠️ Batch validation error, falling back to per-post: {e}")
+            return {}
+        
+        verdicts = self._parse_batch_response(raw, len(posts))
+        if len(verdicts) < len(posts):
+            print(f"   ⚠️ Batch response covered {len(verdicts)}/{len(posts)} posts, retrying the rest singly")
+        return verdicts
+    
+    def _parse_batch_response(self, raw: str, expected: int) -> Dict[str, bool]:
+        """Read verdicts from JSON if possible, else from `P1: yes` style lines."""
+        verdicts: Dict[str, bool] = {}
+        valid_ids = {f"P{i}" for i in range(1, expected + 1)}
+        
+        # Strip ```json fences the model sometimes adds
+        text = re.sub(r'^```(?:json)?\s*|\s*```$', '', raw.strip())
+        try:
+            data = json.loads(text)
+            if isinstance(data, dict):
+                for key, value in data.items():
+                    key = str(key).strip().upper()
+                    answer = str(value).strip().lower()
+                    if key in valid_ids and answer in ('yes', 'no', 'true', 'false'):
+                        verdicts[key] = answer in ('yes', 'true')
+                return verdicts
+        except ValueError:
+            pass
+        
+        for post_id, answer in self._VERDICT_RE.findall(raw):
+            post_id = post_id.upper()
+            if post_id in valid_ids and post_id not in verdicts:
+                verdicts[post_id] = answer.lower() == 'yes'
+        return verdicts
+    
+    def _batch_instructions(self) -> str:
+        return """For EACH Reddit post below, does it contain specific named place recommendations (cafes, restaurants, bars, shops, attractions)?
+
+Be strict: Only "yes" if actual named places are mentioned (not just "a cafe" or "some restaurant").
 
-Post Title: {title}
+Answer ONLY with a JSON object mapping every post ID to "yes" or "no", e.g. {"P1": "yes", "P2": "no"}"""
+    
+    def _post_section(self, post_data: Dict) -> str:
+        """Title, trimmed body and top comments for one post."""
+        
+        title = post_data.get('title', '')
+        body, comments = pack_post(post_data, self.post_tokens, max_comment_tokens=self.MAX_COMMENT_TOKENS)
+        
+        comments_text = '\n'.join(f"- {c}" for c in comments)
+        
+        return f"""Post Title: {title}
 Post Body: {body}
 
 Top Comments:
-{comments_text}
+{comments_text}"""
+    
+    def _build_prompt(self, post_data: Dict) -> str:
+        """Build concise validation prompt."""
+        
+        return f"""Does this Reddit post contain specific named place recommendations (cafes, restaurants, bars, shops, attractions)?
+
+{self._post_section(post_data)}
 
 Answer ONLY: Yes or No
-Be strict: Only "Yes" if actual named places are mentioned (not just "a cafe" or "some restaurant")."""
\ No newline at end of file
+Be strict: Only "Yes" if actual named places are mentioned (not just "a cafe" or "some restaurant")."""
@@ -1,27 +1,146 @@
 """Main harvester: Reddit → Validate → Extract places."""
 import sys
-import json
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict, Set, Tuple
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from reddit_scraper import RedditScraper
 from gemini_validator import GeminiValidator
 from place_extractor import PlaceExtractor
-from config import TARGET_CITIES, QUERY_PATTERNS, POSTS_PER_QUERY, DELAY_BETWEEN_REQUESTS, VALIDATE_WITH_GEMINI
+from rate_limiter import TokenBucket
+from pipeline import Pipeline, Stage, StageStats, TurnOrder
+from result_cache import ResultCache
+from reddit_cache import RedditCache
+from checkpoint import CheckpointJournal, atomic_write_json
+from thread_registry import ThreadRegistry
+from entity_resolution import EntityResolver
+from prompt_packer import TokenLedger
+from place_store import PlaceWriter, check_output_format, find_places_file, iter_places, jsonl_path, save_places
+from gemini_resilience import CircuitBreaker, ResilientCaller, classify_error
+from config import (
+    TARGET_CITIES, QUERY_PATTERNS, POSTS_PER_QUERY, DELAY_BETWEEN_REQUESTS, VALIDATE_WITH_GEMINI,
+    CONCURRENT_HARVEST, CITY_WORKERS, QUERY_WORKERS, EXTRACTION_WORKERS,
+    REDDIT_REQUESTS_PER_MINUTE, REDDIT_BURST, GEMINI_REQUESTS_PER_MINUTE, GEMINI_BURST,
+    PIPELINED_HARVEST, VALIDATION_WORKERS, PIPELINE_QUEUE_SIZE, VALIDATION_BATCH_WAIT,
+    VALIDATION_BATCH_TOKEN_BUDGET, VALIDATION_MAX_BATCH, EXTRACTION_MODE, USE_RESULT_CACHE,
+    USE_REDDIT_CACHE, REDDIT_CACHE_MAX_AGE_DAYS, CHECKPOINT_HARVEST, DELTA_MIN_NEW_COMMENTS,
+    OUTPUT_FORMAT, OUTPUT_COMPRESSION, FUZZY_DEDUP,
+    PREFILTER_MIN_SCORE, PREFILTER_AUTO_ACCEPT_SCORE,
+    VALIDATION_POST_TOKENS, EXTRACTION_POST_TOKENS, MAX_COMMENT_TOKENS,
+    BATCH_EXTRACTION, EXTRACTION_BATCH_TOKEN_BUDGET, EXTRACTION_MAX_BATCH,
+    GEMINI_MAX_ATTEMPTS, GEMINI_BACKOFF_BASE, GEMINI_BACKOFF_MAX,
+    GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN,
+)
+
+RESULT_CACHE_FILE = Path(__file__).parent / "data" / "gemini_cache.sqlite3"
+REDDIT_CACHE_FILE = Path(__file__).parent / "data" / "reddit_cache.sqlite3"
+JOURNAL_FILE = Path(__file__).parent / "data" / "harvest_journal.jsonl"
+THREAD_REGISTRY_FILE = Path(__file__).parent / "data" / "thread_registry.json"
+TOKEN_USAGE_FILE = Path(__file__).parent / "data" / "token_usage.jsonl"
 
 
 class Harvester:
     """Orchestrates the full Reddit harvesting pipeline."""
     
-    def __init__(self):
-        self.scraper = RedditScraper()
-        self.validator = GeminiValidator()
-        self.extractor = PlaceExtractor()
+    def __init__(
+        self,
+        concurrent: bool = CONCURRENT_HARVEST,
+        pipelined: bool = PIPELINED_HARVEST,
+        extraction_mode: str = EXTRACTION_MODE,
+        use_cache: bool = USE_RESULT_CACHE,
+        refresh_cache: bool = False,
+        use_reddit_cache: bool = USE_REDDIT_CACHE,
+        checkpoint: bool = CHECKPOINT_HARVEST,
+        resume: bool = False,
+        delta: bool = False,
+        batch_extraction: bool = BATCH_EXTRACTION
+    ):
+        # A bad value would otherwise only fail when saving, after the whole harvest's API spend
+        check_output_format(OUTPUT_FORMAT, OUTPUT_COMPRESSION)
+        
+        self.concurrent = concurrent
+        self.pipelined = pipelined
+        self.delta = delta
+        self.batch_extraction = batch_extraction
+        self.stage_stats: Dict[str, StageStats] = {}
+        self._stats_lock = threading.Lock()
+        
+        # Run-wide registry of threads already taken for processing
+        self._seen_posts: Dict[str, Dict] = {}
+        self._seen_lock = threading.Lock()
+        self.duplicate_posts = 0
+        # Queries claim their posts in (city, query) order even when scraped concurrently,
+        # so a thread found by several queries goes to the same one as in sequential mode
+        self._claim_turns = TurnOrder()
+        
+        # Threads processed by earlier runs; delta mode skips the unchanged ones
+        self.registry = ThreadRegistry(THREAD_REGISTRY_FILE, min_new_comments=DELTA_MIN_NEW_COMMENTS)
+        self.delta_stats = {'new': 0, 'grown': 0, 'unchanged': 0}
+        self.fuzzy_merges = 0
+        self.prefilter_stats = {'rejected': 0, 'auto_accepted': 0, 'sent_to_gemini': 0}
+        # Posts Gemini failed on after retries; left out of the journal and the thread
+        # registry so --resume and later --delta runs retry them
+        self.gemini_failures = {'validate': 0, 'extract': 0}
+        self._failed_posts: Set[str] = set()
+        
+        # In concurrent/pipelined mode every worker shares one bucket per API
+        reddit_limiter = gemini_limiter = None
+        if concurrent or pipelined:
+            reddit_limiter = TokenBucket.per_minute(REDDIT_REQUESTS_PER_MINUTE, REDDIT_BURST)
+            gemini_limiter = TokenBucket.per_minute(GEMINI_REQUESTS_PER_MINUTE, GEMINI_BURST)
+        
         self.output_dir = Path(__file__).parent / "data"
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Shared by validator + extractor; keyed by model, prompt version and post content
+        self.cache = ResultCache(
+            RESULT_CACHE_FILE,
+            enabled=use_cache,
+            refresh=refresh_cache
+        )
+        
+        # Duplicate permalinks are always fetched once per run; the disk store is optional
+        self.reddit_cache = RedditCache(
+            REDDIT_CACHE_FILE if use_reddit_cache else None,
+            max_age_days=REDDIT_CACHE_MAX_AGE_DAYS
+        )
+        
+        # Progress journal; --resume replays it instead of starting over
+        self.journal = CheckpointJournal(JOURNAL_FILE, resume=resume) if checkpoint or resume else None
+        
+        self.scraper = RedditScraper(rate_limiter=reddit_limiter, cache=self.reddit_cache)
+        # Every Gemini call's token counts, appended to data/token_usage.jsonl
+        self.usage = TokenLedger(TOKEN_USAGE_FILE)
+        # One breaker for all Gemini calls: when it opens, every worker pauses instead of burning calls
+        self.gemini = ResilientCaller(
+            'gemini',
+            max_attempts=GEMINI_MAX_ATTEMPTS,
+            base_delay=GEMINI_BACKOFF_BASE,
+            max_delay=GEMINI_BACKOFF_MAX,
+            breaker=CircuitBreaker('gemini', GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN)
+        )
+        
+        self.validator = GeminiValidator(
+            rate_limiter=gemini_limiter,
+            cache=self.cache,
+            post_tokens=VALIDATION_POST_TOKENS,
+            usage=self.usage,
+            caller=self.gemini
+        )
+        self.extractor = PlaceExtractor(
+            rate_limiter=gemini_limiter,
+            mode=extraction_mode,
+            cache=self.cache,
+            post_tokens=EXTRACTION_POST_TOKENS,
+            max_comment_tokens=MAX_COMMENT_TOKENS,
+            usage=self.usage,
+            caller=self.gemini
+        )
     
     def harvest_city(
         self,
@@ -40,44 +159,42 @@ class Harvester:
         print(f"🌆 HARVESTING: {city.upper()}")
         print(f"{'='*70}")
         
+        queries = [pattern.format(city=city) for pattern in query_patterns]
+        claim_keys = [(city, query) for query in queries]
+        self._claim_turns.plan(claim_keys)
+        try:
+            if self.pipelined:
+                return self._harvest_city_pipelined(city, queries, posts_per_query, validate)
+            return self._harvest_city_queries(city, queries, posts_per_query, validate)
+        finally:
+            # Never leave later queries (or cities) waiting on one that failed
+            for key in claim_keys:
+                self._claim_turns.done(key)
+    
+    def _harvest_city_queries(
+        self,
+        city: str,
+        queries: List[str],
+        posts_per_query: int,
+        validate: bool
+    ) -> Dict:
+        """Sequential/concurrent mode: all queries' posts are validated, then extracted together."""
         all_validated_posts = []
+        indexed_queries = list(enumerate(queries, 1))
         
-        # Generate queries for this city
-        queries = [pattern.format(city=city) for pattern in query_patterns]
+        def process(indexed_query):
+            qi, query = indexed_query
+            return self._process_query(city, query, f"[{qi}/{len(queries)}]", posts_per_query, validate)
         
-        for qi, query in enumerate(queries, 1):
-            print(f"\n[{qi}/{len(queries)}] Query: '{query}'")
-            print("-" * 50)
-            
-            # Step 1: Search and scrape
-            posts = self.scraper.search_and_scrape(
-                search_query=query,
-                limit=posts_per_query,
-                delay=DELAY_BETWEEN_REQUESTS
-            )
-            
-            if not posts:
-                print(f"   ⚠️ No posts found")
-                continue
-            
-            # Step 2: Quick content filter
-            promising = [p for p in posts if self.scraper.has_extractable_content(p)]
-            print(f"   📋 {len(promising)}/{len(posts)} passed content filter")
-            
-            if not promising:
-                continue
-            
-            # Step 3: Gemini validation (optional)
-            if validate:
-                validated = []
-                for post in promising:
-                    result = self.validator.validate_post(post)
-                    if result['has_recommendations']:
-                        validated.append(post)
-                print(f"   ✅ {len(validated)}/{len(promising)} validated by Gemini")
-                all_validated_posts.extend(validated)
-            else:
-                all_validated_posts.extend(promising)
+        # Results come back in query order either way, so output is identical
+        if self.concurrent:
+            with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as pool:
+                query_results = list(pool.map(process, indexed_queries))
+        else:
+            query_results = [process(q) for q in indexed_queries]
+        
+        for posts in query_results:
+            all_validated_posts.extend(posts)
         
         # Step 4: Extract places from all validated posts
         places = []
@@ -86,7 +203,13 @@ class Harvester:
             print(f"🎯 EXTRACTING PLACES FROM {len(all_validated_posts)} POSTS")
             print(f"{'='*50}")
             
-            places = self.extractor.extract_from_posts(all_validated_posts)
+            places = self.extractor.extract_from_posts(
+                all_validated_posts,
+                workers=EXTRACTION_WORKERS if self.concurrent else 1,
+                extract_fn=self._extract_post,
+                batch_fn=self._extract_posts if self.batch_extraction else None
+            )
+            places = self._resolve_entities(places)
         
         return {
             'city': city,
@@ -94,6 +217,334 @@ class Harvester:
             'places': places
         }
     
+    def _harvest_city_pipelined(
+        self,
+        city: str,
+        queries: List[str],
+        posts_per_query: int,
+        validate: bool
+    ) -> Dict:
+        """Scrape → filter → validate → extract as concurrent stages.
+        
+        Posts flow through bounded queues, so Gemini works on the first
+        query's posts while later queries are still being scraped. The
+        validate stage takes them in micro-batches for batched validation.
+        Posts carry their (query, position) key and places are merged in that
+        order, giving the same result as `harvest_city` in sequential mode.
+        """
+        def scrape(indexed_query):
+            qi, query = indexed_query
+            _, claimed = self._claim_query_posts(city, query, posts_per_query)
+            for pi, post in claimed:
+                yield (qi, pi), post
+        
+        def content_filter(item):
+            post = item[1]
+            if self.delta and not self._needs_processing(post):
+                return
+            if self._passes_prefilter(post):
+                yield item
+        
+        def validate_stage(items):
+            # Micro-batched, so validate_posts can still pack several posts per Gemini call
+            verdicts = self._validate([post for _, post in items]) if validate else [True] * len(items)
+            for item, ok in zip(items, verdicts):
+                if ok:
+                    yield item
+        
+        def extract(item):
+            key, post = item
+            places = self._extract_post(post)
+            print(f"   🎯 {len(places)} places from: {post.get('title', '')[:60]}")
+            yield key, places
+        
+        stages = [
+            Stage('scrape', scrape, workers=QUERY_WORKERS),
+            Stage('filter', content_filter),
+            Stage('validate', validate_stage, workers=VALIDATION_WORKERS,
+                  batch_size=VALIDATION_MAX_BATCH, batch_wait=VALIDATION_BATCH_WAIT),
+            Stage('extract', extract, workers=EXTRACTION_WORKERS),
+        ]
+        results = Pipeline(stages, queue_size=PIPELINE_QUEUE_SIZE).run(enumerate(queries))
+        
+        places_index: Dict[str, Dict] = {}
+        for _, places in sorted(results, key=lambda r: r[0]):
+            for place in places:
+                self.extractor._merge_place(place, places_index)
+        
+        with self._stats_lock:
+            for stage in stages:
+                self.stage_stats.setdefault(stage.name, StageStats(stage.name)).merge(stage.stats)
+        
+        return {
+            'city': city,
+            'posts_count': len(results),
+            'places': self._resolve_entities(list(places_index.values()))
+        }
+    
+    def _process_query(
+        self,
+        city: str,
+        query: str,
+        label: str,
+        posts_per_query: int,
+        validate: bool
+    ) -> List[Dict]:
+        """Scrape, filter and (optionally) validate the posts for one query."""
+        print(f"\n{label} Query: '{query}'")
+        print("-" * 50)
+        
+        # Step 1: Search and scrape
+        # Step 2: Drop threads an earlier query already found, then quick content filter
+        posts, claimed = self._claim_query_posts(city, query, posts_per_query)
+        new_posts = [p for _, p in claimed]
+        
+        if not posts:
+            print(f"   ⚠️ No posts found")
+            return []
+        
+        if len(new_posts) < len(posts):
+            print(f"   ♻️ {len(posts) - len(new_posts)} already seen by another query")
+        
+        if self.delta:
+            claimed = len(new_posts)
+            new_posts = [p for p in new_posts if self._needs_processing(p)]
+            if len(new_posts) < claimed:
+                print(f"   ⏭️ {claimed - len(new_posts)} unchanged since last harvest")
+        
+        promising = [p for p in new_posts if self._passes_prefilter(p)]
+        print(f"   📋 {len(promising)}/{len(new_posts)} passed content filter")
+        
+        if not promising:
+            return []
+        
+        # Step 3: Gemini validation (optional)
+        if not validate:
+            return promising
+        
+        verdicts = self._validate(promising)
+        validated = [post for post, ok in zip(promising, verdicts) if ok]
+        print(f"   ✅ {len(validated)}/{len(promising)} validated by Gemini")
+        return validated
+    
+    def _scrape_query(self, city: str, query: str, posts_per_query: int) -> Iterator[Dict]:
+        """Posts for a query: replayed from the journal if it finished before, else scraped."""
+        journaled = self.journal.query_posts(city, query) if self.journal else None
+        if journaled is not None:
+            print(f"   ⏩ Resumed '{query}' from checkpoint ({len(journaled)} posts)")
+            yield from journaled
+            return
+        
+        if self.journal:
+            self.journal.record_query_start(city, query)
+        
+        for post in self.scraper.iter_search_and_scrape(
+            search_query=query,
+            limit=posts_per_query,
+            delay=DELAY_BETWEEN_REQUESTS
+        ):
+            if self.journal:
+                self.journal.record_post(city, query, post)
+            yield post
+        
+        if self.journal:
+            self.journal.record_query_done(city, query)
+    
+    def _claim_query_posts(
+        self,
+        city: str,
+        query: str,
+        posts_per_query: int
+    ) -> Tuple[List[Dict], List[Tuple[int, Dict]]]:
+        """(scraped posts, (position, post) for those no earlier query claimed).
+        
+        Scrapes the whole query, then waits for every earlier (city, query) to
+        claim its posts first, so duplicates are assigned as in sequential
+        mode whatever order concurrent scrapes finish in.
+        """
+        key = (city, query)
+        try:
+            posts = list(self._scrape_query(city, query, posts_per_query))
+            self._claim_turns.wait(key)
+            return posts, [(pi, post) for pi, post in enumerate(posts) if self._claim_post(post)]
+        finally:
+            self._claim_turns.done(key)
+    
+    def _passes_prefilter(self, post: Dict) -> bool:
+        """Local content score check; posts below PREFILTER_MIN_SCORE never reach Gemini."""
+        passed = self.scraper.has_extractable_content(post, PREFILTER_MIN_SCORE)
+        if not passed:
+            with self._stats_lock:
+                self.prefilter_stats['rejected'] += 1
+        return passed
+    
+    def _validate(self, posts: List[Dict]) -> List[bool]:
+        """Validation verdicts for posts that passed the pre-filter.
+        
+        High-scoring posts are accepted without Gemini, journaled verdicts are
+        reused, and the rest are batched to the validator.
+        """
+        verdicts = []
+        auto_accepted = 0
+        for post in posts:
+            if self.scraper.content_score(post) >= PREFILTER_AUTO_ACCEPT_SCORE:
+                verdicts.append(True)
+                auto_accepted += 1
+            else:
+                verdicts.append(self.journal.verdict(self._post_key(post)) if self.journal else None)
+        pending = [i for i, v in enumerate(verdicts) if v is None]
+        
+        with self._stats_lock:
+            self.prefilter_stats['auto_accepted'] += auto_accepted
+            self.prefilter_stats['sent_to_gemini'] += len(pending)
+        
+        if pending:
+            results = self.validator.validate_posts(
+                [posts[i] for i in pending],
+                token_budget=VALIDATION_BATCH_TOKEN_BUDGET,
+                max_batch_size=VALIDATION_MAX_BATCH
+            )
+            for i, result in zip(pending, results):
+                verdicts[i] = result['has_recommendations']
+                if 'error' in result:
+                    self._count_failure('validate', posts[i])
+                elif self.journal:
+                    self.journal.record_verdict(self._post_key(posts[i]), verdicts[i])
+        
+        return verdicts
+    
+    def _extract_post(self, post: Dict) -> List[Dict]:
+        """Places for one post, from the journal if it was extracted before."""
+        key = self._post_key(post)
+        places = self.journal.extracted(key) if self.journal else None
+        if places is None:
+            try:
+                places = self.extractor.extract_from_post(post, strict=True)
+            except Exception as e:
+                print(f"      ⚠️ Extraction failed ({classify_error(e)}): {e}")
+                self._count_failure('extract', post)
+                return []
+            if self.journal:
+                self.journal.record_extracted(key, places)
+        return places
+    
+    def _extract_posts(self, posts: List[Dict]) -> List[List[Dict]]:
+        """Places per post; everything not in the journal is extracted in batched calls."""
+        results = [self.journal.extracted(self._post_key(p)) if self.journal else None for p in posts]
+        pending = [i for i, places in enumerate(results) if places is None]
+        
+        if pending:
+            extracted = self.extractor.extract_batched(
+                [posts[i] for i in pending],
+                token_budget=EXTRACTION_BATCH_TOKEN_BUDGET,
+                max_batch_size=EXTRACTION_MAX_BATCH,
+                workers=EXTRACTION_WORKERS if self.concurrent else 1,
+                strict=True
+            )
+            for i, places in zip(pending, extracted):
+                if places is None:
+                    self._count_failure('extract', posts[i])
+                    results[i] = []
+                    continue
+                results[i] = places
+                if self.journal:
+                    self.journal.record_extracted(self._post_key(posts[i]), places)
+        return results
+    
+    def _count_failure(self, kind: str, post: Dict):
+        with self._stats_lock:
+            self.gemini_failures[kind] += 1
+            self._failed_posts.add(self._post_key(post))
+    
+    @staticmethod
+    def _post_key(post: Dict) -> str:
+        """Reddit post ID from the permalink (/r/<sub>/comments/<id>/...), else the permalink."""
+        permalink = (post.get('permalink') or post.get('url') or '').rstrip('/').lower()
+        parts = permalink.split('/')
+        if 'comments' in parts:
+            i = parts.index('comments')
+            if i + 1 < len(parts):
+                return parts[i + 1]
+        return permalink
+    
+    def _claim_post(self, post: Dict) -> bool:
+        """True the first time a thread is seen this run.
+        
+        Later sightings only add their search query to the first copy's
+        `search_queries`, so each thread is validated/extracted once and its
+        places aren't counted again.
+        """
+        key = self._post_key(post)
+        query = post.get('search_query', '')
+        
+        with self._seen_lock:
+            first = self._seen_posts.get(key)
+            if first is None:
+                post['search_queries'] = [query]
+                self._seen_posts[key] = post
+                return True
+            
+            if query not in first['search_queries']:
+                first['search_queries'].append(query)
+            self.duplicate_posts += 1
+            return False
+    
+    def _needs_processing(self, post: Dict) -> bool:
+        """Delta mode: True for threads that are new or gained enough comments."""
+        status = self.registry.status(self._post_key(post), post.get('num_comments', 0))
+        with self._seen_lock:
+            self.delta_stats[status or 'unchanged'] += 1
+        return status is not None
+    
+    def record_processed(self):
+        """Remember every thread this run processed so later delta runs can skip them.
+        
+        Call once the results are saved, so a crashed run doesn't mark threads
+        whose places never made it to disk. Threads whose validation or
+        extraction failed are left out, so the next delta run retries them.
+        """
+        with self._seen_lock:
+            posts = list(self._seen_posts.items())
+        with self._stats_lock:
+            failed = set(self._failed_posts)
+        for key, post in posts:
+            if key in failed:
+                continue
+            if not self.delta or self.registry.status(key, post.get('num_comments', 0)) is not None:
+                self.registry.mark(key, post)
+        self.registry.save()
+    
+    def merge_with_saved(self, stem: Path, places: List[Dict]) -> List[Dict]:
+        """Delta mode: fold newly harvested places into a previously saved place list.
+        
+        `stem` is the output path without extension (JSON or JSONL, whichever exists).
+        """
+        saved_file = find_places_file(stem)
+        if saved_file is None:
+            return places
+        
+        places_index: Dict[str, Dict] = {}
+        for place in iter_places(saved_file):
+            self.extractor._merge_place(place, places_index)
+        for place in places:
+            self.extractor._merge_place(place, places_index)
+        return self._resolve_entities(list(places_index.values()))
+    
+    def _resolve_entities(self, places: List[Dict]) -> List[Dict]:
+        """Fold near-duplicate names that exact-key merging missed into one place."""
+        if not FUZZY_DEDUP:
+            return places
+        
+        resolver = EntityResolver(self.extractor._merge_into)
+        for place in places:
+            resolver.add(place)
+        
+        if resolver.merged:
+            print(f"   🔗 Merged {resolver.merged} near-duplicate places")
+            with self._stats_lock:
+                self.fuzzy_merges += resolver.merged
+        return resolver.places()
+    
     def harvest_all_cities(
         self,
         cities: List[str] = TARGET_CITIES,
@@ -117,40 +568,81 @@ class Harvester:
         print(f"Cities: {len(cities)}")
         print(f"Query patterns: {len(QUERY_PATTERNS)}")
         print(f"Total queries: {len(cities) * len(QUERY_PATTERNS)}")
+        mode = 'pipelined' if self.pipelined else 'concurrent' if self.concurrent else 'sequential'
+        print(f"Mode: {mode}" + (f" (delta, {len(self.registry)} known threads)" if self.delta else ""))
         print(f"Started: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         
+        # JSON needs the whole list in memory; JSONL is streamed to disk city by city
+        keep_places = OUTPUT_FORMAT in ('json', 'both')
+        stream_places = OUTPUT_FORMAT in ('jsonl', 'both')
         all_places = []
+        total_places = 0
         city_stats = []
+        combined_stem = self.output_dir / "all_places"
+        writer = PlaceWriter(jsonl_path(combined_stem, OUTPUT_COMPRESSION)) if stream_places else None
         
-        for ci, city in enumerate(cities, 1):
+        def harvest(indexed_city):
+            ci, city = indexed_city
             print(f"\n\n{'#'*70}")
             print(f"CITY {ci}/{len(cities)}: {city}")
             print(f"{'#'*70}")
-            
-            result = self.harvest_city(city)
-            
-            if result['places']:
-                all_places.extend(result['places'])
+            return self.harvest_city(city)
+        
+        # Cities claim threads in list order too, so a thread two cities' queries find
+        # ends up in the same city's file as in a sequential run
+        self._claim_turns.plan((city, pattern.format(city=city)) for city in cities for pattern in QUERY_PATTERNS)
+        
+        indexed_cities = list(enumerate(cities, 1))
+        if self.concurrent:
+            pool = ThreadPoolExecutor(max_workers=CITY_WORKERS)
+            results = pool.map(harvest, indexed_cities)
+        else:
+            pool = None
+            results = map(harvest, indexed_cities)
+        
+        # Cities are consumed in order, saving each as soon as it's done
+        try:
+            for result in results:
+                city = result['city']
+                city_stem = self.output_dir / "cities" / city.lower().replace(' ', '_')
+                new_count = len(result['places'])
+                
+                if self.delta:
+                    result['places'] = self.merge_with_saved(city_stem, result['places'])
                 
-                # Save per-city JSON
-                if save_per_city:
-                    city_file = self.output_dir / "cities" / f"{city.lower().replace(' ', '_')}.json"
-                    city_file.parent.mkdir(parents=True, exist_ok=True)
+                if result['places']:
+                    total_places += len(result['places'])
+                    if keep_places:
+                        all_places.extend(result['places'])
+                    if writer:
+                        writer.write_many(result['places'])
                     
-                    with open(city_file, 'w', encoding='utf-8') as f:
-                        json.dump(result['places'], f, indent=2, ensure_ascii=False)
-                    print(f"\n💾 Saved {len(result['places'])} places to: {city_file}")
-            
-            city_stats.append({
-                'city': city,
-                'posts': result['posts_count'],
-                'places': len(result['places'])
-            })
+                    # Save per-city file(s)
+                    if save_per_city and new_count:
+                        for city_file in save_places(city_stem, result['places'], OUTPUT_FORMAT, OUTPUT_COMPRESSION):
+                            print(f"\n💾 Saved {len(result['places'])} places to: {city_file}")
+                
+                city_stats.append({
+                    'city': city,
+                    'posts': result['posts_count'],
+                    'places': len(result['places'])
+                })
+        except BaseException:
+            if writer:
+                writer.abort()
+            raise
+        finally:
+            if pool:
+                pool.shutdown()
+        
+        if writer:
+            writer.close()
+        
+        self.record_processed()
         
         # Save combined results
-        combined_file = self.output_dir / "all_places.json"
-        with open(combined_file, 'w', encoding='utf-8') as f:
-            json.dump(all_places, f, indent=2, ensure_ascii=False)
+        if keep_places:
+            atomic_write_json(Path(f"{combined_stem}.json"), all_places)
         
         # Save stats
         end_time = datetime.now()
@@ -160,24 +652,42 @@ class Harvester:
             'run_date': start_time.strftime('%Y-%m-%d %H:%M:%S'),
             'duration_minutes': round(duration.total_seconds() / 60, 1),
             'total_cities': len(cities),
-            'total_places': len(all_places),
+            'total_places': total_places,
             'cities': city_stats
         }
+        if self.stage_stats:
+            stats['pipeline'] = [s.to_dict() for s in self.stage_stats.values()]
+        if self.cache.enabled:
+            stats['gemini_cache'] = self.cache.stats()
+        stats['duplicate_posts_skipped'] = self.duplicate_posts
+        stats['fuzzy_merges'] = self.fuzzy_merges
+        stats['prefilter'] = dict(self.prefilter_stats)
+        stats['gemini_tokens'] = {kind: dict(t) for kind, t in self.usage.totals.items()}
+        stats['gemini_calls'] = self.gemini.stats()
+        stats['gemini_failures'] = dict(self.gemini_failures)
+        if self.delta:
+            stats['delta'] = dict(self.delta_stats)
+        stats['reddit_fetches'] = {
+            **self.reddit_cache.stats,
+            'avoided': self.reddit_cache.fetches_avoided()
+        }
         
         stats_file = self.output_dir / "harvest_stats.json"
-        with open(stats_file, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, indent=2)
+        atomic_write_json(stats_file, stats)
         
-        # Print summary
-        self._print_summary(stats, all_places)
+        # Print summary (read back lazily when places weren't kept in memory)
+        self._print_summary(stats, all_places if keep_places else iter_places(writer.path))
         
-        return {
+        result = {
             'stats': stats,
-            'places': all_places
+            'places_file': writer.path if writer else Path(f"{combined_stem}.json")
         }
+        if keep_places:
+            result['places'] = all_places
+        return result
     
-    def _print_summary(self, stats: Dict, places: List[Dict]):
-        """Print harvest summary."""
+    def _print_summary(self, stats: Dict, places: Iterable[Dict]):
+        """Print harvest summary. `places` is consumed in a single pass."""
         
         print(f"\n\n{'#'*70}")
         print(f"🎉 HARVEST COMPLETE")
@@ -189,49 +699,110 @@ class Harvester:
         for city_stat in sorted(stats['cities'], key=lambda x: x['places'], reverse=True):
             print(f"  {city_stat['city']}: {city_stat['places']} places ({city_stat['posts']} posts)")
         
-        if places:
+        if stats.get('duplicate_posts_skipped'):
+            print(f"\n♻️ Skipped {stats['duplicate_posts_skipped']} duplicate threads found by multiple queries")
+        
+        if stats.get('gemini_tokens'):
+            print(f"\n🪙 GEMINI TOKENS:")
+            for kind, t in stats['gemini_tokens'].items():
+                reported = f", {t['prompt_tokens']:,} reported" if t['prompt_tokens'] else ""
+                print(f"  {kind}: {t['calls']} calls, ~{t['estimated_prompt_tokens']:,} prompt tokens"
+                      f"{reported}, {t['output_tokens']:,} output")
+        
+        calls = stats.get('gemini_calls')
+        if calls and (calls['retries'] or calls['gave_up'] or calls['breaker']['trips']):
+            failures = stats['gemini_failures']
+            print(f"\n🩹 GEMINI ERRORS: {calls['rate_limited']} rate-limited, {calls['transient']} transient, "
+                  f"{calls['permanent']} permanent; {calls['retries']} retries, {calls['breaker']['trips']} "
+                  f"circuit trips ({calls['paused_seconds']}s paused)")
+            if failures['validate'] or failures['extract']:
+                print(f"  {failures['validate']} validations and {failures['extract']} extractions failed, "
+                      f"run with --resume to retry them")
+        
+        if stats.get('prefilter'):
+            pf = stats['prefilter']
+            print(f"\n🧮 PRE-FILTER: {pf['rejected']} posts dropped, {pf['auto_accepted']} accepted "
+                  f"without Gemini, {pf['sent_to_gemini']} sent to Gemini validation")
+        
+        if stats.get('fuzzy_merges'):
+            print(f"\n🔗 Merged {stats['fuzzy_merges']} near-duplicate place names")
+        
+        if stats.get('delta'):
+            delta = stats['delta']
+            print(f"\n⏭️ DELTA: {delta['new']} new + {delta['grown']} grown threads processed, "
+                  f"{delta['unchanged']} unchanged skipped")
+        
+        if stats.get('reddit_fetches'):
+            fetches = stats['reddit_fetches']
+            print(f"\n🌐 REDDIT: {fetches['network_fetches']} network fetches, {fetches['avoided']} avoided "
+                  f"({fetches['disk_hits']} from disk, {fetches['run_duplicates']} duplicates this run)")
+        
+        if stats.get('gemini_cache'):
+            cache = stats['gemini_cache']
+            print(f"\n💾 GEMINI CACHE: {cache['hits']} hits, {cache['misses']} misses")
+        
+        if stats.get('pipeline'):
+            print(f"\n⚙️ PIPELINE STAGES:")
+            for st in stats['pipeline']:
+                print(f"  {st['stage']}: {st['processed']} in → {st['emitted']} out | "
+                      f"{st['throughput_per_min']}/min | busy {st['busy_seconds']}s | "
+                      f"queue avg {st['avg_queue_depth']} / max {st['max_queue_depth']}"
+                      + (f" | {st['errors']} errors" if st['errors'] else ""))
+        
+        categories = {}
+        tags = {}
+        multi_count = 0
+        most_mentioned = []
+        for p in places:
+            categories[p['category']] = categories.get(p['category'], 0) + 1
+            for tag in p.get('tags', []):
+                tags[tag] = tags.get(tag, 0) + 1
+            if p.get('mention_count', 1) > 1:
+                multi_count += 1
+                most_mentioned.append((p['mention_count'], p['name'], p['city']))
+                most_mentioned = sorted(most_mentioned, key=lambda x: x[0], reverse=True)[:10]
+        
+        if categories:
             # Category breakdown
-            categories = {}
-            for p in places:
-                categories[p['category']] = categories.get(p['category'], 0) + 1
-            
             print(f"\n📂 BY CATEGORY:")
             for cat, count in sorted(categories.items(), key=lambda x: x[1], reverse=True):
                 print(f"  {cat}: {count}")
             
             # Top tags
-            tags = {}
-            for p in places:
-                for tag in p.get('tags', []):
-                    tags[tag] = tags.get(tag, 0) + 1
-            
             print(f"\n🏷️ TOP TAGS:")
             for tag, count in sorted(tags.items(), key=lambda x: x[1], reverse=True)[:15]:
                 print(f"  {tag}: {count}")
             
             # Multi-mention places
-            multi = [p for p in places if p.get('mention_count', 1) > 1]
-            if multi:
-                print(f"\n🔥 MOST MENTIONED ({len(multi)} places):")
-                for p in sorted(multi, key=lambda x: x['mention_count'], reverse=True)[:10]:
-                    print(f"  {p['name']} ({p['city']}) - {p['mention_count']}x mentions")
+            if most_mentioned:
+                print(f"\n🔥 MOST MENTIONED ({multi_count} places):")
+                for mentions, name, city in most_mentioned:
+                    print(f"  {name} ({city}) - {mentions}x mentions")
 
 
-def harvest_single_city(city: str):
-    """Convenience function to harvest one city."""
-    harvester = Harvester()
+def harvest_single_city(city: str, **options):
+    """Convenience function to harvest one city (options go to Harvester)."""
+    harvester = Harvester(**options)
     result = harvester.harvest_city(city)
+    filename = f"{city.lower().replace(' ', '_')}.json"
+    
+    if harvester.delta and result['places']:
+        result['places'] = harvester.merge_with_saved(
+            harvester.extractor.output_dir / Path(filename).stem, result['places']
+        )
     
     if result['places']:
-        harvester.extractor.save_results(result['places'], f"{city.lower().replace(' ', '_')}.json")
+        harvester.extractor.save_results(result['places'], filename, OUTPUT_FORMAT, OUTPUT_COMPRESSION)
         harvester.extractor.print_summary(result['places'])
     
+    harvester.record_processed()
+    
     return result
 
 
-def harvest_all():
-    """Convenience function to harvest all target cities."""
-    harvester = Harvester()
+def harvest_all(**options):
+    """Convenience function to harvest all target cities (options go to Harvester)."""
+    harvester = Harvester(**options)
     return harvester.harvest_all_cities()
 
 
@@ -242,16 +813,42 @@ if __name__ == "__main__":
     parser.add_argument("--city", type=str, help="Harvest single city (e.g., 'Paris')")
     parser.add_argument("--all", action="store_true", help="Harvest all target cities")
     parser.add_argument("--test", action="store_true", help="Test run with 2 cities, 2 queries each")
+    parser.add_argument("--concurrent", action="store_true", help="Harvest cities/queries in parallel (rate-limited)")
+    parser.add_argument("--pipelined", action="store_true", help="Overlap scraping, validation and extraction")
+    parser.add_argument("--extraction-mode", choices=["text", "json"], default=EXTRACTION_MODE,
+                        help="Place extraction output format")
+    parser.add_argument("--batch-extraction", action="store_true", help="Extract several posts per Gemini call")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read or write the Gemini result cache")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached Gemini results, overwrite with fresh ones")
+    parser.add_argument("--clear-cache", action="store_true", help="Delete all cached Gemini results first")
+    parser.add_argument("--resume", action="store_true", help="Continue the last run from its checkpoint journal")
+    parser.add_argument("--delta", action="store_true", help="Only process threads that are new or gained comments, merge into saved places")
+    parser.add_argument("--fresh-reddit", action="store_true", help="Ignore stored Reddit responses (still dedupes within the run)")
     
     args = parser.parse_args()
+    options = {
+        'concurrent': args.concurrent or CONCURRENT_HARVEST,
+        'pipelined': args.pipelined or PIPELINED_HARVEST,
+        'extraction_mode': args.extraction_mode,
+        'batch_extraction': args.batch_extraction or BATCH_EXTRACTION,
+        'use_cache': USE_RESULT_CACHE and not args.no_cache,
+        'refresh_cache': args.refresh_cache,
+        'use_reddit_cache': USE_REDDIT_CACHE and not args.fresh_reddit,
+        'resume': args.resume,
+        'delta': args.delta,
+    }
+    
+    if args.clear_cache:
+        removed = ResultCache(RESULT_CACHE_FILE).clear()
+        print(f"🧹 Cleared {removed} cached Gemini results")
     
     if args.city:
-        harvest_single_city(args.city)
+        harvest_single_city(args.city, **options)
     elif args.all:
-        harvest_all()
+        harvest_all(**options)
     elif args.test:
         # Quick test run
-        harvester = Harvester()
+        harvester = Harvester(**options)
         harvester.harvest_all_cities(
             cities=["Paris", "Tokyo"],
         )
@@ -260,4 +857,9 @@ if __name__ == "__main__":
         print("Usage:")
         print("  python harvester.py --city Paris     # Single city")
         print("  python harvester.py --all            # All 10 cities")
-        print("  python harvester.py --test           # Test run (2 cities)")
\ No newline at end of file
+        print("  python harvester.py --test           # Test run (2 cities)")
+        print("  python harvester.py --all --concurrent  # Parallel, rate-limited")
+        print("  python harvester.py --all --pipelined   # Overlap scrape/validate/extract")
+        print("  python harvester.py --city Paris --refresh-cache  # Re-run Gemini, update cache")
+        print("  python harvester.py --all --resume   # Continue after a crash / Ctrl-C")
+        print("  python harvester.py --all --delta    # Weekly refresh: only new/grown threads")
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""Incremental vector index builder: harvest JSON → Chroma place index."""
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from place_retriever import (
+    PLACE_INDEX_DIR,
+    PLACES_COLLECTION,
+    open_collection,
+    place_id,
+    place_document,
+    place_metadata,
+    upsert_places,
+)
+from semantic_cache import Embedder, HashingEmbedder
+from place_store import harvest_files, iter_places
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class PlaceIndexer:
+    """Keeps the place index in sync with the harvest output.
+
+    A manifest next to the index stores two hashes per place: one of the
+    embedded document (name + vibe + tags) and one of the full record. Only
+    places whose document hash changed get re-embedded; places where just the
+    record changed (mention_count, sources) get a metadata-only update.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        index_dir: Path = PLACE_INDEX_DIR,
+        batch_size: int = 100,
+        rebuild: bool = False,
+    ):
+        self.embedder = embedder
+        self.index_dir = index_dir
+        self.batch_size = batch_size
+        self.data_dir = Path(__file__).parent / "data"
+        self.manifest_file = index_dir / "manifest.json"
+        if rebuild:
+            # Before opening: an index from another embedder would refuse to open
+            self._drop_index()
+        self.collection = open_collection(index_dir, embedder)
+        self.manifest: Dict[str, Dict[str, str]] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict[str, str]]:
+        if not self.manifest_file.exists():
+            return {}
+        with open(self.manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        # Manifest from another embedder is meaningless for this index
+        if manifest.get('embedder') != self.embedder.name:
+            return {}
+        return manifest.get('places', {})
+
+    def _save_manifest(self):
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'embedder': self.embedder.name, 'places': self.manifest}, f)
+        tmp.replace(self.manifest_file)
+
+    def load_places(self, source: Optional[Path] = None) -> List[Dict[str, Any]]:
+        """Load places from a JSON/JSONL file, or from all_places / per-city files."""
+        files = [source] if source is not None else harvest_files(self.data_dir)
+
+        places: Dict[str, Dict[str, Any]] = {}
+        for path in files:
+            for place in iter_places(path):
+                places[place_id(place)] = place
+        return list(places.values())
+
+    def build(self, places: List[Dict[str, Any]], prune: bool = True) -> Dict[str, int]:
+        """Sync the index with `places`. Returns counts per action."""
+        to_embed = []
+        to_update = []
+        seen = set()
+
+        for place in places:
+            pid = place_id(place)
+            if pid in seen:
+                continue
+            seen.add(pid)
+
+            doc_hash = _hash(place_document(place))
+            record_hash = _hash(json.dumps(place, sort_keys=True, ensure_ascii=False))
+            previous = self.manifest.get(pid)
+
+            if previous is None or previous['doc'] != doc_hash:
+                to_embed.append((pid, place, doc_hash, record_hash))
+            elif previous['record'] != record_hash:
+                to_update.append((pid, place, doc_hash, record_hash))
+
+        # Embed in batches; save the manifest after each so a crash keeps progress
+        for start in range(0, len(to_embed), self.batch_size):
+            batch = to_embed[start:start + self.batch_size]
+            upsert_places(self.collection, [p for _, p, _, _ in batch], self.embedder, self.batch_size)
+            for pid, _, doc_hash, record_hash in batch:
+                self.manifest[pid] = {'doc': doc_hash, 'record': record_hash}
+            self._save_manifest()
+            print(f"   🧠 Embedded {min(start + self.batch_size, len(to_embed))}/{len(to_embed)}")
+
+        for start in range(0, len(to_update), self.batch_size):
+            batch = to_update[start:start + self.batch_size]
+            self.collection.update(
+                ids=[pid for pid, _, _, _ in batch],
+                metadatas=[place_metadata(p) for _, p, _, _ in batch],
+            )
+            for pid, _, doc_hash, record_hash in batch:
+                self.manifest[pid] = {'doc': doc_hash, 'record': record_hash}
+        if to_update:
+            self._save_manifest()
+
+        removed = []
+        if prune:
+            removed = [pid for pid in self.manifest if pid not in seen]
+            for start in range(0, len(removed), self.batch_size):
+                self.collection.delete(ids=removed[start:start + self.batch_size])
+            for pid in removed:
+                del self.manifest[pid]
+            if removed:
+                self._save_manifest()
+
+        return {
+            'total': len(seen),
+            'embedded': len(to_embed),
+            'metadata_updated': len(to_update),
+            'unchanged': len(seen) - len(to_embed) - len(to_update),
+            'removed': len(removed),
+        }
+
+    def _drop_index(self):
+        import chromadb
+
+        client = chromadb.PersistentClient(path=str(self.index_dir))
+        try:
+            client.delete_collection(PLACES_COLLECTION)
+        except Exception:
+            pass  # nothing indexed yet (NotFoundError, or ValueError on older chromadb)
+        if self.manifest_file.exists():
+            self.manifest_file.unlink()
+
+    def reset(self):
+        """Drop the collection and manifest for a from-scratch rebuild."""
+        self._drop_index()
+        self.collection = open_collection(self.index_dir, self.embedder)
+        self.manifest = {}
+
+
+def _gemini_embedder() -> Embedder:
+    import os
+    from dotenv import load_dotenv
+    from google import genai
+    from semantic_cache import GeminiEmbedder
+
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    return GeminiEmbedder(genai.Client(api_key=api_key))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lowkey Place Indexer")
+    parser.add_argument("--source", type=Path, help="Harvest JSON/JSONL file (default: data/all_places.* or data/cities/*)")
+    parser.add_argument("--fake-embeddings", action="store_true", help="Offline deterministic embeddings (tests/dev)")
+    parser.add_argument("--index-dir", type=Path, default=PLACE_INDEX_DIR, help="Where the Chroma index lives")
+    parser.add_argument("--batch-size", type=int, default=100, help="Places per embedding call")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the index and re-embed everything")
+    parser.add_argument("--no-prune", action="store_true", help="Keep indexed places missing from the source")
+
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder() if args.fake_embeddings else _gemini_embedder()
+    indexer = PlaceIndexer(embedder, index_dir=args.index_dir, batch_size=args.batch_size, rebuild=args.rebuild)
+
+    places = indexer.load_places(args.source)
+    print(f"📚 Indexing {len(places)} places into: {args.index_dir}")
+
+    counts = indexer.build(places, prune=not args.no_prune)
+    print(f"\n✅ Index up to date: {counts['embedded']} embedded, "
+          f"{counts['metadata_updated']} metadata-only, {counts['unchanged']} unchanged, "
+          f"{counts['removed']} removed")
@@ -0,0 +1,222 @@
+"""Streaming producer/consumer pipeline with bounded queues between stages."""
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+_DONE = object()
+
+
+class StageStats:
+    """Counters for one stage; safe to update from its worker threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0  # items taken from the input queue
+        self.emitted = 0  # items handed to the next stage
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.max_queue_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self._lock = threading.Lock()
+
+    def record_depth(self, depth: int):
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self._depth_total += depth
+            self._depth_samples += 1
+
+    def record_item(self, busy: float, emitted: int, error: bool = False, items: int = 1):
+        with self._lock:
+            self.processed += items
+            self.emitted += emitted
+            self.busy_seconds += busy
+            self.errors += int(error)
+
+    def merge(self, other: "StageStats"):
+        """Fold another run of the same stage into this one (e.g. across cities)."""
+        with self._lock:
+            self.processed += other.processed
+            self.emitted += other.emitted
+            self.errors += other.errors
+            self.busy_seconds += other.busy_seconds
+            self.wall_seconds += other.wall_seconds
+            self.max_queue_depth = max(self.max_queue_depth, other.max_queue_depth)
+            self._depth_total += other._depth_total
+            self._depth_samples += other._depth_samples
+
+    def to_dict(self) -> Dict[str, Any]:
+        avg_depth = self._depth_total / self._depth_samples if self._depth_samples else 0.0
+        throughput = self.processed / self.wall_seconds if self.wall_seconds else 0.0
+        return {
+            'stage': self.name,
+            'processed': self.processed,
+            'emitted': self.emitted,
+            'errors': self.errors,
+            'busy_seconds': round(self.busy_seconds, 1),
+            'throughput_per_min': round(throughput * 60, 1),
+            'max_queue_depth': self.max_queue_depth,
+            'avg_queue_depth': round(avg_depth, 1),
+        }
+
+
+class Stage:
+    """One pipeline step: `func(item)` returns an iterable of items for the next stage.
+
+    Returning a generator streams items downstream as they are produced.
+    With `batch_size` > 1, `func` gets a list instead: up to `batch_size`
+    items, collected for at most `batch_wait` seconds after the first one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Iterable[Any]],
+        workers: int = 1,
+        batch_size: int = 1,
+        batch_wait: float = 0.0
+    ):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.stats = StageStats(name)
+
+    def take_batch(self, first: Any, in_q: queue.Queue) -> List[Any]:
+        """`first` plus whatever else arrives on `in_q` within the batch window."""
+        batch = [first]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = in_q.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                in_q.put(_DONE)  # picked up again by the worker loop
+                break
+            batch.append(item)
+        return batch
+
+
+class Pipeline:
+    """Runs stages concurrently, connected by bounded queues.
+
+    A full queue blocks the upstream stage (backpressure), so a slow stage
+    throttles everything before it instead of letting work pile up in memory.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 20):
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, source: Iterable[Any]) -> List[Any]:
+        """Feed `source` through every stage and return the last stage's output."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results: List[Any] = []
+        results_lock = threading.Lock()
+        threads: List[threading.Thread] = []
+
+        for si, stage in enumerate(self.stages):
+            in_q = queues[si]
+            out_q: Optional[queue.Queue] = queues[si + 1] if si + 1 < len(self.stages) else None
+            remaining = [stage.workers]
+            remaining_lock = threading.Lock()
+            started = time.monotonic()
+
+            def emit(item, out_q=out_q, next_stats=self.stages[si + 1].stats if out_q else None):
+                if out_q is None:
+                    with results_lock:
+                        results.append(item)
+                else:
+                    out_q.put(item)
+                    next_stats.record_depth(out_q.qsize())
+
+            def worker(stage=stage, in_q=in_q, out_q=out_q, emit=emit,
+                       remaining=remaining, remaining_lock=remaining_lock, started=started):
+                while True:
+                    item = in_q.get()
+                    if item is _DONE:
+                        # Let sibling workers see it too; the last one out closes the stage
+                        in_q.put(_DONE)
+                        with remaining_lock:
+                            remaining[0] -= 1
+                            last = remaining[0] == 0
+                        if last:
+                            stage.stats.wall_seconds = time.monotonic() - started
+                            if out_q is not None:
+                                out_q.put(_DONE)
+                        return
+
+                    items = 1
+                    if stage.batch_size > 1:
+                        item = stage.take_batch(item, in_q)
+                        items = len(item)
+
+                    t0 = time.monotonic()
+                    emitted = 0
+                    error = False
+                    try:
+                        for out in stage.func(item) or ():
+                            emit(out)
+                            emitted += 1
+                    except Exception as e:
+                        error = True
+                        print(f"   ⚠️ {stage.name} error: {e}")
+                    stage.stats.record_item(time.monotonic() - t0, emitted, error, items)
+
+            for _ in range(stage.workers):
+                t = threading.Thread(target=worker, name=f"{stage.name}-worker", daemon=True)
+                t.start()
+                threads.append(t)
+
+        first_q = queues[0]
+        for item in source:
+            first_q.put(item)
+            self.stages[0].stats.record_depth(first_q.qsize())
+        first_q.put(_DONE)
+
+        for t in threads:
+            t.join()
+
+        return results
+
+
+class TurnOrder:
+    """Lets concurrent workers take a step in a fixed order, whatever order they reach it in.
+
+    `plan` registers keys in turn order; `wait(key)` blocks until every
+    earlier key is `done`. Keys that were never planned don't wait. Every
+    planned key must eventually be marked done (use try/finally), or the
+    ones after it wait forever.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._index: Dict[Hashable, int] = {}
+        self._done: Set[int] = set()
+        self._next = 0  # first turn not done yet
+
+    def plan(self, keys: Iterable[Hashable]):
+        with self._cond:
+            for key in keys:
+                if key not in self._index:
+                    self._index[key] = len(self._index)
+
+    def wait(self, key: Hashable):
+        with self._cond:
+            index = self._index.get(key)
+            if index is not None:
+                self._cond.wait_for(lambda: self._next >= index)
+
+    def done(self, key: Hashable):
+        with self._cond:
+            index = self._index.get(key)
+            if index is None or index in self._done:
+                return
+            self._done.add(index)
+            while self._next in self._done:
+                self._next += 1
+            self._cond.notify_all()
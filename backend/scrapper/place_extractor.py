@@ -1,10 +1,22 @@
 """Extract places from Reddit posts with rich vibes and tags."""
 import os
+import re
+import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional
 from dotenv import load_dotenv
 from google import genai
+from google.genai import types
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rate_limiter import TokenBucket
+from result_cache import ResultCache
+from place_store import save_places
+from prompt_packer import TokenLedger, count_tokens, pack_post
+from gemini_resilience import PERMANENT, ResilientCaller, classify_error
 
 load_dotenv()
 
@@ -31,66 +43,361 @@ class PlaceExtractor:
         'trendy', 'traditional', 'authentic', 'touristy_but_worth_it'
     ]
     
-    def __init__(self, model: str = "gemini-2.5-flash"):
+    MODES = ('text', 'json')
+    
+    # Bump when the prompt changes so cached responses aren't reused
+    PROMPT_VERSION = "v2"
+    
+    # Opening line of every extraction prompt
+    INTRO = """You're a travel curator for "Lowkey" - a Gen Z app for finding authentic local spots, hidden gems, and places tourists don't know about."""
+    
+    _POST_ID_RE = re.compile(r'^\W*(P\d+)\W*$', re.IGNORECASE)
+    
+    def __init__(
+        self,
+        model: str = "gemini-2.5-flash",
+        rate_limiter: Optional[TokenBucket] = None,
+        mode: str = 'text',
+        cache: Optional[ResultCache] = None,
+        post_tokens: int = 3000,
+        max_comment_tokens: int = 150,
+        usage: Optional[TokenLedger] = None,
+        caller: Optional[ResilientCaller] = None
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown extraction mode '{mode}' (expected one of {self.MODES})")
         self.client = genai.Client(api_key=API_KEY)
         self.model = model
+        self.rate_limiter = rate_limiter
+        self.mode = mode
+        self.cache = cache
+        self.post_tokens = post_tokens  # Budget for body + comments in each prompt
+        self.max_comment_tokens = max_comment_tokens
+        self.usage = usage
+        self.caller = caller or ResilientCaller('gemini')  # Retries/backoff (+ breaker when shared)
         self.output_dir = Path(__file__).parent / "data" / "extracted_places"
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self._places_index: Dict[str, Dict] = {}
     
-    def extract_from_post(self, post_data: Dict) -> List[Dict[str, Any]]:
-        """Extract places from a single post."""
+    def _generate(self, prompt: str, config: Optional[types.GenerateContentConfig] = None):
+        """One attempt; every retry waits for the rate limiter again."""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        return self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=config
+        )
+    
+    def extract_from_post(self, post_data: Dict, strict: bool = False) -> List[Dict[str, Any]]:
+        """Extract places from a single post.
+        
+        Gemini calls are retried on rate limits and outages. If one still
+        fails, the error is logged and no places are returned, or with
+        `strict` the error is raised so the caller can tell "no places" from
+        "not extracted".
+        """
+        
+        structured = self.mode == 'json'
         
-        prompt = self._build_prompt(post_data)
+        # Raw responses are cached (not parsed places) so parser changes apply on re-runs
+        cache_key = ResultCache.make_key(f'extract-{self.mode}', self.model, self.PROMPT_VERSION, post_data)
+        response_text = self.cache.get(cache_key) if self.cache else None
         
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
-            return self._parse_response(response.text, post_data)
+            if response_text is None:
+                prompt = self._build_prompt(post_data, structured=structured)
+                response = self.caller.call(
+                    self._generate, prompt, self._json_config() if structured else None
+                )
+                if self.usage:
+                    self.usage.record('extract', self.model, prompt, response)
+                response_text = response.text
+                if self.cache and response_text is not None:
+                    self.cache.set(cache_key, response_text)
+            
+            return self._parse(response_text, post_data)
         except Exception as e:
-            print(f"      ⚠️ Extraction error: {e}")
+            if strict:
+                raise
+            print(f"      ⚠️ Extraction failed ({classify_error(e)}): {e}")
             return []
     
-    def _build_prompt(self, post_data: Dict) -> str:
-        """Build extraction prompt with Gen Z vibe instructions."""
+    def extract_batched(
+        self,
+        posts: List[Dict],
+        token_budget: int = 12000,
+        max_batch_size: int = 8,
+        workers: int = 1,
+        strict: bool = False
+    ) -> List[List[Dict]]:
+        """Extract from many posts with one Gemini call per batch.
         
-        title = post_data.get('title', '')
-        body = (post_data.get('body') or '')[:2000]
+        Posts are packed into batches that fit `token_budget`, so the long
+        instruction block is sent once per batch instead of once per post.
+        Each post is tagged with an ID (P1, P2, ...) that every output row must
+        carry, which is how places get the right thread as their source.
+        Batches run on up to `workers` threads. A batch rejected as malformed,
+        or whose rows carry no valid IDs, falls back to `extract_from_post`;
+        one that fails on rate limits or outages after retries is not re-sent
+        post by post. Returns the places for each post, in input order; with
+        `strict`, posts that could not be extracted are None instead of [].
+        """
+        results: List[Optional[List[Dict]]] = [None] * len(posts)
+        pending = []
+        for i, post in enumerate(posts):
+            cached = self.cache.get(self._batch_cache_key(post)) if self.cache else None
+            if cached is None:
+                pending.append(i)
+            else:
+                results[i] = self._parse(cached, post)
         
-        comments = post_data.get('comments', [])
-        top_comments = sorted(
-            comments,
-            key=lambda c: c.get('upvotes', 0),
-            reverse=True
-        )[:20]
+        batches = [
+            [pending[j] for j in batch]
+            for batch in self._make_batches([posts[i] for i in pending], token_budget, max_batch_size)
+        ]
         
-        comments_text = '\n'.join([
-            f"- {c.get('body', '')[:500]}"
-            for c in top_comments
-        ])
+        def run(batch):
+            if len(batch) == 1:
+                return batch, [self._extract_or_none(posts[batch[0]], strict)]
+            return batch, self._extract_batch([posts[i] for i in batch], strict)
         
-        categories_str = ' | '.join(self.VALID_CATEGORIES)
-        tags_str = ', '.join(self.VALID_TAGS)
+        if workers > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                done = list(pool.map(run, batches))
+        else:
+            done = [run(batch) for batch in batches]
         
-        return f"""You're a travel curator for "Lowkey" - a Gen Z app for finding authentic local spots, hidden gems, and places tourists don't know about.
+        for batch, batch_places in done:
+            for i, places in zip(batch, batch_places):
+                results[i] = places
+        return results
+    
+    def _extract_or_none(self, post_data: Dict, strict: bool) -> Optional[List[Dict]]:
+        try:
+            return self.extract_from_post(post_data, strict=True)
+        except Exception as e:
+            print(f"      ⚠️ Extraction failed ({classify_error(e)}): {e}")
+            return None if strict else []
+    
+    def _batch_cache_key(self, post_data: Dict) -> str:
+        return ResultCache.make_key(f'extract-batch-{self.mode}', self.model, self.PROMPT_VERSION, post_data)
+    
+    def _make_batches(self, posts: List[Dict], token_budget: int, max_batch_size: int) -> List[List[int]]:
+        """Greedily pack post indices into batches under the token budget."""
+        overhead = count_tokens(self._build_batch_prompt([], structured=self.mode == 'json'))
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = overhead
+        
+        for i, post in enumerate(posts):
+            cost = count_tokens(self._post_section(post)) + 10
+            if current and (used + cost > token_budget or len(current) >= max_batch_size):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(i)
+            used += cost
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _extract_batch(self, posts: List[Dict], strict: bool = False) -> List[Optional[List[Dict]]]:
+        """One call for a batch. Returns the places for each post (see `extract_batched`)."""
+        
+        structured = self.mode == 'json'
+        post_ids = [f"P{i}" for i in range(1, len(posts) + 1)]
+        prompt = self._build_batch_prompt(posts, structured=structured)
+        
+        try:
+            response = self.caller.call(
+                self._generate, prompt, self._json_config(post_ids) if structured else None
+            )
+            if self.usage:
+                self.usage.record('extract-batch', self.model, prompt, response)
+            by_post = self._split_batch_response(response.text or '', post_ids, structured)
+        except Exception as e:
+            if classify_error(e) != PERMANENT:
+                # Rate limited or down even after retries: sending each post alone would only burn calls
+                print(f"      ⚠️ Batch extraction failed ({classify_error(e)}): {e}")
+                return [None if strict else [] for _ in posts]
+            print(f"      ⚠️ Batch extraction error, falling back to per-post: {e}")
+            by_post = None
+        
+        if by_post is None:
+            return [self._extract_or_none(post, strict) for post in posts]
+        
+        results = []
+        for post_id, post in zip(post_ids, posts):
+            # Cached per post, in the single-post response format
+            response_text = by_post[post_id]
+            if self.cache:
+                self.cache.set(self._batch_cache_key(post), response_text)
+            results.append(self._parse(response_text, post))
+        return results
+    
+    def _split_batch_response(
+        self,
+        response_text: str,
+        post_ids: List[str],
+        structured: bool
+    ) -> Optional[Dict[str, str]]:
+        """Split a batch response into one single-post response per post ID.
+        
+        None if the response has rows but none of them carry a valid ID.
+        """
+        rows: Dict[str, list] = {post_id: [] for post_id in post_ids}
+        unattributed = 0
+        
+        if structured:
+            try:
+                items = json.loads(response_text)
+            except ValueError:
+                return None
+            if isinstance(items, dict):
+                items = items.get('places', [])
+            if not isinstance(items, list):
+                return None
+            for item in items:
+                post_id = str(item.get('post_id', '')).strip().upper() if isinstance(item, dict) else ''
+                if post_id in rows:
+                    rows[post_id].append({k: v for k, v in item.items() if k != 'post_id'})
+                else:
+                    unattributed += 1
+        else:
+            for line in response_text.strip().split('\n'):
+                head, sep, rest = line.strip().partition('|')
+                if not sep or head.strip().upper() in ('POST_ID', 'NAME'):
+                    continue
+                match = self._POST_ID_RE.match(head.strip())
+                post_id = match.group(1).upper() if match else None
+                if post_id in rows:
+                    rows[post_id].append(rest.strip())
+                else:
+                    unattributed += 1
+        
+        if unattributed:
+            if not any(rows.values()):
+                return None
+            print(f"      ⚠️ Dropped {unattributed} rows without a valid post ID")
+        
+        if structured:
+            return {post_id: json.dumps(items, ensure_ascii=False) for post_id, items in rows.items()}
+        return {post_id: '\n'.join(lines) for post_id, lines in rows.items()}
+    
+    def _parse(self, response_text: str, post_data: Dict) -> List[Dict]:
+        if self.mode == 'json':
+            return self._parse_json_response(response_text, post_data)
+        return self._parse_response(response_text, post_data)
+    
+    def _json_config(self, post_ids: Optional[List[str]] = None) -> types.GenerateContentConfig:
+        """JSON mode with a typed place schema built from the valid categories/tags.
+        
+        With `post_ids` (batched extraction) each place also names its post.
+        """
+        
+        place_schema = {
+            'type': 'OBJECT',
+            'properties': {
+                'name': {'type': 'STRING'},
+                'city': {'type': 'STRING'},
+                'country': {'type': 'STRING'},
+                'category': {'type': 'STRING', 'enum': self.VALID_CATEGORIES},
+                'tags': {
+                    'type': 'ARRAY',
+                    'items': {'type': 'STRING', 'enum': self.VALID_TAGS},
+                },
+                'vibe': {'type': 'STRING'},
+                'confidence': {'type': 'STRING', 'enum': ['high', 'medium']},
+            },
+            'required': ['name', 'city', 'country', 'category', 'tags', 'vibe', 'confidence'],
+        }
+        if post_ids:
+            place_schema['properties']['post_id'] = {'type': 'STRING', 'enum': post_ids}
+            place_schema['required'].insert(0, 'post_id')
+        return types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema={'type': 'ARRAY', 'items': place_schema},
+        )
+    
+    def _build_prompt(self, post_data: Dict, structured: bool = False) -> str:
+        """Build extraction prompt with Gen Z vibe instructions."""
+        
+        if structured:
+            output_rules = "- Return a JSON array with one object per place (empty array if none)"
+        else:
+            output_rules = """- One place per line
+- Format exactly: NAME | CITY | COUNTRY | CATEGORY | TAGS | VIBE | CONFIDENCE
+
+OUTPUT:"""
+        
+        return f"""{self.INTRO}
 
 Extract EVERY real place mentioned in this Reddit thread. We want cafes, restaurants, bars, shops, markets, neighborhoods, viewpoints, hotels - anything a traveler would want to visit.
 
 ---
 
-POST TITLE: {title}
+{self._post_section(post_data)}
 
-POST BODY:
-{body}
+---
 
-REDDIT COMMENTS (sorted by upvotes):
-{comments_text}
+{self._place_guide()}
+{output_rules}"""
+    
+    def _build_batch_prompt(self, posts: List[Dict], structured: bool = False) -> str:
+        """Prompt for several threads at once; every place is tagged with its post ID."""
+        
+        sections = '\n\n'.join(
+            f"=== POST P{i} ===\n{self._post_section(post)}"
+            for i, post in enumerate(posts, 1)
+        )
+        
+        if structured:
+            output_rules = """- Return a JSON array with one object per place (empty array if none)
+- Set post_id to the ID of the post the place comes from (P1, P2, ...)"""
+        else:
+            output_rules = """- One place per line, starting with the ID of the post it comes from (P1, P2, ...)
+- Format exactly: POST_ID | NAME | CITY | COUNTRY | CATEGORY | TAGS | VIBE | CONFIDENCE
+
+OUTPUT:"""
+        
+        return f"""{self.INTRO}
+
+Extract EVERY real place mentioned in each of the Reddit threads below. We want cafes, restaurants, bars, shops, markets, neighborhoods, viewpoints, hotels - anything a traveler would want to visit. Keep each place with the post it was mentioned in.
+
+---
+
+{sections}
 
 ---
 
-For EACH place, provide:
+{self._place_guide()}
+- A place mentioned in several posts gets one line per post
+{output_rules}"""
+    
+    def _post_section(self, post_data: Dict) -> str:
+        """Title, packed body and comments for one post."""
+        
+        title = post_data.get('title', '')
+        body, comments = pack_post(post_data, self.post_tokens, max_comment_tokens=self.max_comment_tokens)
+        
+        comments_text = '\n'.join(f"- {c}" for c in comments)
+        
+        return f"""POST TITLE: {title}
+
+POST BODY:
+{body}
+
+REDDIT COMMENTS (sorted by upvotes):
+{comments_text}"""
+    
+    def _place_guide(self) -> str:
+        """Field definitions, vibe examples and rules shared by both prompts."""
+        
+        categories_str = ' | '.join(self.VALID_CATEGORIES)
+        tags_str = ', '.join(self.VALID_TAGS)
+        
+        return f"""For EACH place, provide:
 1. NAME: Exact place name (as locals call it)
 2. CITY: City name
 3. COUNTRY: Country name
@@ -128,11 +435,7 @@ RULES:
 - Skip generic mentions ("a cafe nearby", "some bar")
 - Skip major chains (Starbucks, McDonald's) unless specifically praised as exceptional
 - If a place is mentioned multiple times or upvoted, it's probably good
-- When in doubt about city/country, make educated guess from context
-- One place per line
-- Format exactly: NAME | CITY | COUNTRY | CATEGORY | TAGS | VIBE | CONFIDENCE
-
-OUTPUT:"""
+- When in doubt about city/country, make educated guess from context"""
     
     def _parse_response(self, response_text: str, post_data: Dict) -> List[Dict]:
         """Parse Gemini response into structured places."""
@@ -153,137 +456,252 @@ OUTPUT:"""
                 if len(parts) < 7:
                     continue
                 
-                name = parts[0].strip()
-                city = parts[1].strip()
-                country = parts[2].strip()
-                category = parts[3].strip().lower().replace(' ', '_')
-                tags_raw = parts[4].strip()
-                vibe = parts[5].strip()
-                confidence = parts[6].strip().lower()
-                
-                # Skip low quality
-                if confidence == 'low' or len(vibe) < 20 or len(name) < 2:
-                    continue
-                
-                # Normalize category
-                if category not in self.VALID_CATEGORIES:
-                    category_map = {
-                        'restaurants': 'restaurant', 'bars': 'bar', 'cafes': 'cafe',
-                        'coffee_shop': 'cafe', 'coffee': 'cafe', 'food_stall': 'street_food',
-                        'night_market': 'market', 'shrine': 'temple', 'district': 'neighborhood',
-                        'area': 'neighborhood', 'attraction': 'landmark', 'sight': 'landmark',
-                        'pub': 'bar', 'lounge': 'bar', 'bistro': 'restaurant',
-                    }
-                    category = category_map.get(category, 'activity')
-                
-                # Parse and validate tags
-                tags = [t.strip().lower().replace(' ', '_') for t in tags_raw.split(',')]
-                tags = [t for t in tags if t in self.VALID_TAGS][:4]
-                
-                # Add default tags based on category if none matched
-                if not tags:
-                    category_to_tags = {
-                        'cafe': ['coffee', 'chill'],
-                        'restaurant': ['food', 'local'],
-                        'bar': ['drinks', 'nightlife'],
-                        'club': ['nightlife', 'lively'],
-                        'street_food': ['food', 'budget', 'local'],
-                        'market': ['shopping', 'local'],
-                        'temple': ['cultural', 'historic'],
-                        'museum': ['cultural', 'indoor'],
-                        'park': ['nature', 'outdoor'],
-                        'viewpoint': ['views', 'instagram'],
-                        'neighborhood': ['local', 'authentic'],
-                        'beach': ['outdoor', 'chill'],
-                    }
-                    tags = category_to_tags.get(category, ['local'])
-                
-                place = {
-                    'name': name,
-                    'city': city,
-                    'country': country,
-                    'category': category,
-                    'tags': tags,
-                    'vibe': vibe,
-                    'confidence': confidence,
-                    'sources': [{
-                        'url': post_data.get('url', ''),
-                        'title': post_data.get('title', ''),
-                        'subreddit': post_data.get('subreddit', ''),
-                    }],
-                    'mention_count': 1
-                }
-                
-                places.append(place)
+                place = self._build_place(
+                    name=parts[0],
+                    city=parts[1],
+                    country=parts[2],
+                    category=parts[3],
+                    tags=parts[4].split(','),
+                    vibe=parts[5],
+                    confidence=parts[6],
+                    post_data=post_data
+                )
+                if place:
+                    places.append(place)
                 
             except Exception as e:
                 continue
         
         return places
     
-    def extract_from_posts(self, posts: List[Dict]) -> List[Dict]:
-        """Extract from multiple posts with deduplication."""
+    def _parse_json_response(self, response_text: str, post_data: Dict) -> List[Dict]:
+        """Parse a JSON-mode response (array of place objects)."""
+        
+        try:
+            items = json.loads(response_text)
+        except (TypeError, ValueError):
+            return []
         
-        self._places_index = {}
+        if isinstance(items, dict):
+            items = items.get('places', [])
+        if not isinstance(items, list):
+            return []
         
-        for i, post in enumerate(posts, 1):
+        places = []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            tags = item.get('tags') or []
+            if isinstance(tags, str):
+                tags = tags.split(',')
+            place = self._build_place(
+                name=str(item.get('name', '')),
+                city=str(item.get('city', '')),
+                country=str(item.get('country', '')),
+                category=str(item.get('category', '')),
+                tags=[str(t) for t in tags],
+                vibe=str(item.get('vibe', '')),
+                confidence=str(item.get('confidence', 'medium')),
+                post_data=post_data
+            )
+            if place:
+                places.append(place)
+        
+        return places
+    
+    def _build_place(
+        self,
+        name: str,
+        city: str,
+        country: str,
+        category: str,
+        tags: List[str],
+        vibe: str,
+        confidence: str,
+        post_data: Dict
+    ) -> Optional[Dict]:
+        """Normalize one extracted place; None if it's too low quality to keep."""
+        
+        name = name.strip()
+        city = city.strip()
+        country = country.strip()
+        category = category.strip().lower().replace(' ', '_')
+        vibe = vibe.strip()
+        confidence = confidence.strip().lower()
+        
+        # Skip low quality
+        if confidence == 'low' or len(vibe) < 20 or len(name) < 2:
+            return None
+        
+        # Normalize category
+        if category not in self.VALID_CATEGORIES:
+            category_map = {
+                'restaurants': 'restaurant', 'bars': 'bar', 'cafes': 'cafe',
+                'coffee_shop': 'cafe', 'coffee': 'cafe', 'food_stall': 'street_food',
+                'night_market': 'market', 'shrine': 'temple', 'district': 'neighborhood',
+                'area': 'neighborhood', 'attraction': 'landmark', 'sight': 'landmark',
+                'pub': 'bar', 'lounge': 'bar', 'bistro': 'restaurant',
+            }
+            category = category_map.get(category, 'activity')
+        
+        # Validate tags
+        tags = [t.strip().lower().replace(' ', '_') for t in tags]
+        tags = [t for t in tags if t in self.VALID_TAGS][:4]
+        
+        # Add default tags based on category if none matched
+        if not tags:
+            category_to_tags = {
+                'cafe': ['coffee', 'chill'],
+                'restaurant': ['food', 'local'],
+                'bar': ['drinks', 'nightlife'],
+                'club': ['nightlife', 'lively'],
+                'street_food': ['food', 'budget', 'local'],
+                'market': ['shopping', 'local'],
+                'temple': ['cultural', 'historic'],
+                'museum': ['cultural', 'indoor'],
+                'park': ['nature', 'outdoor'],
+                'viewpoint': ['views', 'instagram'],
+                'neighborhood': ['local', 'authentic'],
+                'beach': ['outdoor', 'chill'],
+            }
+            tags = category_to_tags.get(category, ['local'])
+        
+        return {
+            'name': name,
+            'city': city,
+            'country': country,
+            'category': category,
+            'tags': tags,
+            'vibe': vibe,
+            'confidence': confidence,
+            'sources': [self._source_for(post_data)],
+            'mention_count': 1
+        }
+    
+    def _source_for(self, post_data: Dict) -> Dict:
+        """Source entry for a place, with the queries that found the thread if known."""
+        
+        source = {
+            'url': post_data.get('url', ''),
+            'title': post_data.get('title', ''),
+            'subreddit': post_data.get('subreddit', ''),
+        }
+        if post_data.get('search_queries'):
+            # Same list as the post's, so queries that find it later still show up
+            source['search_queries'] = post_data['search_queries']
+        return source
+    
+    def extract_from_posts(
+        self,
+        posts: List[Dict],
+        workers: int = 1,
+        extract_fn: Optional[Callable[[Dict], List[Dict]]] = None,
+        batch_fn: Optional[Callable[[List[Dict]], List[List[Dict]]]] = None
+    ) -> List[Dict]:
+        """Extract from multiple posts with deduplication.
+        
+        With workers > 1, posts are extracted concurrently but merged in post
+        order, so the result is the same as a sequential run. `extract_fn`
+        replaces `extract_from_post` (e.g. to serve checkpointed results).
+        `batch_fn` takes all posts at once and returns places per post (e.g.
+        `extract_batched`); it takes precedence over `extract_fn`.
+        """
+        
+        extract_fn = extract_fn or self.extract_from_post
+        
+        places_index: Dict[str, Dict] = {}
+        
+        def report(i, post, places):
             title = post.get('title', '')[:60]
             print(f"   [{i}/{len(posts)}] {title}")
-            
-            places = self.extract_from_post(post)
-            
             if places:
                 print(f"      ✅ Extracted {len(places)} places")
-                for place in places:
-                    self._merge_place(place)
             else:
                 print(f"      ⚠️ No places extracted")
         
-        return list(self._places_index.values())
+        def extract(indexed_post):
+            i, post = indexed_post
+            places = extract_fn(post)
+            report(i, post, places)
+            return places
+        
+        indexed_posts = list(enumerate(posts, 1))
+        if batch_fn:
+            results = batch_fn(posts)
+            for (i, post), places in zip(indexed_posts, results):
+                report(i, post, places)
+        elif workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(extract, indexed_posts))
+        else:
+            results = [extract(p) for p in indexed_posts]
+        
+        for places in results:
+            for place in places:
+                self._merge_place(place, places_index)
+        
+        self._places_index = places_index
+        return list(places_index.values())
     
-    def _merge_place(self, new_place: Dict):
+    def _merge_place(self, new_place: Dict, places_index: Optional[Dict[str, Dict]] = None):
         """Merge place into index, combining vibes from duplicates."""
         
+        if places_index is None:
+            places_index = self._places_index
+        
         # Create normalized key for matching
         name_normalized = new_place['name'].lower().strip()
         city_normalized = new_place['city'].lower().strip()
         key = f"{name_normalized}_{city_normalized}"
         
-        if key in self._places_index:
-            existing = self._places_index[key]
-            
-            # Merge vibes (append if different and not too long)
-            new_vibe = new_place['vibe']
-            if new_vibe.lower() not in existing['vibe'].lower():
-                if len(existing['vibe']) < 400:
-                    existing['vibe'] = f"{existing['vibe']} {new_vibe}"
-                elif len(new_vibe) > len(existing['vibe']):
-                    # Replace if new one is more detailed
-                    existing['vibe'] = new_vibe
-            
-            # Merge tags (keep unique, max 6)
-            existing['tags'] = list(set(existing['tags'] + new_place['tags']))[:6]
-            
-            # Add source
-            existing['sources'].extend(new_place['sources'])
-            existing['mention_count'] += 1
-            
-            # Boost confidence if mentioned multiple times
-            if existing['mention_count'] >= 2:
-                existing['confidence'] = 'high'
+        if key in places_index:
+            self._merge_into(places_index[key], new_place)
         else:
-            self._places_index[key] = new_place
+            places_index[key] = new_place
     
-    def save_results(self, places: List[Dict], filename: str = "extracted_places.json"):
-        """Save extracted places to JSON."""
+    @staticmethod
+    def _merge_into(existing: Dict, new_place: Dict):
+        """Fold a duplicate of `existing` into it (vibes, tags, sources, mention count)."""
+        
+        # Merge vibes (append if different and not too long)
+        new_vibe = new_place['vibe']
+        if new_vibe.lower() not in existing['vibe'].lower():
+            if len(existing['vibe']) < 400:
+                existing['vibe'] = f"{existing['vibe']} {new_vibe}"
+            elif len(new_vibe) > len(existing['vibe']):
+                # Replace if new one is more detailed
+                existing['vibe'] = new_vibe
         
-        filepath = self.output_dir / filename
+        # Merge tags (keep unique, max 6)
+        existing['tags'] = list(set(existing['tags'] + new_place['tags']))[:6]
+        
+        # Add source (a thread re-extracted by a delta run isn't a new mention)
+        known_urls = {s.get('url') for s in existing['sources']}
+        new_sources = [s for s in new_place['sources'] if s.get('url') not in known_urls]
+        if not new_sources:
+            return
+        existing['sources'].extend(new_sources)
+        existing['mention_count'] += 1
+        
+        # Boost confidence if mentioned multiple times
+        if existing['mention_count'] >= 2:
+            existing['confidence'] = 'high'
+    
+    def save_results(
+        self,
+        places: List[Dict],
+        filename: str = "extracted_places.json",
+        output_format: str = 'json',
+        compression: Optional[str] = None
+    ):
+        """Save extracted places as JSON and/or JSONL (see place_store)."""
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(places, f, indent=2, ensure_ascii=False)
+        stem = self.output_dir / Path(filename).stem
+        filepaths = save_places(stem, places, output_format, compression)
         
-        print(f"\n💾 Saved {len(places)} places to: {filepath}")
-        return filepath
+        for filepath in filepaths:
+            print(f"\n💾 Saved {len(places)} places to: {filepath}")
+        return filepaths[0]
     
     def print_summary(self, places: List[Dict]):
         """Print extraction summary."""
@@ -0,0 +1,167 @@
+"""Place output files: JSON (whole list) and streaming JSONL (optionally gzip/zstd).
+
+JSONL is written one place per line as places are produced and read back
+lazily, so neither side ever holds the whole corpus in memory.
+"""
+import io
+import os
+import gzip
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from checkpoint import atomic_write_json
+
+FORMATS = ('json', 'jsonl', 'both')
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _open_zstd(path: Path, mode: str):
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd output needs the 'zstandard' package (pip install zstandard)")
+    if 'w' in mode:
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+    else:
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return io.TextIOWrapper(raw, encoding='utf-8')
+
+
+def _open_text(path: Path, mode: str):
+    """Open a (possibly compressed) text file, picking the codec from the suffix."""
+    path = Path(path)
+    if path.suffix == '.gz':
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if path.suffix == '.zst':
+        return _open_zstd(path, mode)
+    return open(path, mode, encoding='utf-8')
+
+
+def jsonl_path(stem: Path, compression: Optional[str] = None) -> Path:
+    """`data/cities/paris` -> `data/cities/paris.jsonl[.gz|.zst]`."""
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression!r} (use gzip, zstd or None)")
+    return Path(f"{stem}.jsonl{COMPRESSION_SUFFIXES[compression]}")
+
+
+class PlaceWriter:
+    """Appends places to a JSONL file one line at a time.
+
+    Writes go to a temp file next to `path` that replaces it on a clean
+    close, so readers never see a half-written file.
+
+        with PlaceWriter(path) as writer:
+            for place in places:
+                writer.write(place)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=self.path.suffix
+        )
+        os.close(fd)
+        self._file = _open_text(Path(self._tmp), 'w')
+
+    def write(self, place: Dict):
+        self._file.write(json.dumps(place, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def write_many(self, places: Iterable[Dict]):
+        for place in places:
+            self.write(place)
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.unlink(self._tmp)
+
+    def __enter__(self) -> "PlaceWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_places(path: Path) -> Iterator[Dict]:
+    """Lazily yield places from a .jsonl[.gz|.zst] file (or a legacy .json list)."""
+    path = Path(path)
+    if path.suffix == '.json':
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+
+    with _open_text(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def places_files(stem: Path) -> List[Path]:
+    """Every existing output file for `stem` (`--format both` writes two), JSONL first."""
+    candidates = [jsonl_path(stem, compression) for compression in COMPRESSION_SUFFIXES]
+    candidates.append(Path(f"{stem}.json"))
+    return [path for path in candidates if path.exists()]
+
+
+def find_places_file(stem: Path) -> Optional[Path]:
+    """The existing output file for `stem`, preferring JSONL over JSON."""
+    files = places_files(stem)
+    return files[0] if files else None
+
+
+def harvest_files(data_dir: Path) -> List[Path]:
+    """The files holding a harvest: `all_places` if there is one, else every per-city file."""
+    combined = find_places_file(data_dir / "all_places")
+    if combined is not None:
+        return [combined]
+    city_dir = data_dir / "cities"
+    stems = sorted({city_dir / p.name.split('.')[0] for p in city_dir.glob("*.json*")})
+    return [path for path in (find_places_file(stem) for stem in stems) if path is not None]
+
+
+def write_places_file(path: Path, places: Iterable[Dict]):
+    """Write places to `path` in the format its suffix names (.json or .jsonl[.gz|.zst])."""
+    path = Path(path)
+    if path.suffix == '.json':
+        atomic_write_json(path, list(places))
+        return
+    with PlaceWriter(path) as writer:
+        writer.write_many(places)
+
+
+def check_output_format(fmt: str, compression: Optional[str] = None):
+    """Raise ValueError for an output format or compression `save_places` can't write."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt!r} (use {', '.join(FORMATS)})")
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression: {compression!r} (use gzip, zstd or None)")
+
+
+def save_places(
+    stem: Path,
+    places: List[Dict],
+    fmt: str = 'json',
+    compression: Optional[str] = None
+) -> List[Path]:
+    """Write `places` as `<stem>.json` and/or `<stem>.jsonl[...]`. Returns the files written."""
+    check_output_format(fmt, compression)
+
+    written = []
+    if fmt in ('json', 'both'):
+        written.append(Path(f"{stem}.json"))
+    if fmt in ('jsonl', 'both'):
+        written.append(jsonl_path(stem, compression))
+    for path in written:
+        write_places_file(path, places)
+    return written
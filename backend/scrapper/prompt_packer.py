@@ -0,0 +1,148 @@
+"""Token-budgeted prompt packing for Gemini calls, plus a per-call token ledger.
+
+Instead of fixed character slices, comments are chosen by value per token:
+very short and near-duplicate comments are dropped, long ones are trimmed,
+and the rest fill the budget greedily by upvotes per token.
+"""
+import re
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+_WORD_RE = re.compile(r"\w+")
+
+
+def count_tokens(text: str) -> int:
+    """Local estimate of Gemini tokens, no API call.
+
+    ~1 token per 4 characters of each ASCII word, 1 per punctuation mark and
+    1 per character of non-Latin scripts (Thai, CJK), which SentencePiece
+    splits much finer. Meant for budgeting; TokenLedger records the real
+    counts Gemini reports.
+    """
+    tokens = 0
+    for piece in _PIECE_RE.findall(text):
+        tokens += (len(piece) + 3) // 4 if piece.isascii() else len(piece)
+    return tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut `text` at a word boundary so it fits `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    used = 0
+    end = 0
+    for match in _PIECE_RE.finditer(text):
+        piece = match.group()
+        used += (len(piece) + 3) // 4 if piece.isascii() else len(piece)
+        if used > max_tokens:
+            break
+        end = match.end()
+    return text[:end].rstrip() + '…'
+
+
+def _word_set(text: str) -> set:
+    return set(_WORD_RE.findall(text.lower()))
+
+
+def pack_comments(
+    comments: List[Dict],
+    token_budget: int,
+    max_comment_tokens: int = 150,
+    min_chars: int = 15,
+    duplicate_threshold: float = 0.8,
+    max_candidates: int = 100
+) -> List[Tuple[Dict, str]]:
+    """Pick the comments worth sending. Returns (comment, text) pairs, highest upvotes first.
+
+    Args:
+        token_budget: Total tokens for all selected comment texts
+        max_comment_tokens: Longer comments are trimmed to this
+        min_chars: Shorter comments ("this", "lol same") are dropped
+        duplicate_threshold: Word-set Jaccard above which a comment repeats a
+            higher-voted one and is dropped
+        max_candidates: Only the top-voted this many comments are considered
+    """
+    by_upvotes = sorted(comments, key=lambda c: c.get('upvotes', 0), reverse=True)[:max_candidates]
+
+    candidates = []
+    kept_words: List[set] = []
+    for comment in by_upvotes:
+        body = ' '.join((comment.get('body') or '').split())
+        if len(body) < min_chars:
+            continue
+        words = _word_set(body)
+        if any(len(words & seen) / len(words | seen) >= duplicate_threshold for seen in kept_words):
+            continue
+        kept_words.append(words)
+
+        text = truncate_to_tokens(body, max_comment_tokens)
+        cost = count_tokens(text) + 2  # "- " prefix and newline
+        value = (max(comment.get('upvotes', 0), 0) + 1) / cost
+        candidates.append((value, len(candidates), comment, text, cost))
+
+    chosen = []
+    used = 0
+    for value, order, comment, text, cost in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        if used + cost > token_budget:
+            continue
+        chosen.append((order, comment, text))
+        used += cost
+
+    return [(comment, text) for _, comment, text in sorted(chosen)]
+
+
+def pack_post(
+    post_data: Dict,
+    token_budget: int,
+    body_share: float = 0.4,
+    **comment_options
+) -> Tuple[str, List[str]]:
+    """Body and comment texts for a post within `token_budget` tokens.
+
+    The body gets up to `body_share` of the budget; comments get whatever
+    the body leaves.
+    """
+    body = ' '.join((post_data.get('body') or '').split())
+    body = truncate_to_tokens(body, int(token_budget * body_share))
+    remaining = token_budget - count_tokens(body)
+    comments = pack_comments(post_data.get('comments', []), remaining, **comment_options)
+    return body, [text for _, text in comments]
+
+
+class TokenLedger:
+    """Tokens per Gemini call: local estimate plus the API's own counts when returned.
+
+    Totals are kept per call kind ('validate', 'validate-batch', 'extract');
+    with a `path`, every call is also appended as a JSON line.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self.totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def record(self, kind: str, model: str, prompt: str, response: Any = None):
+        usage = getattr(response, 'usage_metadata', None)
+        entry = {
+            'kind': kind,
+            'model': model,
+            'estimated_prompt_tokens': count_tokens(prompt),
+            'prompt_tokens': getattr(usage, 'prompt_token_count', None),
+            'output_tokens': getattr(usage, 'candidates_token_count', None),
+        }
+
+        with self._lock:
+            totals = self.totals.setdefault(kind, {
+                'calls': 0, 'estimated_prompt_tokens': 0, 'prompt_tokens': 0, 'output_tokens': 0
+            })
+            totals['calls'] += 1
+            for key in ('estimated_prompt_tokens', 'prompt_tokens', 'output_tokens'):
+                totals[key] += entry[key] or 0
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry) + '\n')
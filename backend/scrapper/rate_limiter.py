@@ -0,0 +1,48 @@
+"""Thread-safe token-bucket rate limiter shared by harvest workers."""
+import time
+import threading
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, bursting up to `capacity`.
+
+    Every worker that talks to the same API shares one bucket, so adding
+    workers keeps the pipe full without going over the limit.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then take them."""
+        if tokens > self.capacity:
+            # The bucket never holds more than `capacity`, so this would wait forever
+            raise ValueError(f"Can't acquire {tokens} tokens from a bucket of capacity {self.capacity}")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+            with self._lock:
+                self.waited_seconds += wait
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: float = 1.0) -> "TokenBucket":
+        return cls(rate=requests_per_minute / 60.0, capacity=burst)
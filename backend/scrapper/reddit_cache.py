@@ -0,0 +1,106 @@
+"""Local store of raw Reddit responses (search results + post JSON)."""
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class RedditCache:
+    """Raw Reddit responses on disk, plus run-wide fetch coalescing.
+
+    - Disk: entries younger than `max_age_days` are served without a request.
+    - Run: every key is fetched at most once per process; a second caller
+      asking for the same permalink while it is in flight waits for the
+      first one instead of downloading it again.
+
+    Args:
+        path: SQLite file, or None for in-run deduplication only
+        max_age_days: Refetch entries older than this
+    """
+
+    TABLES = ('searches', 'posts')
+
+    def __init__(self, path: Optional[Path] = None, max_age_days: float = 3):
+        self.max_age_seconds = max_age_days * 86400
+        self.stats = {
+            'network_fetches': 0,
+            'disk_hits': 0,
+            'run_duplicates': 0,
+        }
+        self._memo: Dict[Tuple[str, str], Any] = {}
+        self._inflight: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if path is not None:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for table in self.TABLES:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    f"(key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, payload TEXT NOT NULL)"
+                )
+            self._conn.commit()
+
+    def _read_disk(self, table: str, key: str) -> Optional[Any]:
+        if self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT fetched_at, payload FROM {table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.max_age_seconds:
+            return None
+        return json.loads(row[1])
+
+    def _write_disk(self, table: str, key: str, payload: Any):
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {table} (key, fetched_at, payload) VALUES (?, ?, ?)",
+                (key, time.time(), json.dumps(payload, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def get_or_fetch(self, table: str, key: str, fetch: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (payload, fetched_from_network). Empty payloads are not stored."""
+        memo_key = (table, key)
+
+        with self._lock:
+            if memo_key in self._memo:
+                self.stats['run_duplicates'] += 1
+                return self._memo[memo_key], False
+            event = self._inflight.get(memo_key)
+            owner = event is None
+            if owner:
+                event = self._inflight[memo_key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                self.stats['run_duplicates'] += 1
+                return self._memo.get(memo_key), False
+
+        try:
+            payload = self._read_disk(table, key)
+            fetched = payload is None
+            if fetched:
+                payload = fetch()
+                if payload:
+                    self._write_disk(table, key, payload)
+
+            with self._lock:
+                self.stats['network_fetches' if fetched else 'disk_hits'] += 1
+                self._memo[memo_key] = payload
+            return payload, fetched
+        finally:
+            with self._lock:
+                del self._inflight[memo_key]
+            event.set()
+
+    def fetches_avoided(self) -> int:
+        return self.stats['disk_hits'] + self.stats['run_duplicates']
@@ -2,18 +2,64 @@
 import sys
 import time
 import re
+import heapq
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent / "YARS" / "src"))
 from yars.yars import YARS
 
+from rate_limiter import TokenBucket
+from reddit_cache import RedditCache
+
+# Compiled once: content_score runs on every scraped post
+PLACE_NAME_RE = re.compile('|'.join([
+    r'\b[A-Z][a-z]+ (?:Cafe|Coffee|Restaurant|Bar|Bistro|Shop|Hotel|Museum|Market|Kitchen)\b',
+    r'\bcalled [A-Z][a-z]+',
+    r'\btry [A-Z][a-z]+',
+    r'\bvisit [A-Z][a-z]+',
+    r'\brecommend [A-Z][a-z]+',
+    r'\bgo to [A-Z][a-z]+',
+]))
+# Capitalized word in the middle of a sentence: "...dinner at Jay Fai, then..."
+NAME_LIKE_RE = re.compile(r"(?<=[a-z0-9,;:] )[A-Z][\w'&-]+")
+WORD_RE = re.compile(r"[a-z']+")
+# Capitalized mid-sentence but not place names
+NOT_NAMES = {
+    'I', 'January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+    'October', 'November', 'December', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday',
+    'Saturday', 'Sunday', 'Uber', 'Grab', 'Google', 'Maps', 'Reddit', 'Airbnb', 'USD', 'EUR',
+}
+TRAVEL_KEYWORDS = {
+    'cafe', 'coffee', 'restaurant', 'restaurants', 'bar', 'bars', 'food', 'place', 'places',
+    'spot', 'spots', 'gem', 'gems', 'local', 'locals', 'eat', 'drink', 'drinks', 'market',
+    'rooftop', 'street', 'dinner', 'lunch', 'breakfast', 'brunch', 'menu', 'try', 'recommend',
+    'must', 'visit', 'neighborhood', 'area', 'shop', 'museum', 'view', 'views',
+}
+
 
 class RedditScraper:
     """Scraper for Reddit posts with full comment data."""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None, cache: Optional[RedditCache] = None):
         self.miner = YARS()
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+    
+    def _throttle(self):
+        """Wait for the shared Reddit rate limiter, if any."""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+    
+    def _fetch(self, table: str, key: str, fetch) -> Tuple[Any, bool]:
+        """Run `fetch` through the cache (if any). Returns (payload, hit_network)."""
+        def throttled_fetch():
+            self._throttle()
+            return fetch()
+        
+        if self.cache is None:
+            return throttled_fetch(), True
+        return self.cache.get_or_fetch(table, key, throttled_fetch)
     
     def search_and_scrape(
         self,
@@ -27,17 +73,31 @@ class RedditScraper:
         Args:
             search_query: Search term (e.g., "paris cafe recommendations")
             limit: Max posts to scrape
-            delay: Seconds between requests
+            delay: Seconds between requests (ignored when a rate limiter is set)
         
         Returns:
             List of post data with all required fields for harvester
         """
+        return list(self.iter_search_and_scrape(search_query, limit, delay))
+    
+    def iter_search_and_scrape(
+        self,
+        search_query: str,
+        limit: int = 10,
+        delay: float = 1.0
+    ) -> Iterator[Dict[str, Any]]:
+        """Like `search_and_scrape`, but yields each post as soon as it's scraped."""
         print(f"\n🔍 Searching: '{search_query}'")
         
-        results = self.miner.search_reddit(search_query, limit=limit)
+        results, _ = self._fetch(
+            'searches',
+            f"{search_query}|{limit}",
+            lambda: self.miner.search_reddit(search_query, limit=limit)
+        )
+        results = results or []
         print(f"   Found {len(results)} results")
         
-        scraped_posts = []
+        scraped_count = 0
         for i, result in enumerate(results[:limit], 1):
             title = result.get('title', 'No title')
             link = result.get('link', '')
@@ -50,7 +110,11 @@ class RedditScraper:
                     continue
                 
                 permalink = link.split('reddit.com')[1]
-                post_details = self.miner.scrape_post_details(permalink)
+                post_details, fetched = self._fetch(
+                    'posts',
+                    permalink,
+                    lambda: self.miner.scrape_post_details(permalink)
+                )
                 
                 if not post_details:
                     print(f"      ❌ No details returned")
@@ -70,54 +134,70 @@ class RedditScraper:
                     'search_query': search_query,
                 }
                 
-                scraped_posts.append(post_data)
-                print(f"      ✅ {num_comments} comments")
+                scraped_count += 1
+                print(f"      ✅ {num_comments} comments" + ("" if fetched else " (cached)"))
+                yield post_data
                 
-                time.sleep(delay)
+                if fetched and not self.rate_limiter:
+                    time.sleep(delay)
                 
             except Exception as e:
                 print(f"      ❌ Error: {e}")
                 continue
         
-        print(f"\n   ✅ Scraped {len(scraped_posts)}/{limit} posts")
-        
-        return scraped_posts
+        print(f"\n   ✅ Scraped {scraped_count}/{limit} posts")
     
-    def has_extractable_content(self, post_data: Dict) -> bool:
+    def has_extractable_content(self, post_data: Dict, min_score: float = 0.2) -> bool:
         """Check if post likely contains place recommendations."""
+        return self.content_score(post_data) >= min_score
+    
+    @staticmethod
+    def content_score(post_data: Dict) -> float:
+        """Local 0-1 estimate of how likely a post is to contain place recommendations.
         
-        text = post_data.get('body', '') or ''
+        Combines place-name patterns, capitalized mid-sentence words (names),
+        travel keyword density and the upvotes on the top comments. The score
+        is cached on the post as 'content_score'.
+        """
+        if 'content_score' in post_data:
+            return post_data['content_score']
         
-        comments = post_data.get('comments', [])
-        if comments:
-            sorted_comments = sorted(
-                comments,
-                key=lambda c: c.get('upvotes', 0),
-                reverse=True
-            )[:15]
-            text += ' ' + ' '.join(c.get('body', '') for c in sorted_comments)
+        comments = heapq.nlargest(15, post_data.get('comments', []), key=lambda c: c.get('upvotes', 0))
+        texts = [post_data.get('body', '') or ''] + [c.get('body', '') for c in comments]
         
-        # Place name patterns
-        place_patterns = [
-            r'\b[A-Z][a-z]+ (?:Cafe|Coffee|Restaurant|Bar|Bistro|Shop|Hotel|Museum)\b',
-            r'\bcalled [A-Z][a-z]+',
-            r'\btry [A-Z][a-z]+',
-            r'\bvisit [A-Z][a-z]+',
-            r'\brecommend [A-Z][a-z]+',
-        ]
+        words = WORD_RE.findall(' '.join(texts).lower())
+        if not words:
+            post_data['content_score'] = 0.0
+            return 0.0
         
-        for pattern in place_patterns:
-            if re.search(pattern, text):
-                return True
+        # The city etc. from the title are capitalized everywhere, not recommendations
+        title_words = set(re.findall(r'\w+', post_data.get('title', '')))
+        pattern_hits = 0
+        names = set()
+        upvotes_total = upvotes_on_names = 0
+        for i, text in enumerate(texts):
+            hits = len(PLACE_NAME_RE.findall(text))
+            found = {n for n in NAME_LIKE_RE.findall(text) if n not in NOT_NAMES and n not in title_words}
+            pattern_hits += hits
+            names |= found
+            if i:
+                upvotes = max(comments[i - 1].get('upvotes', 0), 0) + 1
+                upvotes_total += upvotes
+                if hits or found:
+                    upvotes_on_names += upvotes
         
-        if len(text) < 100:
-            return False
+        patterns = min(pattern_hits / 3, 1.0)
+        name_score = min(len(names) / 6, 1.0)
+        density = min(sum(w in TRAVEL_KEYWORDS for w in words) / len(words) / 0.04, 1.0)
+        # Do the upvotes go to comments that name places, or to chatter?
+        upvote_share = upvotes_on_names / upvotes_total if upvotes_total else 0.0
         
-        travel_keywords = ['cafe', 'coffee', 'restaurant', 'bar', 'food', 'place', 'spot', 'gem', 'local']
-        if any(kw in text.lower() for kw in travel_keywords):
-            return True
+        score = 0.3 * patterns + 0.3 * name_score + 0.15 * density + 0.25 * upvote_share
+        # Too little text to hold recommendations, however it scores
+        score *= min(len(words) / 30, 1.0)
         
-        return False
+        post_data['content_score'] = round(score, 3)
+        return post_data['content_score']
     
     def _extract_subreddit(self, permalink: str) -> str:
         """Extract subreddit name from permalink."""
@@ -150,4 +230,4 @@ if __name__ == "__main__":
         print(f"  Title: {p['title']}")
         print(f"  Subreddit: r/{p['subreddit']}")
         print(f"  Comments: {p['num_comments']}")
-        print(f"  Has extractable content: {scraper.has_extractable_content(p)}")
\ No newline at end of file
+        print(f"  Content score: {scraper.content_score(p)}")
\ No newline at end of file
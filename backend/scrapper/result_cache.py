@@ -0,0 +1,92 @@
+"""Content-addressed on-disk cache for Gemini validation/extraction results."""
+import json
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def post_content_hash(post_data: Dict) -> str:
+    """Hash the parts of a post that end up in prompts (title, body, comments)."""
+    content = {
+        'title': post_data.get('title', ''),
+        'body': post_data.get('body') or '',
+        'comments': [
+            [c.get('body', ''), c.get('upvotes', 0)]
+            for c in post_data.get('comments', [])
+        ],
+    }
+    raw = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """SQLite store keyed by (kind, model, prompt version, post content hash).
+
+    Bumping a caller's PROMPT_VERSION or changing the model makes old entries
+    unreachable, so no manual invalidation is needed after prompt edits.
+
+    Args:
+        path: SQLite file
+        enabled: False turns every lookup into a miss and skips writes
+        refresh: Ignore existing entries but overwrite them with fresh results
+    """
+
+    def __init__(self, path: Path, enabled: bool = True, refresh: bool = False):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        if enabled:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(kind: str, model: str, prompt_version: str, post_data: Dict) -> str:
+        return f"{kind}:{model}:{prompt_version}:{post_content_hash(post_data)}"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled or self.refresh:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, ensure_ascii=False)),
+            )
+            self._conn.commit()
+
+    def clear(self) -> int:
+        """Delete every entry. Returns how many were removed."""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM results").rowcount
+            self._conn.commit()
+            return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,60 @@
+"""Registry of Reddit threads already harvested, for delta (incremental) runs."""
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from checkpoint import atomic_write_json
+
+
+class ThreadRegistry:
+    """Post key -> comment count (and date) at the time the thread was processed.
+
+    Every harvest records the threads it processed; a delta run uses that to
+    skip threads that haven't changed since. Marks are held in memory until
+    `save()`, so a crashed run doesn't claim threads it never finished.
+
+    Args:
+        path: JSON file
+        min_new_comments: Comments a known thread must gain to be processed again
+    """
+
+    NEW = 'new'
+    GROWN = 'grown'
+
+    def __init__(self, path: Path, min_new_comments: int = 10):
+        self.path = Path(path)
+        self.min_new_comments = min_new_comments
+        self._threads: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._threads = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._threads)
+
+    def status(self, key: str, num_comments: int) -> Optional[str]:
+        """NEW or GROWN if the thread needs processing, None if it's unchanged."""
+        with self._lock:
+            seen = self._threads.get(key)
+        if seen is None:
+            return self.NEW
+        if num_comments - seen['num_comments'] >= self.min_new_comments:
+            return self.GROWN
+        return None
+
+    def mark(self, key: str, post: Dict):
+        with self._lock:
+            self._threads[key] = {
+                'permalink': post.get('permalink', ''),
+                'num_comments': post.get('num_comments', 0),
+                'harvested_at': datetime.now().strftime('%Y-%m-%d'),
+            }
+
+    def save(self):
+        with self._lock:
+            snapshot = dict(self._threads)
+        atomic_write_json(self.path, snapshot, indent=None)
@@ -0,0 +1,199 @@
+"""Semantic (embedding-similarity) cache for chat answers.
+
+Catches paraphrased repeats ("cheap eats in bangkok" vs "budget food bangkok")
+that the exact-match response cache misses. Only single-turn conversations
+are looked up and stored: a follow-up's meaning depends on earlier turns.
+"""
+import re
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Protocol, Sequence
+
+import numpy as np
+
+
+class Embedder(Protocol):
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an (n, dim) float32 array of embeddings."""
+        ...
+
+
+class GeminiEmbedder:
+    """Embeds text with the Gemini embedding API."""
+
+    def __init__(self, client, model: str = "text-embedding-004", dim: int = 768):
+        self.client = client
+        self.model = model
+        self.dim = dim
+        self.name = f"gemini:{model}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        response = self.client.models.embed_content(model=self.model, contents=list(texts))
+        return np.asarray([e.values for e in response.embeddings], dtype=np.float32)
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        response = await self.client.aio.models.embed_content(model=self.model, contents=list(texts))
+        return np.asarray([e.values for e in response.embeddings], dtype=np.float32)
+
+
+class HashingEmbedder:
+    """Deterministic offline embedder (hashed word + char-trigram features).
+
+    No network, stable across processes - use it in tests and benchmarks.
+    """
+
+    _TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing:{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        tokens = self._TOKEN_RE.findall(text.lower())
+        grams = []
+        for tok in tokens:
+            padded = f"#{tok}#"
+            grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return tokens + grams
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feat in self._features(text):
+                digest = hashlib.md5(feat.encode("utf-8")).digest()
+                idx = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                out[row, idx] += sign
+        return out
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class SemanticCache:
+    """Nearest-neighbour answer cache over a contiguous NumPy matrix.
+
+    Vectors are L2-normalized on insert, so a lookup is one matrix-vector
+    product plus argmax. The matrix grows by doubling up to `max_entries`;
+    after that the oldest slot is overwritten.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        threshold: float = 0.92,
+        max_entries: int = 100_000,
+        ttl_seconds: float = 6 * 3600,
+    ):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        capacity = min(1024, max_entries)
+        self._vectors = np.zeros((capacity, embedder.dim), dtype=np.float32)
+        self._created_at = np.zeros(capacity, dtype=np.float64)
+        self._answers: List[Optional[str]] = [None] * capacity
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+        # A miss is followed by `add` for the same text; don't embed it twice
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def _recalled(self, text: str) -> Optional[np.ndarray]:
+        with self._lock:
+            return self._recent.get(text)
+
+    def _remember(self, text: str, vector: np.ndarray) -> np.ndarray:
+        with self._lock:
+            self._recent[text] = vector
+            if len(self._recent) > 256:
+                self._recent.popitem(last=False)
+        return vector
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        vector = self._recalled(text)
+        if vector is not None:
+            return vector
+        return self._remember(text, _normalize_rows(self.embedder.embed([text]))[0])
+
+    async def _aembed_one(self, text: str) -> np.ndarray:
+        vector = self._recalled(text)
+        if vector is not None:
+            return vector
+        aembed = getattr(self.embedder, "aembed", None)
+        vectors = await aembed([text]) if aembed else await asyncio.to_thread(self.embedder.embed, [text])
+        return self._remember(text, _normalize_rows(vectors)[0])
+
+    def _search(self, query: np.ndarray) -> Optional[str]:
+        with self._lock:
+            if self._size == 0:
+                self.misses += 1
+                return None
+
+            scores = self._vectors[:self._size] @ query
+            expired = self._created_at[:self._size] < time.time() - self.ttl_seconds
+            scores[expired] = -1.0
+
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return self._answers[best]
+
+    def _grow(self):
+        capacity = min(len(self._answers) * 2, self.max_entries)
+        vectors = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:self._size] = self._vectors[:self._size]
+        created_at = np.zeros(capacity, dtype=np.float64)
+        created_at[:self._size] = self._created_at[:self._size]
+        self._vectors = vectors
+        self._created_at = created_at
+        self._answers.extend([None] * (capacity - len(self._answers)))
+
+    def _insert(self, vector: np.ndarray, answer: str):
+        with self._lock:
+            if self._size == len(self._answers) < self.max_entries:
+                self._grow()
+            slot = self._next
+            self._vectors[slot] = vector
+            self._created_at[slot] = time.time()
+            self._answers[slot] = answer
+            self._next = (slot + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def lookup(self, text: str) -> Optional[str]:
+        return self._search(self._embed_one(text))
+
+    async def alookup(self, text: str) -> Optional[str]:
+        # The matrix product takes tens of ms at 100k entries: keep it off the event loop
+        return await asyncio.to_thread(self._search, await self._aembed_one(text))
+
+    def add(self, text: str, answer: str):
+        self._insert(self._embed_one(text), answer)
+
+    async def aadd(self, text: str, answer: str):
+        await asyncio.to_thread(self._insert, await self._aembed_one(text), answer)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": self._size,
+            "threshold": self.threshold,
+        }
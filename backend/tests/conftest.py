@@ -0,0 +1,63 @@
+"""Shared setup for the backend tests: import paths and offline defaults.
+
+Run from backend/: `python -m pytest -q tests`. Nothing here talks to Gemini,
+Reddit or Chroma; clients are replaced with fakes in each test.
+"""
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(BACKEND_DIR / "scrapper"))
+
+os.environ.setdefault("GEMINI_API_KEY", "test-dummy-key")
+
+
+class FakeLLM:
+    """Stands in for the GoogleGenAI chat LLM: streams a canned answer and counts calls."""
+
+    def __init__(self, answer: str = "try the rooftop bar on level 9 ✨"):
+        self.answer = answer
+        self.calls = 0
+
+    def _chunks(self):
+        words = self.answer.split(" ")
+        for i, word in enumerate(words):
+            yield SimpleNamespace(delta=word if i == 0 else " " + word, raw={})
+
+    async def astream_chat(self, messages):
+        self.calls += 1
+
+        async def gen():
+            for chunk in self._chunks():
+                yield chunk
+        return gen()
+
+
+def user_messages(*texts):
+    """UI messages (the frontend's shape) alternating user/assistant, starting with the user."""
+    return [
+        {"id": f"m{i}", "role": "user" if i % 2 == 0 else "assistant", "parts": [{"type": "text", "text": text}]}
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    """llm_client with a FakeLLM and every cache, retrieval and windowing step switched off.
+
+    Tests turn on the piece they exercise by setting it on `chat.client`.
+    Needs llama_index (ChatMessage), like the chat path itself.
+    """
+    pytest.importorskip("llama_index.core")
+    import llm_client
+
+    fake = FakeLLM()
+    monkeypatch.setattr(llm_client, "llm", fake)
+    for name in ("response_cache", "semantic_cache", "place_retriever", "prompt_cache", "conversation_window"):
+        monkeypatch.setattr(llm_client, name, None)
+    return SimpleNamespace(client=llm_client, llm=fake)
@@ -0,0 +1,120 @@
+import json
+
+import pytest
+
+from entity_resolution import EntityResolver, _Entity, resolve_city_files
+from place_extractor import PlaceExtractor
+
+
+def place(name, city="Tokyo", category="cafe", url=None):
+    return {
+        "name": name, "city": city, "country": "Japan", "category": category,
+        "tags": ["coffee"], "vibe": f"{name} vibes", "confidence": "medium", "mention_count": 1,
+        "sources": [{"url": url or f"https://reddit.com/{name}"}],
+    }
+
+
+def similarity(a, b):
+    return EntityResolver(lambda kept, new: None).similarity(_Entity(a), _Entity(b))
+
+
+@pytest.mark.parametrize("other", ["ONIBUS", "Onibus Coffee", "Onibus Coffee Nakameguro", "Onibus Café"])
+def test_name_variants_match(other):
+    assert similarity(place("Onibus Coffee"), place(other)) == 1.0
+
+
+@pytest.mark.parametrize("a, b", [
+    (place("Onibus Coffee"), place("Onibus Nakameguro", category="bar")),  # different kind of place
+    (place("Bo Bar"), place("Bo Innovation")),  # shared prefix too short to be a branch
+    (place("Blue Bottle"), place("Blue Door")),
+    # A generic leading word is not a branch name
+    (place("Mercado", city="Madrid", category="market"), place("Mercado de San Miguel", city="Madrid", category="market")),
+    (place("Trattoria", city="Rome", category="restaurant"), place("Trattoria da Enzo", city="Rome", category="restaurant")),
+])
+def test_different_places_dont_match(a, b):
+    assert similarity(a, b) < 0.65
+
+
+def test_same_name_in_another_city_is_never_compared():
+    resolver = EntityResolver(lambda kept, new: None)
+    resolver.add(place("Onibus Coffee"))
+    resolver.add(place("Onibus Coffee", city="Osaka"))
+
+    assert len(resolver.entities) == 2
+    assert resolver.comparisons == 0
+
+
+def test_merge_keeps_first_record_and_records_alias():
+    resolver = EntityResolver(PlaceExtractor._merge_into)
+    kept = resolver.add(place("Onibus Coffee"))
+    assert resolver.add(place("ONIBUS")) is kept
+    assert resolver.add(place("Onibus Coffee Nakameguro")) is kept
+
+    assert kept["aliases"] == ["ONIBUS", "Onibus Coffee Nakameguro"]
+    assert kept["mention_count"] == 3
+    assert resolver.merges == [("Onibus Coffee", "ONIBUS"), ("Onibus Coffee", "Onibus Coffee Nakameguro")]
+
+
+@pytest.mark.parametrize("max_block_size, merged", [(50, 1), (2, 0)])
+def test_oversized_blocks_stop_collecting_candidates(max_block_size, merged):
+    resolver = EntityResolver(PlaceExtractor._merge_into, max_block_size=max_block_size)
+    for name in ("Somtam Nua", "Somtam Derm", "Somtam Jay So"):
+        resolver.add(place(name, city="Bangkok", category="restaurant"))
+    comparisons = resolver.comparisons
+
+    resolver.add(place("SOMTAM", city="Bangkok", category="restaurant"))
+
+    # "somtam" / "som" blocks hold 3 places: searched under the default cap, skipped over 2
+    assert resolver.merged == merged
+    assert resolver.comparisons - comparisons == (3 if merged else 0)
+
+
+def write_city(cities_dir, stem, places):
+    path = cities_dir / f"{stem}.json"
+    path.write_text(json.dumps(places))
+    return path
+
+
+def test_dry_run_lists_merges_and_writes_nothing(tmp_path, capsys):
+    cities = tmp_path / "cities"
+    cities.mkdir()
+    path = write_city(cities, "tokyo", [place("Onibus Coffee"), place("ONIBUS"), place("Bear Pond")])
+    original = path.read_text()
+
+    counts = resolve_city_files(cities, dry_run=True, backup_dir=tmp_path / "backup")
+
+    assert counts == {"files": 1, "before": 3, "after": 2, "merged": 1}
+    assert "would merge 'ONIBUS' → 'Onibus Coffee'" in capsys.readouterr().out
+    assert path.read_text() == original
+    assert not (tmp_path / "backup").exists()
+
+
+def test_rewrite_backs_up_original_files_first(tmp_path):
+    cities = tmp_path / "cities"
+    cities.mkdir()
+    path = write_city(cities, "tokyo", [place("Onibus Coffee"), place("ONIBUS")])
+    original = path.read_text()
+
+    resolve_city_files(cities, backup_dir=tmp_path / "backup")
+
+    assert (tmp_path / "backup" / "tokyo.json").read_text() == original
+    assert [p["name"] for p in json.loads(path.read_text())] == ["Onibus Coffee"]
+
+
+def test_rewrite_regenerates_all_places_and_every_city_format(tmp_path):
+    from place_store import iter_places, jsonl_path, write_places_file
+
+    cities = tmp_path / "cities"
+    cities.mkdir()
+    write_city(cities, "tokyo", [place("Onibus Coffee"), place("ONIBUS")])
+    write_places_file(jsonl_path(cities / "tokyo"), [place("Onibus Coffee"), place("ONIBUS")])
+    write_city(cities, "osaka", [place("Mel Coffee", city="Osaka")])
+    combined = tmp_path / "all_places.json"
+    combined.write_text(json.dumps([place("Onibus Coffee"), place("ONIBUS"), place("Mel Coffee", city="Osaka")]))
+
+    resolve_city_files(cities, backup_dir=tmp_path / "backup")
+
+    assert [p["name"] for p in json.loads(combined.read_text())] == ["Mel Coffee", "Onibus Coffee"]
+    assert [p["name"] for p in json.loads((cities / "tokyo.json").read_text())] == ["Onibus Coffee"]
+    assert [p["name"] for p in iter_places(jsonl_path(cities / "tokyo"))] == ["Onibus Coffee"]
+    assert (tmp_path / "backup" / "all_places.json").exists()
@@ -0,0 +1,121 @@
+import time
+import asyncio
+
+import pytest
+
+from gemini_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class Unavailable(Exception):
+    code = 503
+
+
+def open_breaker():
+    """A breaker that has tripped and whose cooldown is over, so the next call is the probe."""
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0.01)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.02)
+    return breaker
+
+
+def test_breaker_opens_and_probe_success_closes():
+    breaker = open_breaker()
+    caller = ResilientCaller("test", max_attempts=1, breaker=breaker, wait_when_open=False)
+    assert caller.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_failed_probe_reopens():
+    breaker = open_breaker()
+    caller = ResilientCaller("test", max_attempts=1, breaker=breaker, wait_when_open=False)
+
+    def fail():
+        raise Unavailable("503 UNAVAILABLE")
+
+    with pytest.raises(Unavailable):
+        caller.call(fail)
+    assert breaker.state == "open"
+    assert not breaker._probing
+
+
+def test_cancelled_async_probe_releases_breaker():
+    breaker = open_breaker()
+    caller = ResilientCaller("test", max_attempts=1, breaker=breaker, wait_when_open=False)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def run():
+        probe = asyncio.create_task(caller.acall(hang))
+        await asyncio.sleep(0.01)
+        assert breaker.state == "half_open"
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # The next request becomes the probe instead of being shed forever
+        return await caller.acall(asyncio.sleep, 0, "ok")
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == "closed"
+    assert caller.counts["shed"] == 0
+
+
+def test_interrupted_sync_probe_releases_breaker():
+    breaker = open_breaker()
+    caller = ResilientCaller("test", max_attempts=1, breaker=breaker, wait_when_open=False)
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        caller.call(interrupted)
+    assert not breaker._probing
+    assert caller.call(lambda: "ok") == "ok"
+
+
+def test_probe_in_flight_sheds_other_calls():
+    breaker = open_breaker()
+    caller = ResilientCaller("test", max_attempts=1, breaker=breaker, wait_when_open=False)
+    assert breaker.allow() == 0.0  # someone else holds the probe
+    with pytest.raises(CircuitOpenError):
+        caller.call(lambda: "ok")
+
+
+def rate_limited(retry_delay):
+    errors = pytest.importorskip("google.genai.errors")
+    return errors.ClientError(429, {"error": {
+        "code": 429, "message": "Resource exhausted", "status": "RESOURCE_EXHAUSTED",
+        "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": retry_delay}],
+    }})
+
+
+def test_shedding_caller_gives_up_on_long_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    caller = ResilientCaller("chat", max_attempts=3, max_delay=8, wait_when_open=False)
+    error = rate_limited("45s")
+
+    def fail():
+        raise error
+
+    with pytest.raises(type(error)):
+        caller.call(fail)
+    assert sleeps == []
+    assert (caller.counts["attempts"], caller.counts["gave_up"]) == (1, 1)
+
+
+def test_waiting_caller_honours_long_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    caller = ResilientCaller("harvest", max_attempts=2, max_delay=8)
+    attempts = []
+
+    def fail_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise rate_limited("45s")
+        return "ok"
+
+    assert caller.call(fail_once) == "ok"
+    assert sleeps == [45.0]
@@ -0,0 +1,176 @@
+import time
+import random
+import threading
+
+import pytest
+
+pytest.importorskip("yars")
+
+import harvester as harvester_module
+from harvester import Harvester
+from pipeline import TurnOrder
+
+
+def post(thread_id, query, comments=20):
+    return {
+        "title": f"Thread {thread_id}",
+        "url": f"https://www.reddit.com/r/travel/comments/{thread_id}/x/",
+        "permalink": f"/r/travel/comments/{thread_id}/x/",
+        "subreddit": "travel",
+        "num_comments": comments,
+        "search_query": query,
+        "selftext": "",
+        "comments": [],
+    }
+
+
+class FakeScraper:
+    """Search results per query; `jitter` sleeps randomly so concurrent queries finish out of order."""
+
+    def __init__(self, results, jitter=0.0, seed=0):
+        self.results = results
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def iter_search_and_scrape(self, search_query, limit, delay):
+        for thread_id in self.results.get(search_query, [])[:limit]:
+            if self.jitter:
+                with self.lock:
+                    pause = self.rng.uniform(0, self.jitter)
+                time.sleep(pause)
+            yield post(thread_id, search_query)
+
+    def has_extractable_content(self, post_data, min_score=0.2):
+        return True
+
+    @staticmethod
+    def content_score(post_data):
+        return 0.5  # passes the pre-filter, still goes to validation
+
+
+def make_harvester(tmp_path, monkeypatch, results, failing=(), jitter=0.0, seed=0, **options):
+    monkeypatch.setattr(harvester_module, "THREAD_REGISTRY_FILE", tmp_path / "thread_registry.json")
+    monkeypatch.setattr(harvester_module, "TOKEN_USAGE_FILE", tmp_path / "token_usage.jsonl")
+    monkeypatch.setattr(harvester_module, "JOURNAL_FILE", tmp_path / "journal.jsonl")
+    h = Harvester(use_cache=False, use_reddit_cache=False, checkpoint=False, batch_extraction=False, **options)
+    h.scraper = FakeScraper(results, jitter, seed)
+
+    def validate_posts(posts, **kwargs):
+        return [
+            {"has_recommendations": False, "error": "503"} if p["title"] in failing
+            else {"has_recommendations": True}
+            for p in posts
+        ]
+
+    def extract_from_post(post_data, strict=False):
+        thread_id = post_data["permalink"].split("/")[4]
+        if f"extract:{thread_id}" in failing:
+            raise RuntimeError("503 UNAVAILABLE")
+        return [h.extractor._build_place(
+            name=name, city="Tokyo", country="Japan", category="cafe",
+            tags=["coffee"], vibe="Tiny roaster with great flat whites", confidence="high", post_data=post_data,
+        ) for name in (f"Cafe {thread_id}", "Shared Spot")]
+
+    h.validator.validate_posts = validate_posts
+    h.extractor.extract_from_post = extract_from_post
+    return h
+
+
+def test_failed_posts_are_not_recorded_for_delta_runs(tmp_path, monkeypatch):
+    results = {"Tokyo cafes": ["a1", "b2", "c3"]}
+    h = make_harvester(tmp_path, monkeypatch, results, failing={"Thread b2", "extract:c3"})
+    h.harvest_city("Tokyo", query_patterns=["{city} cafes"])
+    h.record_processed()
+
+    assert h.gemini_failures == {"validate": 1, "extract": 1}
+    assert h.registry.status("a1", 20) is None  # processed, skipped next time
+    assert h.registry.status("b2", 20) == "new"  # validation failed: retried
+    assert h.registry.status("c3", 20) == "new"  # extraction failed: retried
+
+
+def test_delta_run_retries_failed_posts_only(tmp_path, monkeypatch):
+    results = {"Tokyo cafes": ["a1", "b2"]}
+    first = make_harvester(tmp_path, monkeypatch, results, failing={"extract:b2"})
+    first.harvest_city("Tokyo", query_patterns=["{city} cafes"])
+    first.record_processed()
+
+    second = make_harvester(tmp_path, monkeypatch, results, delta=True)
+    result = second.harvest_city("Tokyo", query_patterns=["{city} cafes"])
+    assert second.delta_stats == {"new": 1, "grown": 0, "unchanged": 1}
+    assert [p["name"] for p in result["places"]] == ["Cafe b2", "Shared Spot"]
+
+
+# Threads found by several queries; which query claims them decides merge and source order
+OVERLAPPING = {
+    "Tokyo cafes": ["a1", "b2", "c3", "d4"],
+    "Tokyo coffee": ["c3", "e5", "a1"],
+    "Tokyo hidden gems": ["e5", "f6", "b2", "g7"],
+    "Tokyo late night": ["g7", "a1", "h8"],
+}
+PATTERNS = ["{city} cafes", "{city} coffee", "{city} hidden gems", "{city} late night"]
+
+
+def harvest(tmp_path, monkeypatch, seed=0, **options):
+    h = make_harvester(tmp_path, monkeypatch, OVERLAPPING, jitter=0.01 if options else 0.0, seed=seed, **options)
+    result = h.harvest_city("Tokyo", query_patterns=PATTERNS)
+    return result, h
+
+
+@pytest.mark.parametrize("mode", ["concurrent", "pipelined"])
+def test_parallel_modes_match_sequential(tmp_path, monkeypatch, mode):
+    expected, sequential = harvest(tmp_path, monkeypatch)
+    shared = next(p for p in expected["places"] if p["name"] == "Shared Spot")
+    assert shared["mention_count"] == 8  # each thread counted once
+    assert shared["sources"][0]["search_queries"] == ["Tokyo cafes", "Tokyo coffee", "Tokyo late night"]
+
+    for seed in range(4):
+        result, h = harvest(tmp_path, monkeypatch, seed=seed, **{mode: True})
+        assert result == expected, f"seed {seed}"
+        assert h.duplicate_posts == sequential.duplicate_posts
+
+
+def test_pipelined_validation_is_batched(tmp_path, monkeypatch):
+    monkeypatch.setattr(harvester_module, "VALIDATION_WORKERS", 1)
+    results = {"Tokyo cafes": ["a1", "b2", "c3", "d4", "e5", "f6"]}
+    h = make_harvester(tmp_path, monkeypatch, results, pipelined=True)
+    batches = []
+    validate_posts = h.validator.validate_posts
+
+    def recording(posts, **kwargs):
+        batches.append(len(posts))
+        return validate_posts(posts, **kwargs)
+
+    h.validator.validate_posts = recording
+    result = h.harvest_city("Tokyo", query_patterns=["{city} cafes"])
+
+    assert batches == [6]
+    assert result["posts_count"] == 6
+    assert h.stage_stats["validate"].processed == 6
+
+
+def test_turn_order_releases_in_plan_order():
+    turns = TurnOrder()
+    turns.plan(["q1", "q2", "q3"])
+    order = []
+
+    def take(key, delay):
+        time.sleep(delay)
+        turns.wait(key)
+        order.append(key)
+        turns.done(key)
+
+    workers = [threading.Thread(target=take, args=(k, d)) for k, d in (("q3", 0), ("q2", 0.01), ("q1", 0.02))]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(5)
+    assert order == ["q1", "q2", "q3"]
+
+    turns.wait("never planned")  # doesn't block
+
+
+def test_unknown_output_format_fails_before_harvesting(tmp_path, monkeypatch):
+    monkeypatch.setattr(harvester_module, "OUTPUT_FORMAT", "csv")
+    with pytest.raises(ValueError, match="Unknown output format: 'csv'"):
+        make_harvester(tmp_path, monkeypatch, {})
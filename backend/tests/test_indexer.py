@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from indexer import PlaceIndexer
+from semantic_cache import HashingEmbedder
+
+PLACES = [
+    {"name": "Onibus Coffee", "city": "Tokyo", "country": "Japan", "category": "cafe",
+     "vibe": "tiny roaster by the tracks", "tags": ["coffee"], "mention_count": 4},
+    {"name": "Bar Trench", "city": "Tokyo", "country": "Japan", "category": "bar",
+     "vibe": "absinthe cocktails", "tags": ["cocktails"], "mention_count": 2},
+    {"name": "Tasca do Chico", "city": "Lisbon", "country": "Portugal", "category": "restaurant",
+     "vibe": "fado nights", "tags": ["live_music"], "mention_count": 3},
+]
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return super().embed(texts)
+
+
+def build(tmp_path, places, **options):
+    """Write `places` as the harvest output and sync a fresh indexer (as a new run would) with it."""
+    source = tmp_path / "all_places.json"
+    source.write_text(json.dumps(places))
+    embedder = CountingEmbedder()
+    indexer = PlaceIndexer(embedder, index_dir=tmp_path / "index", batch_size=2)
+    counts = indexer.build(indexer.load_places(source), **options)
+    return counts, indexer, embedder
+
+
+def indexed(indexer):
+    got = indexer.collection.get(include=["metadatas"])
+    return {pid: json.loads(meta["place_json"]) for pid, meta in zip(got["ids"], got["metadatas"])}
+
+
+def test_first_build_embeds_everything_and_rerun_embeds_nothing(tmp_path):
+    counts, indexer, embedder = build(tmp_path, PLACES)
+    assert counts == {"total": 3, "embedded": 3, "metadata_updated": 0, "unchanged": 0, "removed": 0}
+    assert len(embedder.embedded) == 3
+    assert set(indexer.manifest) == {"onibus coffee_tokyo", "bar trench_tokyo", "tasca do chico_lisbon"}
+
+    counts, _, embedder = build(tmp_path, PLACES)
+    assert counts["unchanged"] == 3
+    assert embedder.embedded == []
+
+
+def test_added_place_is_the_only_one_embedded(tmp_path):
+    build(tmp_path, PLACES[:2])
+    counts, indexer, embedder = build(tmp_path, PLACES)
+
+    assert (counts["embedded"], counts["unchanged"]) == (1, 2)
+    assert len(embedder.embedded) == 1 and "Tasca do Chico" in embedder.embedded[0]
+    assert "tasca do chico_lisbon" in indexed(indexer)
+
+
+def test_changed_vibe_is_re_embedded(tmp_path):
+    build(tmp_path, PLACES)
+    changed = [dict(PLACES[0], vibe="standing-room espresso bar")] + PLACES[1:]
+    counts, indexer, embedder = build(tmp_path, changed)
+
+    assert (counts["embedded"], counts["unchanged"]) == (1, 2)
+    assert "standing-room espresso bar" in embedder.embedded[0]
+    assert indexed(indexer)["onibus coffee_tokyo"]["vibe"] == "standing-room espresso bar"
+
+
+def test_changed_mention_count_only_updates_metadata(tmp_path):
+    build(tmp_path, PLACES)
+    changed = [dict(PLACES[0], mention_count=9)] + PLACES[1:]
+    counts, indexer, embedder = build(tmp_path, changed)
+
+    assert (counts["embedded"], counts["metadata_updated"]) == (0, 1)
+    assert embedder.embedded == []
+    assert indexed(indexer)["onibus coffee_tokyo"]["mention_count"] == 9
+
+    counts, _, _ = build(tmp_path, changed)
+    assert counts["unchanged"] == 3
+
+
+def test_deleted_place_is_pruned_from_index_and_manifest(tmp_path):
+    build(tmp_path, PLACES)
+    counts, indexer, embedder = build(tmp_path, PLACES[1:])
+
+    assert (counts["removed"], counts["unchanged"]) == (1, 2)
+    assert embedder.embedded == []
+    assert "onibus coffee_tokyo" not in indexed(indexer)
+    manifest = json.loads(indexer.manifest_file.read_text())
+    assert "onibus coffee_tokyo" not in manifest["places"]
+
+
+def test_no_prune_keeps_deleted_place(tmp_path):
+    build(tmp_path, PLACES)
+    counts, indexer, _ = build(tmp_path, PLACES[1:], prune=False)
+
+    assert counts["removed"] == 0
+    assert "onibus coffee_tokyo" in indexed(indexer)
+
+
+def test_rebuild_switches_embedder(tmp_path):
+    build(tmp_path, PLACES)
+    other = HashingEmbedder(dim=128)
+    assert other.name != CountingEmbedder().name
+
+    with pytest.raises(ValueError, match="Rebuild the index"):
+        PlaceIndexer(other, index_dir=tmp_path / "index")
+
+    indexer = PlaceIndexer(other, index_dir=tmp_path / "index", rebuild=True)
+    assert indexer.manifest == {}
+    counts = indexer.build(PLACES)
+    assert (counts["embedded"], counts["removed"]) == (3, 0)
+    assert indexer.collection.metadata["embedder"] == other.name
@@ -0,0 +1,32 @@
+import time
+
+from pipeline import Pipeline, Stage
+
+
+def test_batched_stage_gets_lists_and_passes_every_item_on():
+    batches = []
+
+    def double(batch):
+        batches.append(list(batch))
+        for n in batch:
+            yield n * 2
+
+    stages = [Stage('source', lambda n: [n]), Stage('double', double, batch_size=4, batch_wait=0.2)]
+    results = Pipeline(stages).run(range(10))
+
+    assert sorted(results) == [n * 2 for n in range(10)]
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert stages[1].stats.processed == 10
+
+
+def test_batch_window_flushes_partial_batches():
+    def slow_source(n):
+        time.sleep(0.05)
+        yield n
+
+    sizes = []
+    stages = [Stage('source', slow_source), Stage('sink', lambda b: sizes.append(len(b)) or b, batch_size=10)]
+    Pipeline(stages).run(range(3))
+
+    # No batch_wait: each item goes on as soon as nothing else is queued behind it
+    assert sizes == [1, 1, 1]
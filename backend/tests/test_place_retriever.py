@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+from place_retriever import PlaceRetriever, open_collection, upsert_places
+from semantic_cache import HashingEmbedder
+
+PLACES = [
+    {"name": "Onibus Coffee", "city": "Tokyo", "country": "Japan", "category": "cafe",
+     "vibe": "tiny roaster by the tracks", "tags": ["coffee", "hidden_gem"], "mention_count": 4},
+    {"name": "Bar Trench", "city": "Tokyo", "country": "Japan", "category": "bar",
+     "vibe": "absinthe cocktails", "tags": ["cocktails"], "mention_count": 2},
+    {"name": "Tasca do Chico", "city": "Lisbon", "country": "Portugal", "category": "restaurant",
+     "vibe": "fado nights", "tags": ["live_music"], "mention_count": 3},
+]
+
+
+class CountingCollection:
+    """Wraps a Chroma collection, noting which thread makes each call."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        def call(*args, **kwargs):
+            self.calls.append((name, threading.current_thread()))
+            return method(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def retriever(tmp_path):
+    embedder = HashingEmbedder()
+    upsert_places(open_collection(tmp_path, embedder), PLACES, embedder)
+    retriever = PlaceRetriever(embedder, index_dir=tmp_path, top_k=2)
+    retriever.collection = CountingCollection(retriever.collection)
+    return retriever
+
+
+def test_retrieve_filters_to_the_named_city(retriever):
+    hits = retriever.retrieve("cocktail bars in tokyo")
+    assert hits and all(h["place"]["city"] == "Tokyo" for h in hits)
+    assert hits[0]["place"]["name"] == "Bar Trench"
+
+
+def test_city_list_is_cached_between_queries(retriever):
+    for _ in range(5):
+        retriever.retrieve("coffee in tokyo")
+    names = [name for name, _ in retriever.collection.calls]
+    assert names.count("get") == 1
+    assert names.count("count") == 1
+
+
+def test_aretrieve_keeps_chroma_off_the_event_loop(retriever):
+    async def run():
+        loop_thread = threading.current_thread()
+        hits = await retriever.aretrieve("fado in lisbon")
+        return loop_thread, hits
+
+    loop_thread, hits = asyncio.run(run())
+    assert hits[0]["place"]["name"] == "Tasca do Chico"
+    assert retriever.collection.calls
+    assert all(thread is not loop_thread for _, thread in retriever.collection.calls)
+
+
+def test_new_places_show_up_after_refresh(retriever, tmp_path):
+    retriever.refresh_seconds = 0
+    assert retriever._cities() == ["lisbon", "tokyo"]
+    extra = {"name": "Cafe Kitsune", "city": "Paris", "category": "cafe", "tags": [], "vibe": ""}
+    upsert_places(retriever.collection.collection, [extra], retriever.embedder)
+    assert "paris" in retriever._cities()
+
+
+def test_unusable_index_leaves_chat_grounded_only(tmp_path, monkeypatch):
+    import llm_client
+
+    embedder = HashingEmbedder()
+    upsert_places(open_collection(tmp_path, embedder), PLACES, embedder)
+    # The chat embedder doesn't match the one the index was built with
+    monkeypatch.setattr(llm_client, "GeminiEmbedder", lambda client: HashingEmbedder(dim=128))
+    monkeypatch.setattr(llm_client, "PlaceRetriever", lambda e, top_k: PlaceRetriever(e, index_dir=tmp_path, top_k=top_k))
+
+    assert llm_client._open_place_retriever() is None
@@ -0,0 +1,102 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from prompt_cache import SystemPromptCache
+
+pytest.importorskip("google.genai")
+
+
+class FakeCaches:
+    """google.genai `client.caches`: records which thread made each API call."""
+
+    def __init__(self, fail=False, existing=()):
+        self.fail = fail
+        self.existing = list(existing)
+        self.threads = []
+        self.created = 0
+
+    def list(self):
+        self.threads.append(threading.current_thread())
+        return list(self.existing)
+
+    def create(self, model, config):
+        self.threads.append(threading.current_thread())
+        if self.fail:
+            raise RuntimeError("400 INVALID_ARGUMENT: cached content is too small")
+        self.created += 1
+        return entry(f"cachedContents/{self.created}", config.display_name, model)
+
+
+def entry(name, display_name, model, minutes=60):
+    return SimpleNamespace(
+        name=name,
+        display_name=display_name,
+        model=f"models/{model}",
+        expire_time=datetime.now(timezone.utc) + timedelta(minutes=minutes),
+        usage_metadata=SimpleNamespace(total_token_count=2048),
+    )
+
+
+def make_cache(caches):
+    return SystemPromptCache(SimpleNamespace(caches=caches), "gemini-2.5-flash", "system prompt", retry_after=300)
+
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "prompt-cache":
+            thread.join(5)
+
+
+def test_name_creates_in_background_and_goes_inline_meanwhile():
+    caches = FakeCaches()
+    cache = make_cache(caches)
+
+    assert cache.name() is None  # the request goes inline
+    wait_for_refresh()
+    assert cache.name() == "cachedContents/1"
+    assert threading.current_thread() not in caches.threads
+    assert cache.stats()["created"] == 1
+
+
+def test_refresh_adopts_another_workers_entry():
+    probe = make_cache(FakeCaches())
+    caches = FakeCaches(existing=[entry("cachedContents/shared", probe.display_name, "gemini-2.5-flash")])
+    cache = make_cache(caches)
+
+    assert cache.refresh() == "cachedContents/shared"
+    assert caches.created == 0 and cache.stats()["reused"] == 1
+
+
+def test_failed_creation_backs_off_without_blocking_requests():
+    caches = FakeCaches(fail=True)
+    cache = make_cache(caches)
+
+    assert cache.name() is None
+    wait_for_refresh()
+    calls = len(caches.threads)
+    assert cache.name() is None
+    wait_for_refresh()
+    assert len(caches.threads) == calls  # no new attempt until retry_after has passed
+    assert cache.stats()["failures"] == 1
+
+
+def test_invalidated_entry_is_replaced():
+    cache = make_cache(FakeCaches())
+    name = cache.refresh()
+    cache.invalidate(name, RuntimeError("404 NOT_FOUND: cached content not found"))
+    assert cache.name() is None
+    wait_for_refresh()
+    assert cache.name() == "cachedContents/2"
+
+
+def test_prompt_under_caching_minimum_is_not_cached(monkeypatch):
+    import llm_client
+
+    monkeypatch.setattr(llm_client, "PROMPT_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_client, "PROMPT_CACHE_MIN_TOKENS", 1024)
+    assert not llm_client._prompt_cache_fits()  # SYSTEM_PROMPT is ~700 tokens
+    monkeypatch.setattr(llm_client, "PROMPT_CACHE_MIN_TOKENS", 100)
+    assert llm_client._prompt_cache_fits()
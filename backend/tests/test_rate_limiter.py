@@ -0,0 +1,20 @@
+import pytest
+
+from rate_limiter import TokenBucket
+
+
+def test_burst_is_free_then_rate_limited():
+    bucket = TokenBucket(rate=100, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert bucket.waited_seconds == 0
+
+    bucket.acquire()
+    assert bucket.waited_seconds > 0
+
+
+def test_more_tokens_than_capacity_is_rejected():
+    bucket = TokenBucket(rate=100, capacity=2)
+    with pytest.raises(ValueError, match="capacity"):
+        bucket.acquire(3)
+    bucket.acquire(2)  # a full bucket's worth is fine
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from response_cache import InMemoryResponseCache, ResponseCache, SQLiteResponseCache, make_cache_key
+
+from conftest import user_messages
+
+
+def turns(*texts):
+    return [SimpleNamespace(role="user" if i % 2 == 0 else "assistant", content=t) for i, t in enumerate(texts)]
+
+
+def test_cache_key_ignores_case_and_whitespace():
+    assert make_cache_key(turns("Cheap eats in  Lisbon?"), "m") == make_cache_key(turns("cheap eats in lisbon?"), "m")
+    assert make_cache_key(turns("cheap eats in lisbon?"), "m") != make_cache_key(turns("cheap eats in porto?"), "m")
+    assert make_cache_key(turns("q"), "m", True) != make_cache_key(turns("q"), "m", False)
+
+
+def test_memory_cache_ttl_and_lru():
+    cache = InMemoryResponseCache(ttl_seconds=60, max_entries=2)
+    assert len(cache) == 0 and not cache  # empty is falsy: callers must test `is not None`
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+    expired = InMemoryResponseCache(ttl_seconds=0)
+    expired.set("a", "1")
+    assert expired.get("a") is None
+
+
+def test_incomplete_backend_fails_when_built():
+    class NoLen(ResponseCache):
+        def _get(self, key, now):
+            return None
+
+        def _set(self, key, value, now):
+            pass
+
+    with pytest.raises(TypeError, match="__len__"):
+        NoLen()
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    SQLiteResponseCache(path).set("k", "answer")
+    assert SQLiteResponseCache(path).get("k") == "answer"
+
+
+def test_second_identical_request_served_from_cache(chat):
+    chat.client.response_cache = InMemoryResponseCache()
+    messages = user_messages("cheap eats in lisbon?")
+
+    first = "".join(chat.client.stream_chat_to_gemini(messages))
+    second = "".join(chat.client.stream_chat_to_gemini(messages))
+
+    assert second == first
+    assert chat.llm.calls == 1
+    assert chat.client.response_cache.stats()["hits"] == 1
+
+
+def test_async_second_identical_request_served_from_cache(chat):
+    chat.client.response_cache = InMemoryResponseCache()
+    messages = user_messages("rooftop bars in porto?")
+
+    async def ask():
+        return "".join([piece async for piece in chat.client.astream_chat_to_gemini(messages)])
+
+    first = asyncio.run(ask())
+    assert asyncio.run(ask()) == first
+    assert chat.llm.calls == 1
+
+
+class ThreadRecordingCache(SQLiteResponseCache):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def _get(self, key, now):
+        self.threads.append(threading.current_thread())
+        return super()._get(key, now)
+
+    def _set(self, key, value, now):
+        self.threads.append(threading.current_thread())
+        super()._set(key, value, now)
+
+
+def test_async_chat_keeps_sqlite_cache_off_the_event_loop(chat, tmp_path):
+    cache = chat.client.response_cache = ThreadRecordingCache(tmp_path / "cache.sqlite3")
+
+    async def ask():
+        loop_thread = threading.current_thread()
+        answer = "".join([piece async for piece in chat.client.astream_chat_to_gemini(user_messages("tapas in madrid"))])
+        return loop_thread, answer
+
+    loop_thread, answer = asyncio.run(ask())
+    assert answer == chat.llm.answer
+    assert len(cache.threads) == 2  # miss, then store
+    assert all(thread is not loop_thread for thread in cache.threads)
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from semantic_cache import HashingEmbedder, SemanticCache
+
+from conftest import user_messages
+
+
+class CountingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return super().embed(texts)
+
+
+class BrokenEmbedder(HashingEmbedder):
+    def embed(self, texts):
+        raise ConnectionError("embedding API unreachable")
+
+
+def test_near_duplicate_hits_and_unrelated_misses():
+    cache = SemanticCache(HashingEmbedder(), threshold=0.9)
+    cache.add("cheap eats in bangkok", "pad thai at the night market")
+
+    assert cache.lookup("Cheap eats in Bangkok?") == "pad thai at the night market"
+    assert cache.lookup("rooftop bars in tokyo") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_threshold_is_configurable():
+    strict = SemanticCache(HashingEmbedder(), threshold=0.999)
+    loose = SemanticCache(HashingEmbedder(), threshold=0.5)
+    for cache in (strict, loose):
+        cache.add("cheap eats in bangkok", "answer")
+    assert strict.lookup("cheap food in bangkok") is None
+    assert loose.lookup("cheap food in bangkok") == "answer"
+
+
+def test_miss_then_add_embeds_once():
+    embedder = CountingEmbedder()
+    cache = SemanticCache(embedder)
+    assert cache.lookup("hidden cafes in paris") is None
+    cache.add("hidden cafes in paris", "answer")
+    assert embedder.calls == 1
+
+
+def test_expired_entries_are_ignored():
+    cache = SemanticCache(HashingEmbedder(), ttl_seconds=0)
+    cache.add("cheap eats in bangkok", "answer")
+    assert cache.lookup("cheap eats in bangkok") is None
+
+
+def test_grows_then_overwrites_oldest_slot():
+    cache = SemanticCache(HashingEmbedder(dim=64), threshold=0.99, max_entries=3000)
+    texts = [f"place number {i} in city {i * 7}" for i in range(3001)]
+    for i, text in enumerate(texts):
+        cache.add(text, str(i))
+
+    assert cache.stats()["entries"] == 3000
+    assert cache._vectors.shape[0] == 3000
+    assert cache.lookup(texts[-1]) == "3000"
+    assert cache.lookup(texts[0]) != "0"  # its slot went to the newest entry
+    assert np.allclose(np.linalg.norm(cache._vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_async_lookup_and_add():
+    cache = SemanticCache(HashingEmbedder())
+
+    async def run():
+        await cache.aadd("vintage shops in lisbon", "answer")
+        return await cache.alookup("vintage shops in Lisbon")
+
+    assert asyncio.run(run()) == "answer"
+
+
+def test_async_search_runs_off_the_event_loop(monkeypatch):
+    cache = SemanticCache(HashingEmbedder())
+    cache.add("vintage shops in lisbon", "answer")
+    threads = []
+    search = cache._search
+
+    def recording(query):
+        threads.append(threading.current_thread())
+        return search(query)
+
+    monkeypatch.setattr(cache, "_search", recording)
+
+    async def run():
+        return threading.current_thread(), await cache.alookup("vintage shops in lisbon")
+
+    loop_thread, answer = asyncio.run(run())
+    assert answer == "answer"
+    assert threads and threads[0] is not loop_thread
+
+
+def test_chat_served_from_semantic_cache(chat):
+    chat.client.semantic_cache = SemanticCache(HashingEmbedder(), threshold=0.9)
+
+    first = "".join(chat.client.stream_chat_to_gemini(user_messages("cheap eats in bangkok")))
+    second = "".join(chat.client.stream_chat_to_gemini(user_messages("Cheap eats in Bangkok?")))
+
+    assert second == first
+    assert chat.llm.calls == 1
+
+
+def test_follow_up_turns_skip_semantic_cache(chat):
+    chat.client.semantic_cache = SemanticCache(HashingEmbedder(), threshold=0.9)
+    "".join(chat.client.stream_chat_to_gemini(user_messages("cheap eats in bangkok")))
+
+    follow_up = user_messages("cheap eats in tokyo", "try ramen", "cheap eats in bangkok")
+    "".join(chat.client.stream_chat_to_gemini(follow_up))
+    assert chat.llm.calls == 2
+
+
+def test_embedding_errors_do_not_break_the_chat(chat):
+    chat.client.semantic_cache = SemanticCache(BrokenEmbedder())
+
+    answer = "".join(chat.client.stream_chat_to_gemini(user_messages("cheap eats in bangkok")))
+    assert answer == chat.llm.answer  # no error message appended after a good reply
+
+    async def ask():
+        return "".join([p async for p in chat.client.astream_chat_to_gemini(user_messages("bars in seoul"))])
+
+    assert asyncio.run(ask()) == chat.llm.answer
+    assert chat.llm.calls == 2